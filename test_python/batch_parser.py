@@ -0,0 +1,203 @@
+"""
+Parseo en lote de varios binarios (dumps, revisiones de Picmatic) en paralelo
+
+Cada binario se parsea en un proceso del pool: el proceso abre el binario (o
+descomprime su miembro del zip), lo parsea, escribe su JSON y devuelve el
+grafo como columnas array, no como objetos. Al final se escribe un resumen
+conjunto.
+
+Uso:
+    python test_python/batch_parser.py binarios... [-j N] [-o salida.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from parser import (
+    PARSE_ERRORS,
+    PARSER_VERSION,
+    SceneGraph,
+    _output_path,
+    graph_from_columns,
+    graph_to_columns,
+    list_binaries,
+    load_scene_graph,
+    open_binary,
+    write_scene_graph,
+)
+from scene_cache import DEFAULT_CACHE_DIR, SceneCache
+from scene_writer import FORMATS, SceneStreamWriter
+
+
+class BatchTask(NamedTuple):
+    """Trabajo de un proceso del pool: un binario"""
+    name: str
+    path: str
+    member: Optional[str]
+    output_path: str
+    fmt: str
+    cache_dir: Optional[str]
+
+
+class BatchResult(NamedTuple):
+    """Resultado de un binario: resumen y columnas del grafo (vacías si falló)"""
+    summary: Dict
+    columns: Dict[str, array]
+
+    def graph(self) -> Optional[SceneGraph]:
+        """Reconstruye el SceneGraph del binario, o None si no se pudo parsear"""
+        return graph_from_columns(self.columns) if self.columns else None
+
+
+def _parse_task(task: BatchTask) -> BatchResult:
+    """Parsea un binario en un proceso del pool y escribe su JSON"""
+    t0 = time.perf_counter()
+    summary = {'name': task.name, 'output': task.output_path}
+    cache = SceneCache(task.cache_dir, version=str(PARSER_VERSION)) if task.cache_dir else None
+    try:
+        data = open_binary(task.path, task.member)
+        summary['size'] = len(data)
+        # los mensajes de progreso de varios procesos a la vez no se leerían
+        with contextlib.redirect_stdout(io.StringIO()):
+            graph = load_scene_graph(data, cache)
+            with open(task.output_path, 'w', encoding='utf-8') as f:
+                counts = write_scene_graph(graph, SceneStreamWriter(f, task.fmt))
+    except PARSE_ERRORS as e:
+        if os.path.exists(task.output_path):
+            os.remove(task.output_path)
+        summary.update(error=str(e), output=None, seconds=time.perf_counter() - t0)
+        return BatchResult(summary, {})
+
+    summary.update(counts)
+    summary.update(
+        frame_runs=len(graph.frames),
+        graph_nodes=len(graph.nodes),
+        hitboxes=len(graph.nodes.hitboxes),
+        cache_hit=bool(cache and cache.hits),
+        seconds=time.perf_counter() - t0,
+    )
+    return BatchResult(summary, graph_to_columns(graph, with_text=True))
+
+
+def build_tasks(paths: List[str], output: str, fmt: str = 'pretty',
+                cache_dir: Optional[str] = None) -> List[BatchTask]:
+    """
+    Crea un trabajo por binario (cada miembro de un zip es un binario)
+
+    Args:
+        paths: rutas a binarios o zips
+        output: ruta base de los JSON; se añade el nombre de cada binario
+        fmt: formato de salida (ver scene_writer)
+        cache_dir: directorio de la caché de parseos; None para no usarla
+    """
+    used_paths = set()
+    tasks = []
+    for path in paths:
+        for name, member in list_binaries(path):
+            tasks.append(BatchTask(name, path, member, _output_path(name, output, used_paths),
+                                   fmt, cache_dir))
+    return tasks
+
+
+def parse_batch(tasks: List[BatchTask], jobs: Optional[int] = None) -> List[BatchResult]:
+    """
+    Parsea los binarios en un ProcessPoolExecutor
+
+    Args:
+        tasks: trabajos de build_tasks
+        jobs: número de procesos; None para uno por núcleo
+
+    Returns:
+        Un BatchResult por trabajo, en el mismo orden
+    """
+    if jobs == 1:
+        return [_parse_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_parse_task, tasks))
+
+
+def write_summary(results: List[BatchResult], summary_path: str, seconds: float) -> Dict:
+    """Escribe el resumen conjunto del lote y lo devuelve"""
+    parsed = [r.summary for r in results if 'error' not in r.summary]
+    summary = {
+        'parser_version': PARSER_VERSION,
+        'binaries': len(results),
+        'parsed': len(parsed),
+        'failed': len(results) - len(parsed),
+        'seconds': seconds,
+        'roms_per_second': len(results) / seconds if seconds else 0.0,
+        'totals': {
+            key: sum(s[key] for s in parsed)
+            for key in ('chunks', 'chunk_nodes', 'spare_chunks', 'graph_nodes', 'hitboxes')
+        },
+        'roms': [r.summary for r in results],
+    }
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def run_batch(paths: List[str], output: str = 'output.json', jobs: Optional[int] = None,
+              fmt: str = 'pretty', cache_dir: Optional[str] = None) -> Tuple[List[BatchResult], Dict]:
+    """
+    Parsea un lote completo y escribe los JSON y el resumen
+
+    Returns:
+        Tupla (resultados, resumen)
+    """
+    tasks = build_tasks(paths, output, fmt, cache_dir)
+    t0 = time.perf_counter()
+    results = parse_batch(tasks, jobs)
+    seconds = time.perf_counter() - t0
+    root, ext = os.path.splitext(output)
+    summary = write_summary(results, f"{root}_summary{ext}", seconds)
+    return results, summary
+
+
+def main():
+    """Función principal"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('binaries', nargs='+', help="binarios (.bin) o zips con binarios")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help="procesos en paralelo (por defecto uno por núcleo)")
+    arg_parser.add_argument('-o', '--output', default='output.json',
+                            help="ruta base de los JSON; se añade el nombre de cada binario "
+                                 "y el resumen va a <ruta>_summary.json")
+    arg_parser.add_argument('-f', '--format', choices=FORMATS, default='pretty')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="no consultar ni guardar en la caché de parseos")
+    arg_parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    args = arg_parser.parse_args()
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    try:
+        results, summary = run_batch(args.binaries, args.output, args.jobs, args.format, cache_dir)
+    except FileNotFoundError as e:
+        print(f"Error: No se encontró el archivo {e.filename}")
+        sys.exit(1)
+
+    for result in results:
+        s = result.summary
+        if 'error' in s:
+            print(f"✗ {s['name']}: {s['error']}")
+        else:
+            print(f"✓ {s['name']}: {s['chunks']} chunks, {s['graph_nodes']} nodos, "
+                  f"{s['hitboxes']} hitboxes ({s['seconds'] * 1000:.1f} ms) -> {s['output']}")
+    print(f"\n{summary['parsed']}/{summary['binaries']} binarios en {summary['seconds']:.2f} s "
+          f"({summary['roms_per_second']:.1f} ROMs/s)")
+
+    if not summary['parsed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+"""
+Benchmarks del parser de binarios (test_python/parser.py)
+
+Uso:
+    python test_python/bench_parser.py [benchmark|all] [ruta_binario]
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from parser import (
+    DEFAULT_BINARY,
+    FRAME_SIZE,
+    MEMORY_OFFSET,
+    FrameIndex,
+    NodeTable,
+    SceneGraph,
+    TreeLogicNode,
+    build_scene_graph,
+    detect_chunks,
+    find_frame_sequences,
+    open_binaries,
+    parse_data,
+    parse_node_graph,
+    read_scene_order,
+    _find_frame_sequences_bytewise,
+)
+from scene_writer import SceneStreamWriter
+
+
+REPEAT = 5
+
+
+def _best_of(fn: Callable, repeat: int = REPEAT) -> float:
+    """Devuelve el mejor tiempo (en segundos) de varias ejecuciones de fn"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_scanner(data: bytes) -> None:
+    """Compara el escáner de frames byte a byte con el de regex"""
+    old = _find_frame_sequences_bytewise(data)
+    new = find_frame_sequences(data)
+    if old != new:
+        raise AssertionError("Los escáneres devuelven secuencias distintas")
+
+    t_old = _best_of(lambda: _find_frame_sequences_bytewise(data))
+    t_new = _best_of(lambda: find_frame_sequences(data))
+    print(f"  secuencias encontradas: {len(new)}")
+    print(f"  byte a byte: {t_old * 1000:9.3f} ms")
+    print(f"  regex:       {t_new * 1000:9.3f} ms  (x{t_old / t_new:.1f})")
+
+
+class _LinearFrameIndex(FrameIndex):
+    """Índice con la búsqueda lineal original, solo para comparar"""
+
+    def __init__(self, frames: List[List[Tuple[int, str]]]):
+        self.entries = [(offset, run_id, frame_str)
+                        for run_id, run in enumerate(frames)
+                        for offset, frame_str in run]
+
+    def lookup(self, offset: int, run_id: Optional[int] = None) -> Optional[str]:
+        for entry_offset, entry_run, frame_str in self.entries:
+            if entry_offset == offset:
+                if run_id is not None and entry_run != run_id:
+                    return None
+                return frame_str
+        return None
+
+
+def _parse_nodes(data: bytes, frames: List[List[Tuple[int, str]]]) -> List[Tuple[TreeLogicNode, Optional[int]]]:
+    """Parsea los nodos de todos los chunks y spare chunks como parse_binary"""
+    scenes = read_scene_order(data)
+    roots = [p - MEMORY_OFFSET for p in scenes] + [run[0][0] - TreeLogicNode.SIZE for run in frames]
+    graph = parse_node_graph(data, roots)
+
+    nodes = []
+    for run_id, run in enumerate(frames):
+        for chunk in detect_chunks(data, run, graph):
+            nodes.append((chunk['data_struct'], run_id))
+    parsed = {node.mem_offset for node, _ in nodes}
+    for p in dict.fromkeys(reversed(scenes)):
+        if p not in parsed:
+            nodes.append((graph[p - MEMORY_OFFSET], None))
+    return nodes
+
+
+def bench_serialize(data: bytes) -> None:
+    """Serializa todos los chunks y spare chunks con ambos índices de frames"""
+    frames = find_frame_sequences(data)
+    nodes = _parse_nodes(data, frames)
+    linear = _LinearFrameIndex(frames)
+    index = FrameIndex(frames)
+
+    def serialize(frames_index):
+        return [node.to_dict(frames_index, run_id) for node, run_id in nodes]
+
+    if serialize(linear) != serialize(index):
+        raise AssertionError("La serialización cambia con el índice de frames")
+
+    t_old = _best_of(lambda: serialize(linear))
+    t_new = _best_of(lambda: serialize(index))
+    print(f"  nodos serializados: {len(nodes)}")
+    print(f"  búsqueda lineal: {t_old * 1000:9.3f} ms")
+    print(f"  FrameIndex:      {t_new * 1000:9.3f} ms  (x{t_old / t_new:.1f})")
+
+
+def bench_alloc(data: bytes) -> None:
+    """Cuenta la memoria reservada al parsear el grafo de nodos con tracemalloc"""
+    frames = find_frame_sequences(data)
+    roots = [p - MEMORY_OFFSET for p in read_scene_order(data)]
+    roots += [run[0][0] - TreeLogicNode.SIZE for run in frames]
+
+    tracemalloc.start()
+    try:
+        nodes = parse_node_graph(data, roots)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    hitboxes = sum(len(node.hitbox_struct) for node in nodes.values())
+    print(f"  nodos: {len(nodes)}, hitboxes: {hitboxes}")
+    print(f"  memoria retenida: {current / 1024:9.1f} KiB ({current / len(nodes):.0f} bytes/nodo)")
+    print(f"  pico de memoria:  {peak / 1024:9.1f} KiB")
+
+
+def bench_tables(data: bytes) -> None:
+    """Compara la memoria del grafo como objetos y como NodeTable"""
+    frames = find_frame_sequences(data)
+    roots = [p - MEMORY_OFFSET for p in read_scene_order(data)]
+    roots += [run[0][0] - TreeLogicNode.SIZE for run in frames]
+
+    tracemalloc.start()
+    try:
+        nodes = parse_node_graph(data, roots)
+        objects_size, _ = tracemalloc.get_traced_memory()
+        table = NodeTable.from_nodes(nodes)
+        del nodes
+        table_size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(f"  nodos: {len(table)}, hitboxes: {len(table.hitboxes)}")
+    print(f"  objetos TreeLogicNode/HitboxStruct: {objects_size / 1024:9.1f} KiB")
+    print(f"  NodeTable (retenido):               {table_size / 1024:9.1f} KiB  (x{objects_size / table_size:.1f})")
+    print(f"  NodeTable (datos de columnas):      {table.nbytes() / 1024:9.1f} KiB")
+
+
+def _measure(fn: Callable) -> Tuple[float, int]:
+    """Tiempo (s) y pico de memoria (bytes, tracemalloc) de una ejecución de fn"""
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_writer(data: bytes) -> None:
+    """Compara json.dump del resultado completo con SceneStreamWriter"""
+    def dump_all():
+        with open(os.devnull, 'w', encoding='utf-8') as f:
+            json.dump(parse_data('bench', data), f, indent=2, ensure_ascii=False)
+
+    def stream(fmt):
+        with open(os.devnull, 'w', encoding='utf-8') as f:
+            parse_data('bench', data, SceneStreamWriter(f, fmt))
+
+    t, peak = _measure(dump_all)
+    print(f"  json.dump completo: {t * 1000:9.3f} ms, pico {peak / 1024:9.1f} KiB")
+    for fmt in ('pretty', 'compact', 'ndjson'):
+        t, peak = _measure(lambda: stream(fmt))
+        print(f"  streaming {fmt:8s}: {t * 1000:9.3f} ms, pico {peak / 1024:9.1f} KiB")
+
+
+BATCH_ROMS = 16
+
+
+def bench_batch(data: bytes) -> None:
+    """ROMs/s del parseo en lote con un proceso y con uno por núcleo"""
+    from batch_parser import run_batch
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i in range(BATCH_ROMS):
+            path = os.path.join(tmp_dir, f"rom_{i:02d}.bin")
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths.append(path)
+        output = os.path.join(tmp_dir, 'out.json')
+
+        jobs_options = [1, os.cpu_count() or 1]
+        print(f"  ROMs: {BATCH_ROMS}, núcleos: {jobs_options[-1]}")
+        base = None
+        for jobs in dict.fromkeys(jobs_options):
+            _, summary = run_batch(paths, output, jobs=jobs, cache_dir=None)
+            rate = summary['roms_per_second']
+            base = base or rate
+            print(f"  {jobs:2d} procesos: {summary['seconds'] * 1000:9.1f} ms, "
+                  f"{rate:6.1f} ROMs/s  (x{rate / base:.1f})")
+
+
+HIT_TEST_SHOTS = 1_000_000
+
+
+def bench_hit_test(data: bytes) -> None:
+    """Disparos/s de HitTable.query con la mitad de los disparos dentro de alguna ventana"""
+    import numpy as np
+
+    from hit_test import HitTable
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph = build_scene_graph(memoryview(data))
+    t0 = time.perf_counter()
+    table = HitTable.from_graph(graph)
+    t_build = time.perf_counter() - t0
+
+    rng = np.random.default_rng(0)
+    frames = rng.integers(table.frame_lo.min(), table.frame_hi.max() + 1, HIT_TEST_SHOTS)
+    rows = rng.integers(0, len(table), HIT_TEST_SHOTS // 2)
+    frames[:len(rows)] = rng.integers(table.frame_lo[rows], table.frame_hi[rows] + 1)
+    xs = rng.integers(0, 320, HIT_TEST_SHOTS)
+    ys = rng.integers(0, 256, HIT_TEST_SHOTS)
+
+    hits = int((table.query(frames, xs, ys) >= 0).sum())
+    t = _best_of(lambda: table.query(frames, xs, ys))
+    print(f"  hitboxes: {len(table)}, máx. activos por frame: {table.max_active}")
+    print(f"  tabla e índice: {t_build * 1000:9.3f} ms")
+    print(f"  {HIT_TEST_SHOTS} disparos ({hits} impactos): {t * 1000:9.3f} ms, "
+          f"{HIT_TEST_SHOTS / t / 1e6:.1f} M disparos/s")
+
+
+SIMULATE_RUNS = 200_000
+
+
+def _toy_graph(nodes: List[Tuple[int, List[int], bool]]) -> SceneGraph:
+    """
+    Grafo hecho a mano: por nodo (frames, índices de sus secuencias, muerte)
+
+    Un índice None en las secuencias es un puntero a 0. El primer nodo es la
+    única escena.
+    """
+    table = NodeTable()
+    frames = []
+
+    def offset(i: int) -> int:
+        return 0x100 + i * TreeLogicNode.SIZE
+
+    for i, (num_frames, sequences, death) in enumerate(nodes):
+        run_offset = 0x8000 + i * 2 * FRAME_SIZE
+        frames.append([(run_offset, f"{1000 * i:05d}"), (run_offset + FRAME_SIZE, f"{1000 * i + num_frames - 1:05d}")])
+        for name in NodeTable.COLUMNS:
+            getattr(table, name).append(0)
+        table.file_offset[i] = offset(i)
+        if not death:
+            table.ptr_frame_start[i] = run_offset + MEMORY_OFFSET
+            table.ptr_frame_end[i] = run_offset + FRAME_SIZE + MEMORY_OFFSET
+        table.flags[i] = NodeTable.FLAG_DEATH if death else 0
+        table.seq_ptrs.extend(0 if k is None else offset(k) + MEMORY_OFFSET for k in sequences)
+        table.seq_start.append(len(table.seq_ptrs))
+        table.hitbox_start.append(0)
+    return SceneGraph(frames, [offset(0) + MEMORY_OFFSET], table)
+
+
+def _check_scene_paths() -> None:
+    """Un nodo cuyas secuencias solo llevan a la muerte no termina la escena"""
+    from simulator import GameModel
+
+    graph = _toy_graph([
+        (10, [1, 2, 3], False),  # 0: escena
+        (5, [4], False),  # 1: fallo -> muerte
+        (20, [], False),  # 2: final
+        (7, [None], False),  # 3: puntero a 0, final como en transitions
+        (0, [], True),  # 4: muerte
+    ])
+    paths = GameModel(graph).scene_paths()[0]
+    if (paths.min_frames, paths.max_frames, paths.paths) != (17, 30, 2):
+        raise AssertionError(f"scene_paths cuenta mal las salidas de la escena: {paths}")
+
+
+def bench_simulate(data: bytes) -> None:
+    """Partidas/s del Monte Carlo de simulator.py con un proceso y con uno por núcleo"""
+    from simulator import STRATEGIES, GameModel, simulate
+
+    _check_scene_paths()
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph = build_scene_graph(memoryview(data))
+    t0 = time.perf_counter()
+    model = GameModel(graph)
+    for strategy in STRATEGIES.values():
+        model.tables(strategy)
+    print(f"  transiciones de {len(STRATEGIES)} estrategias: {(time.perf_counter() - t0) * 1000:9.3f} ms")
+
+    jobs_options = [1, os.cpu_count() or 1]
+    for strategy in STRATEGIES.values():
+        base = None
+        for jobs in dict.fromkeys(jobs_options):
+            t0 = time.perf_counter()
+            simulate(model, strategy, SIMULATE_RUNS, jobs=jobs)
+            rate = SIMULATE_RUNS / (time.perf_counter() - t0)
+            base = base or rate
+            print(f"  {strategy.name:9s} {jobs:2d} procesos: {rate / 1e6:6.2f} M partidas/s  (x{rate / base:.1f})")
+
+
+def bench_graph(data: bytes) -> None:
+    """Tiempo de cada paso de graph_analysis sobre el grafo completo"""
+    from graph_analysis import GraphAnalysis, build_adjacency, dominators, strongly_connected_components
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph = build_scene_graph(memoryview(data))
+    adj = build_adjacency(graph.nodes)
+    analysis = GraphAnalysis(graph)
+    roots = analysis.roots
+    print(f"  {len(adj)} nodos, {len(adj.targets)} aristas")
+    # el resumen por chunk cuenta las mismas aristas de muerte que death_edges
+    summary = analysis.chunk_summary(0, list(range(len(adj))))
+    if summary['death_edges'] != len(analysis.death_edges()):
+        raise AssertionError(f"chunk_summary cuenta {summary['death_edges']} aristas de muerte, "
+                             f"death_edges {len(analysis.death_edges())}")
+    for label, fn in (
+        ("adyacencia CSR", lambda: build_adjacency(graph.nodes)),
+        ("componentes (Tarjan)", lambda: strongly_connected_components(adj)),
+        ("dominadores (Lengauer-Tarjan)", lambda: dominators(adj, roots)),
+        ("análisis completo + to_dict", lambda: GraphAnalysis(graph).to_dict()),
+    ):
+        print(f"  {label:30s} {_best_of(fn) * 1000:9.3f} ms")
+
+
+# los de batch, hit_test, simulate y graph importan su módulo (y numpy) al
+# ejecutarse, para que el resto funcione sin esas dependencias
+BENCHMARKS: Dict[str, Callable[[bytes], None]] = {
+    'scanner': bench_scanner,
+    'serialize': bench_serialize,
+    'alloc': bench_alloc,
+    'tables': bench_tables,
+    'writer': bench_writer,
+    'batch': bench_batch,
+    'hit_test': bench_hit_test,
+    'simulate': bench_simulate,
+    'graph': bench_graph,
+}
+
+
+def main():
+    """Función principal"""
+    name = sys.argv[1] if len(sys.argv) > 1 else 'all'
+    binary_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BINARY
+
+    if name != 'all' and name not in BENCHMARKS:
+        print(f"Benchmark desconocido: {name}. Disponibles: {', '.join(BENCHMARKS)}")
+        sys.exit(1)
+
+    # el escáner byte a byte de referencia necesita bytes, no un mmap
+    binary_name, data = open_binaries(binary_path)[0]
+    data = bytes(data)
+    print(f"Binario: {binary_name} ({len(data)} bytes)")
+
+    for bench_name, bench in BENCHMARKS.items():
+        if name in ('all', bench_name):
+            print(f"\n[{bench_name}]")
+            bench(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,444 @@
+"""
+Análisis del grafo de nodos: alcanzabilidad, componentes fuertemente conexas,
+dominadores y subgrafo de muertes y respawns
+
+El grafo se guarda una sola vez como listas de adyacencia en formato CSR
+(igual que las secuencias de NodeTable): start[fila] y start[fila + 1]
+delimitan en targets las filas a las que apunta cada nodo, primero sus
+secuencias y después su ptr_node_respawn, y kinds dice de qué tipo es cada
+arista. Sobre esos arrays todos los recorridos son lineales en nodos más
+aristas (los dominadores, casi lineales: Lengauer-Tarjan con compresión de
+caminos).
+
+Las raíces son los nodos de scene_order: un nodo al que no se llega desde
+ninguna escena siguiendo secuencias o respawns es inalcanzable.
+
+Uso:
+    python test_python/graph_analysis.py [binario] [-o analisis.json]
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from parser import (
+    DEFAULT_BINARY,
+    MEMORY_OFFSET,
+    PARSE_ERRORS,
+    PARSER_VERSION,
+    NodeTable,
+    SceneGraph,
+    _open_binaries_or_exit,
+    load_scene_graph,
+)
+from scene_cache import DEFAULT_CACHE_DIR, SceneCache
+
+
+EDGE_SEQUENCE = 0  # arista de lista_nodes
+EDGE_RESPAWN = 1  # arista de ptr_node_respawn
+NO_NODE = -1  # sin dominador inmediato (raíz) o nodo inalcanzable
+
+
+class Adjacency(NamedTuple):
+    """Aristas del grafo en formato CSR, por fila de NodeTable"""
+    start: array  # 'I', len(nodos) + 1
+    targets: array  # 'I', fila destino de cada arista
+    kinds: array  # 'B', EDGE_SEQUENCE o EDGE_RESPAWN
+    dangling: List[int]  # punteros de memoria que no llevan a ningún nodo del grafo
+
+    def __len__(self) -> int:
+        return len(self.start) - 1
+
+    def successors(self, row: int) -> array:
+        """Filas a las que apunta un nodo"""
+        return self.targets[self.start[row]:self.start[row + 1]]
+
+    def reverse(self) -> 'Adjacency':
+        """Grafo traspuesto (predecesores de cada fila), con counting sort"""
+        n = len(self)
+        start = array('I', [0]) * (n + 1)
+        for t in self.targets:
+            start[t + 1] += 1
+        for row in range(n):
+            start[row + 1] += start[row]
+        fill = array('I', start[:n])
+        targets = array('I', [0]) * len(self.targets)
+        kinds = array('B', [0]) * len(self.targets)
+        for row in range(n):
+            for i in range(self.start[row], self.start[row + 1]):
+                t = self.targets[i]
+                targets[fill[t]] = row
+                kinds[fill[t]] = self.kinds[i]
+                fill[t] += 1
+        return Adjacency(start, targets, kinds, [])
+
+
+def build_adjacency(nodes: NodeTable) -> Adjacency:
+    """
+    Aristas de todos los nodos de una NodeTable
+
+    Args:
+        nodes: tabla de nodos de load_scene_graph
+
+    Returns:
+        Adyacencia CSR; los punteros a 0 no son aristas y los que no llevan a
+        ningún nodo se guardan en dangling
+    """
+    row_of = {offset: row for row, offset in enumerate(nodes.file_offset)}
+    start = array('I', [0])
+    targets = array('I')
+    kinds = array('B')
+    dangling = []
+
+    def add(ptr: int, kind: int) -> None:
+        row = row_of.get(ptr - MEMORY_OFFSET)
+        if row is None:
+            dangling.append(ptr)
+        else:
+            targets.append(row)
+            kinds.append(kind)
+
+    for row in range(len(nodes)):
+        for ptr in nodes.seq_ptrs[nodes.seq_start[row]:nodes.seq_start[row + 1]]:
+            if ptr != 0:
+                add(ptr, EDGE_SEQUENCE)
+        if nodes.ptr_node_respawn[row] != 0:
+            add(nodes.ptr_node_respawn[row], EDGE_RESPAWN)
+        start.append(len(targets))
+    return Adjacency(start, targets, kinds, dangling)
+
+
+def node_row(nodes: NodeTable, mem_ptr: int) -> int:
+    """Fila del nodo al que apunta un puntero de memoria, o NO_NODE"""
+    try:
+        return nodes.row_of(mem_ptr - MEMORY_OFFSET)
+    except KeyError:
+        return NO_NODE
+
+
+def reachable(adj: Adjacency, roots: Iterable[int]) -> bytearray:
+    """Marca (1) de las filas alcanzables desde las raíces, en anchura"""
+    seen = bytearray(len(adj))
+    queue = deque()
+    for root in roots:
+        if not seen[root]:
+            seen[root] = 1
+            queue.append(root)
+    while queue:
+        row = queue.popleft()
+        for t in adj.successors(row):
+            if not seen[t]:
+                seen[t] = 1
+                queue.append(t)
+    return seen
+
+
+def strongly_connected_components(adj: Adjacency) -> Tuple[array, int]:
+    """
+    Componentes fuertemente conexas (Tarjan, sin recursión)
+
+    Returns:
+        (componente de cada fila, número de componentes); las componentes se
+        numeran en orden topológico inverso: las aristas entre componentes
+        van de un número mayor a uno menor
+    """
+    n = len(adj)
+    start, targets = adj.start, adj.targets
+    index = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    comp = array('i', [-1]) * n
+    on_stack = bytearray(n)
+    stack: List[int] = []
+    counter = 0
+    count = 0
+
+    for s in range(n):
+        if index[s] != -1:
+            continue
+        index[s] = low[s] = counter
+        counter += 1
+        stack.append(s)
+        on_stack[s] = 1
+        work = [[s, start[s]]]  # (fila, siguiente arista por mirar)
+        while work:
+            frame = work[-1]
+            v, i = frame
+            if i < start[v + 1]:
+                frame[1] = i + 1
+                w = targets[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append([w, start[w]])
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = count
+                    if w == v:
+                        break
+                count += 1
+    return comp, count
+
+
+def dominators(adj: Adjacency, roots: List[int]) -> array:
+    """
+    Dominador inmediato de cada fila (Lengauer-Tarjan, versión simple)
+
+    Se añade una raíz virtual con aristas a todas las raíces: un nodo domina
+    a otro si todos los caminos desde cualquier escena pasan por él.
+
+    Returns:
+        Fila del dominador inmediato, o NO_NODE para las raíces (solo las
+        domina la raíz virtual) y los nodos inalcanzables
+    """
+    n = len(adj)
+    virtual = n
+    start, targets = adj.start, adj.targets
+    preds = adj.reverse()
+
+    # recorrido en profundidad desde la raíz virtual: número de preorden y padre
+    dfnum = array('i', [-1]) * (n + 1)
+    parent = array('i', [-1]) * (n + 1)
+    vertex: List[int] = []
+    dfnum[virtual] = 0
+    vertex.append(virtual)
+    work = [(virtual, iter(roots))]
+    while work:
+        v, it = work[-1]
+        for w in it:
+            if dfnum[w] == -1:
+                dfnum[w] = len(vertex)
+                vertex.append(w)
+                parent[w] = v
+                work.append((w, iter(targets[start[w]:start[w + 1]])))
+                break
+        else:
+            work.pop()
+
+    semi = array('i', dfnum)  # semidominador como número de preorden
+    label = array('i', range(n + 1))
+    ancestor = array('i', [-1]) * (n + 1)
+    idom = array('i', [NO_NODE]) * (n + 1)
+    bucket: Dict[int, List[int]] = {}
+    root_set = set(roots)
+
+    def evaluate(v: int) -> int:
+        if ancestor[v] == -1:
+            return v
+        # compresión de caminos sin recursión: de arriba abajo
+        path = []
+        while ancestor[ancestor[v]] != -1:
+            path.append(v)
+            v = ancestor[v]
+        for x in reversed(path):
+            a = ancestor[x]
+            if semi[label[a]] < semi[label[x]]:
+                label[x] = label[a]
+            ancestor[x] = ancestor[a]
+        return label[path[0]] if path else label[v]
+
+    for i in range(len(vertex) - 1, 0, -1):
+        w = vertex[i]
+        p = parent[w]
+        candidates = list(preds.successors(w))
+        if w in root_set:
+            candidates.append(virtual)
+        for v in candidates:
+            if dfnum[v] == -1:
+                continue  # predecesor inalcanzable
+            u = evaluate(v)
+            if semi[u] < semi[w]:
+                semi[w] = semi[u]
+        bucket.setdefault(vertex[semi[w]], []).append(w)
+        ancestor[w] = p
+        for v in bucket.pop(p, ()):
+            u = evaluate(v)
+            idom[v] = u if semi[u] < semi[v] else p
+
+    for i in range(1, len(vertex)):
+        w = vertex[i]
+        if idom[w] != vertex[semi[w]]:
+            idom[w] = idom[idom[w]]
+
+    result = idom[:n]
+    for row in range(n):
+        if result[row] == virtual:
+            result[row] = NO_NODE
+    return result
+
+
+class GraphAnalysis:
+    """Resultados del análisis de un grafo parseado, por fila de NodeTable"""
+
+    def __init__(self, graph: SceneGraph, roots: Optional[List[int]] = None):
+        """
+        Args:
+            graph: grafo de build_scene_graph/load_scene_graph
+            roots: punteros de memoria de los nodos de partida; por defecto
+                todo scene_order
+        """
+        self.nodes = graph.nodes
+        self.adjacency = build_adjacency(self.nodes)
+        scenes = graph.scenes if roots is None else roots
+        # posición de cada fila en scene_order (la primera si se repite)
+        self.scene_index: Dict[int, int] = {}
+        for i, ptr in enumerate(scenes):
+            row = self.row(ptr)
+            if row != NO_NODE:
+                self.scene_index.setdefault(row, i)
+        self.roots = sorted(self.scene_index, key=self.scene_index.get)
+        self.reachable = reachable(self.adjacency, self.roots)
+        self.component, self.num_components = strongly_connected_components(self.adjacency)
+        self.idom = dominators(self.adjacency, self.roots)
+        self.death = [bool(flags & NodeTable.FLAG_DEATH) for flags in self.nodes.flags]
+
+    def row(self, mem_ptr: int) -> int:
+        """Fila del nodo al que apunta un puntero de memoria, o NO_NODE"""
+        return node_row(self.nodes, mem_ptr)
+
+    def name(self, row: int) -> str:
+        """Offset de fichero de una fila como lo escribe el parser"""
+        return f"0x{self.nodes.file_offset[row]:08x}"
+
+    def unreachable(self) -> List[int]:
+        """Filas a las que no se llega desde ninguna raíz"""
+        return [row for row in range(len(self.adjacency)) if not self.reachable[row]]
+
+    def cycles(self) -> List[List[int]]:
+        """Componentes con algún ciclo (más de un nodo o un nodo que se apunta a sí mismo)"""
+        members: List[List[int]] = [[] for _ in range(self.num_components)]
+        for row, comp in enumerate(self.component):
+            members[comp].append(row)
+        return [rows for rows in members
+                if len(rows) > 1 or rows[0] in self.adjacency.successors(rows[0])]
+
+    def death_edges(self) -> List[Tuple[int, int, int]]:
+        """
+        Subgrafo de muertes: (nodo, muerte, respawn) por cada secuencia que
+        lleva a un nodo de muerte; respawn es la fila de ptr_node_respawn
+        del nodo, o NO_NODE si no tiene
+        """
+        adj = self.adjacency
+        edges = []
+        for row in range(len(adj)):
+            respawn = NO_NODE
+            for i in range(adj.start[row], adj.start[row + 1]):
+                if adj.kinds[i] == EDGE_RESPAWN:
+                    respawn = adj.targets[i]
+            for i in range(adj.start[row], adj.start[row + 1]):
+                t = adj.targets[i]
+                if adj.kinds[i] == EDGE_SEQUENCE and self.death[t]:
+                    edges.append((row, t, respawn))
+        return edges
+
+    def dominated_by(self, row: int) -> List[int]:
+        """Dominadores de una fila, del inmediato hasta la raíz"""
+        chain = []
+        row = self.idom[row]
+        while row != NO_NODE:
+            chain.append(row)
+            row = self.idom[row]
+        return chain
+
+    def chunk_summary(self, chunk_id: int, rows: List[int]) -> Dict:
+        """Resumen de un chunk del parser para su lista de escenas"""
+        adj = self.adjacency
+        order = [self.scene_index[r] for r in rows if r in self.scene_index]
+        return {
+            'id': chunk_id,
+            'scene_index': min(order) if order else None,
+            'reachable': any(self.reachable[r] for r in rows),
+            'unreachable_nodes': sum(1 for r in rows if not self.reachable[r]),
+            # como en death_edges, solo cuentan las secuencias, no los respawns
+            'death_edges': sum(1 for r in rows for i in range(adj.start[r], adj.start[r + 1])
+                               if adj.kinds[i] == EDGE_SEQUENCE and self.death[adj.targets[i]]),
+            'cyclic': any(self.component[r] == self.component[t]
+                          for r in rows for t in adj.successors(r)),
+        }
+
+    def to_dict(self, chunks: Optional[List[Tuple[int, List[int]]]] = None) -> Dict:
+        """
+        Resultado en el formato del JSON del parser (offsets como '0x%08x')
+
+        Args:
+            chunks: (id, filas) de cada chunk detectado, para resumirlos
+        """
+        deaths = self.death_edges()
+        respawns = sorted({r for _, _, r in deaths if r != NO_NODE})
+        return {
+            'nodes': len(self.adjacency),
+            'edges': len(self.adjacency.targets),
+            'dangling': [f"0x{p:08x}" for p in self.adjacency.dangling],
+            'reachable': sum(self.reachable),
+            'unreachable': [self.name(r) for r in self.unreachable()],
+            'components': self.num_components,
+            'cycles': [[self.name(r) for r in rows] for rows in self.cycles()],
+            'dominators': {self.name(r): self.name(self.idom[r]) if self.idom[r] != NO_NODE else None
+                           for r in range(len(self.adjacency)) if self.reachable[r]},
+            'death': {
+                'nodes': [self.name(r) for r in range(len(self.adjacency)) if self.death[r]],
+                'edges': [{'node': self.name(n), 'death': self.name(d),
+                           'respawn': self.name(r) if r != NO_NODE else None}
+                          for n, d, r in deaths],
+                'respawn_targets': [self.name(r) for r in respawns],
+            },
+            'chunks': [self.chunk_summary(chunk_id, rows) for chunk_id, rows in chunks or []],
+        }
+
+
+def main():
+    """Función principal"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('binary', nargs='?', default=DEFAULT_BINARY, help="binario o zip del juego")
+    arg_parser.add_argument('-o', '--output', default=None, help="JSON con el análisis completo")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="no consultar ni guardar en la caché de parseos")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = arg_parser.parse_args()
+
+    cache = None if args.no_cache else SceneCache(args.cache_dir, version=str(PARSER_VERSION))
+    binaries = _open_binaries_or_exit(args.binary)
+    if len(binaries) != 1:
+        print(f"Error: {args.binary} contiene {len(binaries)} binarios, indica uno")
+        sys.exit(1)
+    name, data = binaries[0]
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            graph = load_scene_graph(memoryview(data), cache)
+        analysis = GraphAnalysis(graph)
+    except PARSE_ERRORS as e:
+        print(f"Error al analizar {name}: {e}")
+        sys.exit(1)
+
+    result = analysis.to_dict()
+    print(f"{name}: {result['nodes']} nodos, {result['edges']} aristas, "
+          f"{len(result['dangling'])} punteros sin nodo")
+    print(f"  - Alcanzables desde scene_order: {result['reachable']}, inalcanzables: {len(result['unreachable'])}")
+    print(f"  - Componentes fuertemente conexas: {result['components']}, con ciclos: {len(result['cycles'])}")
+    print(f"  - Nodos de muerte: {len(result['death']['nodes'])}, secuencias que matan: "
+          f"{len(result['death']['edges'])}, destinos de respawn: {len(result['death']['respawn_targets'])}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'binary': name, **result}, f, indent=2, ensure_ascii=False)
+        print(f"  - Salida: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Motor de hit-test de disparos sobre los hitboxes de todas las escenas
+
+Cada hitbox de cada nodo es una fila de HitTable, con su rectángulo (x0, y0,
+x1, y1, bordes incluidos, en coordenadas Amiga 320x256), la ventana de
+frames en la que se puede disparar (ptr_frame_hitbox_start..end, incluidos),
+el nodo al que pertenece, su posición k en la lista enlazada (un impacto
+lleva a lista_nodes[k + 1]) y su puntuación.
+
+Las consultas van por lotes de disparos (frame, x, y) en arrays de NumPy:
+las ventanas de frames se cortan en segmentos elementales, y cada segmento
+guarda en formato CSR las filas activas en él. Un disparo busca su segmento
+con searchsorted y se compara a la vez con el k-ésimo candidato de todos
+los disparos; como en un frame hay activos muy pocos hitboxes, son unas
+pocas pasadas vectorizadas por lote.
+
+Uso:
+    python test_python/hit_test.py disparos.csv|disparos.npy [-b binario] [-o resultado.csv]
+"""
+
+import argparse
+import contextlib
+import sys
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+from parser import (
+    DEFAULT_BINARY,
+    PARSE_ERRORS,
+    PARSER_VERSION,
+    FrameIndex,
+    SceneGraph,
+    _open_binaries_or_exit,
+    load_scene_graph,
+)
+from scene_cache import DEFAULT_CACHE_DIR, SceneCache
+
+
+NO_HIT = -1
+REPLAY_BATCH = 1 << 20  # disparos por lote al reproducir un log
+
+
+class HitResult(NamedTuple):
+    """Resultado de un lote de disparos, un elemento por disparo"""
+    row: np.ndarray  # fila de HitTable alcanzada, o NO_HIT
+    node: np.ndarray  # offset de fichero del nodo, o NO_HIT
+    hitbox: np.ndarray  # posición k del hitbox en su nodo, o NO_HIT
+    score: np.ndarray  # puntuación del hitbox, 0 si se falla
+
+
+class HitTable:
+    """
+    Hitboxes de todos los nodos con su ventana de frames, por columnas
+
+    Las filas siguen el orden de NodeTable (offset de fichero) y, dentro de
+    cada nodo, el de la lista enlazada; cuando un disparo cae en varios
+    hitboxes a la vez gana el de fila más baja.
+    """
+
+    def __init__(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+                 frame_lo: np.ndarray, frame_hi: np.ndarray, node: np.ndarray,
+                 hitbox: np.ndarray, score: np.ndarray):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.frame_lo = frame_lo
+        self.frame_hi = frame_hi
+        self.node = node
+        self.hitbox = hitbox
+        self.score = score
+        self._build_index()
+
+    @classmethod
+    def from_graph(cls, graph: SceneGraph) -> 'HitTable':
+        """
+        Construye la tabla a partir de un grafo parseado
+
+        Se omiten los nodos de muerte y los hitboxes de nodos cuya ventana de
+        frames no apunta a un frame conocido o termina antes de empezar.
+
+        Args:
+            graph: grafo de build_scene_graph/load_scene_graph
+        """
+        nodes = graph.nodes
+        hitboxes = nodes.hitboxes
+        frames_index = FrameIndex(graph.frames)
+        hitbox_start = np.frombuffer(nodes.hitbox_start, dtype=np.uint32)
+        counts = np.diff(hitbox_start)
+
+        rows = []
+        frame_lo = []
+        frame_hi = []
+        for row in np.flatnonzero(counts):
+            node = nodes.row(int(row))
+            if node.is_death_and_destruction:
+                continue
+            lo = frames_index.frame_number(node.ptr_frame_hitbox_start)
+            hi = frames_index.frame_number(node.ptr_frame_hitbox_end)
+            if lo is None or hi is None or lo > hi:
+                continue
+            rows.append(row)
+            frame_lo.append(lo)
+            frame_hi.append(hi)
+
+        rows = np.array(rows, dtype=np.int64)
+        per_node = counts[rows].astype(np.int64)
+        # filas de HitboxTable de cada nodo, seguidas
+        first = hitbox_start[rows].astype(np.int64)
+        hitbox = np.arange(per_node.sum()) - np.repeat(np.cumsum(per_node) - per_node, per_node)
+        source = np.repeat(first, per_node) + hitbox
+
+        def column(name: str) -> np.ndarray:
+            return np.frombuffer(getattr(hitboxes, name), dtype=np.int32)[source]
+
+        x0, x1 = column('x0'), column('x1')
+        y0, y1 = column('y0'), column('y1')
+        return cls(
+            x0=np.minimum(x0, x1), y0=np.minimum(y0, y1),
+            x1=np.maximum(x0, x1), y1=np.maximum(y0, y1),
+            frame_lo=np.repeat(np.array(frame_lo, dtype=np.int64), per_node),
+            frame_hi=np.repeat(np.array(frame_hi, dtype=np.int64), per_node),
+            node=np.repeat(np.frombuffer(nodes.file_offset, dtype=np.uint32)[rows].astype(np.int64), per_node),
+            hitbox=hitbox,
+            score=column('score'),
+        )
+
+    def __len__(self) -> int:
+        return len(self.x0)
+
+    def _build_index(self) -> None:
+        """Segmentos elementales de frames y filas activas en cada uno (CSR)"""
+        # segmento i: frames [bounds[i], bounds[i + 1])
+        self.bounds = np.unique(np.concatenate([self.frame_lo, self.frame_hi + 1]))
+        first = np.searchsorted(self.bounds, self.frame_lo)
+        last = np.searchsorted(self.bounds, self.frame_hi + 1)
+        # una fila con frame_hi < frame_lo no está activa en ningún segmento
+        spans = np.maximum(last - first, 0)
+        rows = np.repeat(np.arange(len(self)), spans)
+        segments = np.repeat(first, spans) + (np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans))
+        order = np.lexsort((rows, segments))
+        self.seg_rows = rows[order]
+        self.seg_start = np.zeros(max(len(self.bounds), 1), dtype=np.int64)
+        np.cumsum(np.bincount(segments, minlength=len(self.seg_start) - 1), out=self.seg_start[1:])
+        self.max_active = int(np.diff(self.seg_start).max(initial=0))
+
+    def active_rows(self, frame: int) -> np.ndarray:
+        """Filas cuyo hitbox se puede disparar en un frame"""
+        seg = np.searchsorted(self.bounds, frame, side='right') - 1
+        if not 0 <= seg < len(self.seg_start) - 1:
+            return self.seg_rows[:0]
+        return self.seg_rows[self.seg_start[seg]:self.seg_start[seg + 1]]
+
+    def query(self, frames: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Fila alcanzada por cada disparo de un lote
+
+        Args:
+            frames: frame de cada disparo
+            xs: coordenada x de cada disparo
+            ys: coordenada y de cada disparo
+
+        Returns:
+            Array con la fila de la tabla de cada disparo, o NO_HIT
+        """
+        frames = np.asarray(frames)
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        result = np.full(len(frames), NO_HIT, dtype=np.int64)
+
+        seg = np.searchsorted(self.bounds, frames, side='right') - 1
+        pending = np.flatnonzero((seg >= 0) & (seg < len(self.seg_start) - 1))
+        seg = seg[pending]
+        start = self.seg_start[seg]
+        count = self.seg_start[seg + 1] - start
+
+        for k in range(self.max_active):
+            # quedan los disparos sin impacto que aún tienen un k-ésimo candidato
+            keep = count > k
+            pending, start, count = pending[keep], start[keep], count[keep]
+            if not len(pending):
+                break
+            rows = self.seg_rows[start + k]
+            x = xs[pending]
+            y = ys[pending]
+            inside = ((self.x0[rows] <= x) & (x <= self.x1[rows]) &
+                      (self.y0[rows] <= y) & (y <= self.y1[rows]))
+            result[pending[inside]] = rows[inside]
+            missed = ~inside
+            pending, start, count = pending[missed], start[missed], count[missed]
+        return result
+
+    def hit_test(self, frames: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> HitResult:
+        """
+        query con el nodo, el hitbox y la puntuación de cada disparo
+
+        Args:
+            frames: frame de cada disparo
+            xs: coordenada x de cada disparo
+            ys: coordenada y de cada disparo
+        """
+        row = self.query(frames, xs, ys)
+        hit = row != NO_HIT
+        node = np.where(hit, self.node[row], NO_HIT)
+        hitbox = np.where(hit, self.hitbox[row], NO_HIT)
+        score = np.where(hit, self.score[row], 0)
+        return HitResult(row, node, hitbox, score)
+
+
+def load_shots(path: str) -> np.ndarray:
+    """
+    Lee un log de disparos
+
+    Args:
+        path: .npy con un array (n, 3), o CSV con columnas frame,x,y (la
+            cabecera es opcional)
+
+    Returns:
+        Array (n, 3) de enteros frame, x, y
+    """
+    if path.endswith('.npy'):
+        shots = np.load(path, mmap_mode='r')
+    else:
+        with open(path, encoding='utf-8') as f:
+            first = f.readline()
+        skip = 0 if first[:1].isdigit() else 1
+        shots = np.loadtxt(path, delimiter=',', dtype=np.int64, skiprows=skip, ndmin=2)
+    if shots.ndim != 2 or shots.shape[1] != 3:
+        raise ValueError(f"{path}: se esperaban columnas frame, x, y")
+    return shots
+
+
+def replay(table: HitTable, shots: np.ndarray, batch: int = REPLAY_BATCH):
+    """
+    Reproduce un log de disparos por lotes
+
+    Args:
+        table: tabla de hitboxes
+        shots: array (n, 3) de frame, x, y
+        batch: disparos por lote
+
+    Returns:
+        Generador de (disparos del lote, HitResult)
+    """
+    for i in range(0, len(shots), batch):
+        chunk = np.asarray(shots[i:i + batch])
+        yield chunk, table.hit_test(chunk[:, 0], chunk[:, 1], chunk[:, 2])
+
+
+def main():
+    """Función principal"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('shots', help="log de disparos: CSV frame,x,y o .npy (n, 3)")
+    arg_parser.add_argument('-b', '--binary', default=DEFAULT_BINARY, help="binario o zip del juego")
+    arg_parser.add_argument('-o', '--output', default=None,
+                            help="CSV con el resultado de cada disparo (frame,x,y,node,hitbox,score); "
+                                 "en los fallos node es 0 y hitbox -1")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="no consultar ni guardar en la caché de parseos")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = arg_parser.parse_args()
+
+    cache = None if args.no_cache else SceneCache(args.cache_dir, version=str(PARSER_VERSION))
+    binaries = _open_binaries_or_exit(args.binary)
+    if len(binaries) != 1:
+        print(f"Error: {args.binary} contiene {len(binaries)} binarios, indica uno")
+        sys.exit(1)
+    name, data = binaries[0]
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            graph = load_scene_graph(memoryview(data), cache)
+    except PARSE_ERRORS as e:
+        print(f"Error al parsear {name}: {e}")
+        sys.exit(1)
+
+    table = HitTable.from_graph(graph)
+    try:
+        shots = load_shots(args.shots)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer los disparos: {e}")
+        sys.exit(1)
+
+    hits = 0
+    score = 0
+    by_node: Counter = Counter()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        if out:
+            out.write('frame,x,y,node,hitbox,score\n')
+        for chunk, result in replay(table, shots):
+            hit = result.row != NO_HIT
+            hits += int(hit.sum())
+            score += int(result.score.sum())
+            by_node.update(result.node[hit].tolist())
+            if out:
+                node = np.where(hit, result.node, 0)
+                np.savetxt(out, np.column_stack([chunk, node, result.hitbox, result.score]),
+                           fmt=['%d', '%d', '%d', '0x%08x', '%d', '%d'], delimiter=',')
+    finally:
+        if out:
+            out.close()
+
+    print(f"{name}: {len(table)} hitboxes en {len(table.bounds)} cortes de frames "
+          f"(máx. {table.max_active} activos a la vez)")
+    print(f"✓ {len(shots)} disparos: {hits} impactos, {len(shots) - hits} fallos, {score} puntos")
+    for node, count in by_node.most_common(10):
+        print(f"  - 0x{node:08x}: {count} impactos")
+    if args.output:
+        print(f"  - Salida: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
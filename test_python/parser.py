@@ -3,35 +3,100 @@ Parser para archivos binarios de Amiga 500 (Motorola 68000)
 Analiza estructuras tree_logic_node y hitbox según zorton_structs.h
 """
 
+import argparse
+import mmap
+import os
 import struct
 import json
 import sys
 import re
-from typing import List, Dict, Tuple, Optional
+import time
+import zipfile
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import List, Dict, NamedTuple, Tuple, Optional, Union
+
+from scene_cache import DEFAULT_CACHE_DIR, SceneCache
+from scene_writer import FORMATS, SceneCollector, SceneStreamWriter
 
 
 # Constantes
+PARSER_VERSION = 1  # subir al cambiar el parseo; invalida la caché de parseos
+DEFAULT_BINARY = "bin_data/picmatic_zb_v1.01_combined.bin.zip"
 MEMORY_OFFSET = 0x3FE00  # Offset de memoria para los punteros
 FRAME_PATTERN = rb'^\d{5}\x00$'  # Patrón para frames: 5 dígitos + null terminator
 FRAME_SIZE = 6  # 5 caracteres + \0
+FRAME_RUN_REGEX = re.compile(rb'(?:[0-9]{5}\x00){2,}')  # secuencias de 2 o más frames seguidos
+SCENE_ORDER_PTR = 0x0c4daa  # puntero de memoria a la lista de escenas
+SCENE_ORDER_COUNT = 44  # número de punteros en la lista de escenas
+PARSE_ERRORS = (struct.error, ValueError, KeyError)  # errores de un binario con otra estructura
+
+
+
+class FrameIndex:
+    """
+    Índice de frames por offset de fichero, construido una vez por parseo.
+
+    Sustituye la búsqueda lineal en la lista de frames de _format_frame_ptr.
+    Cada offset guarda también el id de la secuencia a la que pertenece, para
+    poder restringir la búsqueda a los frames de un chunk concreto.
+    """
+
+    def __init__(self, frames: List[List[Tuple[int, str]]]):
+        """
+        Args:
+            frames: secuencias de frames devueltas por find_frame_sequences
+        """
+        self.by_offset: Dict[int, Tuple[int, str]] = {}
+        for run_id, run in enumerate(frames):
+            for offset, frame_str in run:
+                self.by_offset.setdefault(offset, (run_id, frame_str))
+
+    def lookup(self, offset: int, run_id: Optional[int] = None) -> Optional[str]:
+        """
+        Devuelve el frame en un offset de fichero, o None si no hay ninguno
+
+        Args:
+            offset: offset de fichero del frame
+            run_id: si se indica, solo se aceptan frames de esa secuencia
+        """
+        entry = self.by_offset.get(offset)
+        if entry is None or (run_id is not None and entry[0] != run_id):
+            return None
+        return entry[1]
 
+    def frame_number(self, mem_ptr: int, run_id: Optional[int] = None) -> Optional[int]:
+        """
+        Número de frame al que apunta un puntero de memoria, o None
+
+        Args:
+            mem_ptr: puntero de memoria (0 si el nodo no lo usa)
+            run_id: si se indica, solo se aceptan frames de esa secuencia
+        """
+        if mem_ptr == 0:
+            return None
+        frame_str = self.lookup(mem_ptr - MEMORY_OFFSET, run_id)
+        return None if frame_str is None else int(frame_str)
 
 
 class HitboxStruct:
     """Representa la estructura hitbox del archivo zorton_structs.h"""
     SIZE = 24  # 6 * 4 bytes
+    # Big-endian (Motorola 68000): >
+    # 4 ints (y0, y1, x0, x1), 1 ptr (next hitbox), 1 int (score)
+    STRUCT = struct.Struct('>iiiiii')
 
     def __init__(self, data: bytes, file_offset: int):
         """
         Parsea una estructura hitbox desde bytes
 
         Args:
-            data: bytes conteniendo la estructura hitbox
+            data: buffer completo del archivo (bytes, memoryview o mmap); se
+                lee en su sitio, sin copiar
             file_offset: posición en el archivo
         """
-        # Big-endian (Motorola 68000): >
-        # 4 ints (y0, y1, x0, x1), 4 bytes undefined, 1 int (score)
-        unpacked = struct.unpack('>iiiiii', data[:self.SIZE])
+        unpacked = self.STRUCT.unpack_from(data, file_offset)
 
         self.y0 = unpacked[0]
         self.y1 = unpacked[1]
@@ -62,8 +127,8 @@ class HitboxStruct:
 class TreeLogicNode:
     """Representa la estructura tree_logic_node con DATO inicial"""
     SIZE = int(0x2A)  # 30 bytes
-    hitbox_struct = []
-    lista_nodes = []
+    # Big-endian: 7 pointers + 6 bytes + 2 pointers
+    STRUCT = struct.Struct('>7I6BII')
     num_sequences = 0
     is_death_and_destruction = False
     ptr_hitbox = 0x0
@@ -73,7 +138,8 @@ class TreeLogicNode:
         Parsea una estructura tree_logic_node desde bytes
 
         Args:
-            data: file in bytes
+            data: file in bytes (bytes, memoryview o mmap); se lee en su
+                sitio, sin copiar
             file_offset: posición en el archivo
         """
         self.hitbox_struct = []
@@ -89,10 +155,7 @@ class TreeLogicNode:
         if file_offset== 0xc9d2 or (file_offset+MEMORY_OFFSET)==0x4c7d2:
             self.is_death_and_destruction = True
             return
-        start_pos = data[file_offset:]
-        
-        # Big-endian: 10 pointers + 10 undefined bytes + 1 int + 2 pointers
-        unpacked = struct.unpack('>7I6BII', start_pos[:self.SIZE])
+        unpacked = self.STRUCT.unpack_from(data, file_offset)
 
         self.ptr_frame_start = unpacked[0]
         self.ptr_frame_end = unpacked[1]
@@ -116,14 +179,20 @@ class TreeLogicNode:
         if self.ptr_list_sequences!=0x0 and self.num_sequences!=0:
             seq_init = self.ptr_list_sequences-MEMORY_OFFSET
             
-            unpacked = struct.unpack(f'>{self.num_sequences}I', data[seq_init:seq_init+4*self.num_sequences])
+            unpacked = struct.unpack_from(f'>{self.num_sequences}I', data, seq_init)
             for p in unpacked:
                 self.lista_nodes.append(p)
            
             
 
-    def to_dict(self, frames_map: Dict[int, str]) -> Dict:
-        """Convierte la estructura a diccionario para JSON"""
+    def to_dict(self, frames_index: FrameIndex, run_id: Optional[int] = None) -> Dict:
+        """
+        Convierte la estructura a diccionario para JSON
+
+        Args:
+            frames_index: índice de frames del parseo
+            run_id: secuencia de frames del chunk; None para buscar en todas
+        """
         if self.is_death_and_destruction:
             result = {
             'type': "death_and_destruction☠️",
@@ -137,12 +206,12 @@ class TreeLogicNode:
                 'mem_offset': f'0x{self.mem_offset:08x}',
                 'file_offset': f'0x{self.file_offset:08x}',
                 'value': {
-                    'ptr_frame_start':  self._format_frame_ptr(self.ptr_frame_start, frames_map),
-                    'ptr_frame_end':  self._format_frame_ptr(self.ptr_frame_end, frames_map),
-                    'ptr_frame_hitbox_start':  self._format_frame_ptr(self.ptr_frame_hitbox_start, frames_map),
-                    'ptr_frame_hitbox_end':  self._format_frame_ptr(self.ptr_frame_hitbox_end, frames_map),
+                    'ptr_frame_start':  self._format_frame_ptr(self.ptr_frame_start, frames_index, run_id),
+                    'ptr_frame_end':  self._format_frame_ptr(self.ptr_frame_end, frames_index, run_id),
+                    'ptr_frame_hitbox_start':  self._format_frame_ptr(self.ptr_frame_hitbox_start, frames_index, run_id),
+                    'ptr_frame_hitbox_end':  self._format_frame_ptr(self.ptr_frame_hitbox_end, frames_index, run_id),
                     'ptr_hitbox':  f'0x{self.ptr_hitbox:08x}',
-                    'ptr_frame_unk':  self._format_frame_ptr(self.ptr_frame_unk, frames_map),
+                    'ptr_frame_unk':  self._format_frame_ptr(self.ptr_frame_unk, frames_index, run_id),
                     'ptr_node_respawn':f'0x{self.ptr_node_respawn:08x}',
                     'fields': [hex(b) for b in self.fields],
                     'type_a': self.type_a,
@@ -158,26 +227,296 @@ class TreeLogicNode:
             }
         return result
 
-    def _format_frame_ptr(self, mem_ptr: int, frames_map: Dict[int, str]) -> Tuple[str, str,str]:
+    def _format_frame_ptr(self, mem_ptr: int, frames_index: FrameIndex, run_id: Optional[int]) -> Tuple[str, str,str]:
         """Formatea un puntero a frame con su valor"""
         if mem_ptr==0x0:
             return (f'0x{mem_ptr:08x}', "","-----")
         ptr = mem_ptr - MEMORY_OFFSET
-        for x in frames_map:
-            if x[0]==ptr:
-                return (f'0x{mem_ptr:08x}', f'0x{ptr:08x}', x[1])
+        frame_str = frames_index.lookup(ptr, run_id)
+        if frame_str is not None:
+            return (f'0x{mem_ptr:08x}', f'0x{ptr:08x}', frame_str)
         return (f'0x{mem_ptr:08x}',f'0x{ptr:08x}', "-----")
 
 
-def find_frame_sequences(data: bytes) -> List[Tuple[int, str]]:
+def _column(name: str) -> property:
+    """Propiedad de solo lectura que lee la fila de la vista en una columna de su tabla"""
+    return property(lambda self: getattr(self._table, name)[self._row])
+
+
+class HitboxView:
+    """Vista ligera de una fila de HitboxTable con los atributos de HitboxStruct"""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: 'HitboxTable', row: int):
+        self._table = table
+        self._row = row
+
+    y0 = _column('y0')
+    y1 = _column('y1')
+    x0 = _column('x0')
+    x1 = _column('x1')
+    ptr_next_hitbox = _column('ptr_next_hitbox')
+    score = _column('score')
+    file_offset = _column('file_offset')
+
+    @property
+    def mem_offset(self) -> int:
+        return self.file_offset + MEMORY_OFFSET
+
+    to_dict = HitboxStruct.to_dict
+
+
+class HitboxTable:
+    """
+    Hitboxes de un parseo guardados por columnas (struct-of-arrays)
+
+    Una fila por hitbox; las filas de cada nodo son consecutivas y siguen el
+    orden de la lista enlazada.
+    """
+    COLUMNS = {
+        'y0': 'i', 'y1': 'i', 'x0': 'i', 'x1': 'i',
+        'ptr_next_hitbox': 'i', 'score': 'i', 'file_offset': 'I',
+    }
+
+    def __init__(self):
+        for name, typecode in self.COLUMNS.items():
+            setattr(self, name, array(typecode))
+
+    def append(self, hitbox: HitboxStruct) -> int:
+        """Añade un hitbox y devuelve su fila"""
+        for name in self.COLUMNS:
+            getattr(self, name).append(getattr(hitbox, name))
+        return len(self.file_offset) - 1
+
+    def __len__(self) -> int:
+        return len(self.file_offset)
+
+    def __getitem__(self, row: int) -> HitboxView:
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return HitboxView(self, row)
+
+    def nbytes(self) -> int:
+        """Bytes ocupados por los datos de las columnas"""
+        cols = [getattr(self, name) for name in self.COLUMNS]
+        return sum(len(col) * col.itemsize for col in cols)
+
+    def to_columns(self) -> Dict[str, array]:
+        """Columnas de la tabla por nombre (sin copiarlas)"""
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, array]) -> 'HitboxTable':
+        """Reconstruye la tabla a partir de to_columns"""
+        table = cls()
+        for name in cls.COLUMNS:
+            setattr(table, name, columns[name])
+        return table
+
+
+class NodeView:
+    """Vista ligera de una fila de NodeTable con los atributos de TreeLogicNode"""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: 'NodeTable', row: int):
+        self._table = table
+        self._row = row
+
+    file_offset = _column('file_offset')
+    ptr_frame_start = _column('ptr_frame_start')
+    ptr_frame_end = _column('ptr_frame_end')
+    ptr_frame_hitbox_start = _column('ptr_frame_hitbox_start')
+    ptr_frame_hitbox_end = _column('ptr_frame_hitbox_end')
+    ptr_hitbox = _column('ptr_hitbox')
+    ptr_frame_unk = _column('ptr_frame_unk')
+    ptr_node_respawn = _column('ptr_node_respawn')
+    type_a = _column('type_a')
+    type_b = _column('type_b')
+    num_sequences = _column('num_sequences')
+    type_d = _column('type_d')
+    ptr_fn_callback = _column('ptr_fn_callback')
+    ptr_list_sequences = _column('ptr_list_sequences')
+
+    @property
+    def mem_offset(self) -> int:
+        return self.file_offset + MEMORY_OFFSET
+
+    @property
+    def is_death_and_destruction(self) -> bool:
+        return bool(self._table.flags[self._row] & NodeTable.FLAG_DEATH)
+
+    @property
+    def fields(self) -> List[int]:
+        return [self._table.field_0[self._row], self._table.field_1[self._row]]
+
+    @property
+    def lista_nodes(self) -> List[int]:
+        t = self._table
+        return t.seq_ptrs[t.seq_start[self._row]:t.seq_start[self._row + 1]].tolist()
+
+    @property
+    def hitbox_struct(self) -> List[HitboxView]:
+        t = self._table
+        return [t.hitboxes[i] for i in range(t.hitbox_start[self._row], t.hitbox_start[self._row + 1])]
+
+    to_dict = TreeLogicNode.to_dict
+    _format_frame_ptr = TreeLogicNode._format_frame_ptr
+
+
+class NodeTable:
+    """
+    Grafo de nodos de un parseo guardado por columnas (struct-of-arrays)
+
+    Una fila por TreeLogicNode, ordenadas por offset de fichero. Las listas de
+    secuencias y de hitboxes se guardan en formato CSR: seq_start[fila] y
+    seq_start[fila + 1] delimitan los punteros de la fila en seq_ptrs, y lo
+    mismo hitbox_start para las filas de HitboxTable.
+
+    Se usa como un diccionario de solo lectura offset de fichero -> NodeView,
+    igual que el que devuelve parse_node_graph.
+    """
+    FLAG_DEATH = 0x1
+    CSR_COLUMNS = ('seq_start', 'seq_ptrs', 'hitbox_start')
+    COLUMNS = {
+        'file_offset': 'I',
+        'ptr_frame_start': 'I', 'ptr_frame_end': 'I',
+        'ptr_frame_hitbox_start': 'I', 'ptr_frame_hitbox_end': 'I',
+        'ptr_hitbox': 'I', 'ptr_frame_unk': 'I', 'ptr_node_respawn': 'I',
+        'field_0': 'B', 'field_1': 'B',
+        'type_a': 'B', 'type_b': 'B', 'num_sequences': 'B', 'type_d': 'B',
+        'ptr_fn_callback': 'I', 'ptr_list_sequences': 'I',
+        'flags': 'B',
+    }
+
+    def __init__(self):
+        for name, typecode in self.COLUMNS.items():
+            setattr(self, name, array(typecode))
+        self.seq_start = array('I', [0])
+        self.seq_ptrs = array('I')
+        self.hitbox_start = array('I', [0])
+        self.hitboxes = HitboxTable()
+
+    @classmethod
+    def from_nodes(cls, nodes: Dict[int, TreeLogicNode]) -> 'NodeTable':
+        """
+        Construye la tabla a partir de los nodos de parse_node_graph
+
+        Args:
+            nodes: diccionario offset de fichero -> TreeLogicNode
+        """
+        table = cls()
+        for offset in sorted(nodes):
+            table._append(nodes[offset])
+        return table
+
+    def _append(self, node: TreeLogicNode) -> None:
+        """Añade un nodo como nueva fila (los offsets deben llegar ordenados)"""
+        death = node.is_death_and_destruction
+        for name in self.COLUMNS:
+            if name == 'flags':
+                value = self.FLAG_DEATH if death else 0
+            elif name in ('field_0', 'field_1'):
+                value = 0 if death else node.fields[name == 'field_1']
+            else:
+                value = getattr(node, name, 0)
+            getattr(self, name).append(value)
+        self.seq_ptrs.extend(node.lista_nodes)
+        self.seq_start.append(len(self.seq_ptrs))
+        for hitbox in node.hitbox_struct:
+            self.hitboxes.append(hitbox)
+        self.hitbox_start.append(len(self.hitboxes))
+
+    def row_of(self, file_offset: int) -> int:
+        """Fila del nodo en un offset de fichero; KeyError si no existe"""
+        row = bisect_left(self.file_offset, file_offset)
+        if row == len(self.file_offset) or self.file_offset[row] != file_offset:
+            raise KeyError(file_offset)
+        return row
+
+    def row(self, row: int) -> NodeView:
+        """Vista de una fila de la tabla"""
+        return NodeView(self, row)
+
+    def __getitem__(self, file_offset: int) -> NodeView:
+        return NodeView(self, self.row_of(file_offset))
+
+    def __contains__(self, file_offset: int) -> bool:
+        try:
+            self.row_of(file_offset)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.file_offset)
+
+    def __iter__(self):
+        return iter(self.file_offset)
+
+    def values(self):
+        return (NodeView(self, row) for row in range(len(self)))
+
+    def items(self):
+        return ((self.file_offset[row], NodeView(self, row)) for row in range(len(self)))
+
+    def nbytes(self) -> int:
+        """Bytes ocupados por los datos de las columnas (nodos y hitboxes)"""
+        cols = [getattr(self, name) for name in (*self.COLUMNS, *self.CSR_COLUMNS)]
+        return sum(len(col) * col.itemsize for col in cols) + self.hitboxes.nbytes()
+
+    def to_columns(self) -> Dict[str, array]:
+        """Columnas de nodos y hitboxes por nombre (sin copiarlas)"""
+        columns = {f'node.{name}': getattr(self, name) for name in (*self.COLUMNS, *self.CSR_COLUMNS)}
+        columns.update((f'hitbox.{name}', col) for name, col in self.hitboxes.to_columns().items())
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, array]) -> 'NodeTable':
+        """Reconstruye la tabla a partir de to_columns"""
+        table = cls()
+        for name in (*cls.COLUMNS, *cls.CSR_COLUMNS):
+            setattr(table, name, columns[f'node.{name}'])
+        table.hitboxes = HitboxTable.from_columns(
+            {name[len('hitbox.'):]: col for name, col in columns.items() if name.startswith('hitbox.')})
+        return table
+
+
+def find_frame_sequences(data: bytes) -> List[List[Tuple[int, str]]]:
     """
     Encuentra todas las secuencias de frames (5 dígitos ASCII + null terminator)
 
+    Recorre el binario una sola vez con FRAME_RUN_REGEX en lugar de comprobar
+    byte a byte. Solo se devuelven las secuencias de al menos 2 frames.
+
     Args:
         data: datos binarios completos
 
     Returns:
-        Lista de tuplas (offset, frame_string)
+        Lista de secuencias, cada una una lista de tuplas (offset, frame_string)
+    """
+    frames = []
+    # El bucle original nunca comprueba un frame en len(data) - FRAME_SIZE ni
+    # cierra una secuencia que llegue al final del buffer: se mantiene igual.
+    limit = len(data) - FRAME_SIZE
+    for match in FRAME_RUN_REGEX.finditer(data, 0, max(limit + FRAME_SIZE - 1, 0)):
+        start, end = match.span()
+        if end >= limit:
+            break
+        run = match.group()
+        frames.append([
+            (start + k, run[k:k + FRAME_SIZE - 1].decode('ascii'))
+            for k in range(0, end - start, FRAME_SIZE)
+        ])
+
+    return frames
+
+
+def _find_frame_sequences_bytewise(data: bytes) -> List[List[Tuple[int, str]]]:
+    """
+    Implementación original byte a byte de find_frame_sequences.
+
+    Se conserva como referencia para los benchmarks y para comprobar que el
+    escáner con regex devuelve exactamente lo mismo.
     """
     frames = []
     sframes=[] 
@@ -213,13 +552,100 @@ def find_frame_sequences(data: bytes) -> List[Tuple[int, str]]:
 
 
 
-def detect_chunks(data: bytes, frames: List[Tuple[int, str]]) -> List[Dict]:
+def read_scene_order(data: bytes) -> List[int]:
     """
-    Detecta chunks de datos basándose en secuencias de frames
+    Lee la tabla de escenas (scene_order)
+
+    Args:
+        data: datos binarios completos
+
+    Returns:
+        Lista de punteros de memoria a los nodos iniciales de cada escena
+    """
+    # 0x0c4daa -> inicio de la lista a escenas.   44 ptrs
+    init_list_scenes = int(SCENE_ORDER_PTR - MEMORY_OFFSET )&0x0000ffff
+    return list(struct.unpack_from(f'>{SCENE_ORDER_COUNT}I', data, init_list_scenes))
+
+
+def node_successors(node: TreeLogicNode) -> List[int]:
+    """
+    Offsets de fichero de los nodos a los que apunta un nodo
+
+    Primero las secuencias (lista_nodes) y después el nodo de respawn, en el
+    mismo orden en que los recorría detect_chunks.
+    """
+    # los punteros a 0 en lista_nodes no apuntan a ningún nodo
+    successors = [p - MEMORY_OFFSET for p in node.lista_nodes if p != 0]
+    if node.ptr_node_respawn != 0x0:
+        successors.append(node.ptr_node_respawn - MEMORY_OFFSET)
+    return successors
+
+
+def _parse_hitboxes(data: bytes, node: TreeLogicNode) -> None:
+    """Parsea la lista enlazada de hitboxes de un nodo"""
+    if node.ptr_hitbox == 0:
+        return
+    hitbox_file_offset = node.ptr_hitbox - MEMORY_OFFSET
+    if not 0 <= hitbox_file_offset < len(data) - HitboxStruct.SIZE:
+        return
+    try:
+        new_hitbox= HitboxStruct(data, hitbox_file_offset)
+        node.hitbox_struct.append(new_hitbox)
+        #buscar hitbox linked list
+        while new_hitbox.ptr_next_hitbox !=0:
+            next_hitbox_file_offset = new_hitbox.ptr_next_hitbox - MEMORY_OFFSET
+            if 0 <= next_hitbox_file_offset < len(data) - HitboxStruct.SIZE:
+                new_hitbox= HitboxStruct(data, next_hitbox_file_offset)
+                node.hitbox_struct.append(new_hitbox)
+            else:
+                raise ValueError("Error al parsear hitbox linked list")
+    except:
+        raise ValueError("Error al parsear hitbox")
+
+
+def parse_node_graph(data: bytes, roots: List[int]) -> Dict[int, TreeLogicNode]:
+    """
+    Recorre una sola vez el grafo de nodos desde las raíces indicadas
+
+    Cada nodo se parsea (con sus hitboxes) una única vez aunque se llegue a él
+    por varias secuencias o por punteros de respawn, así que los ciclos no
+    hacen que el recorrido se repita.
 
     Args:
         data: datos binarios completos
+        roots: offsets de fichero de los nodos desde los que empezar
+
+    Returns:
+        Diccionario offset de fichero -> TreeLogicNode
+    """
+    nodes: Dict[int, TreeLogicNode] = {}
+    pending = deque(roots)
+
+    while pending:
+        offset = pending.popleft()
+        if offset in nodes:
+            continue
+        node = TreeLogicNode(data, offset)
+        _parse_hitboxes(data, node)
+        nodes[offset] = node
+        pending.extend(p for p in node_successors(node) if p not in nodes)
+
+    return nodes
+
+
+def detect_chunks(data: bytes, frames: List[Tuple[int, str]],
+                  nodes: Optional[Union[Dict[int, TreeLogicNode], NodeTable]] = None) -> List[Dict]:
+    """
+    Detecta chunks de datos basándose en secuencias de frames
+
+    El chunk lo forman los nodos alcanzables desde el nodo que precede a la
+    secuencia de frames, en orden de recorrido en anchura y sin repetidos.
+
+    Args:
+        data: datos binarios completos (no se usa si se indica nodes)
         frames: lista de frames encontrados
+        nodes: nodos ya parseados por parse_node_graph (o su NodeTable); si
+            no se indica se parsean solo los de este chunk
 
     Returns:
         Lista de chunks con su información
@@ -233,98 +659,339 @@ def detect_chunks(data: bytes, frames: List[Tuple[int, str]]) -> List[Dict]:
     if not frames:
         return []
 
+    root = frames[0][0] - TreeLogicNode.SIZE
+    if nodes is None:
+        nodes = parse_node_graph(data, [root])
+
     chunks = []
-    current_chunk_frames = []
-    last_offset = -1
-    offset = frames[0][0]
-    
-    offset_nodes = [offset-TreeLogicNode.SIZE]
-
-    while len(offset_nodes)>0:
-        chunk_start = offset_nodes.pop() 
-        new_struct = TreeLogicNode(data,chunk_start)
-        for p in new_struct.lista_nodes:
-            if p==0:
-                print("WAT")
-                continue
-            offset_nodes.insert(0,p- MEMORY_OFFSET)
-            
-        if new_struct.ptr_node_respawn!=0x0:
-            offset_nodes.insert(0,new_struct.ptr_node_respawn- MEMORY_OFFSET)
-        
-        
-        if new_struct.ptr_hitbox !=0:
-            hitbox_file_offset = new_struct.ptr_hitbox - MEMORY_OFFSET
-            if 0 <= hitbox_file_offset < len(data) - HitboxStruct.SIZE:
-                try:
-                    new_hitbox= HitboxStruct(
-                        data[hitbox_file_offset:],
-                        hitbox_file_offset
-                    )
-                    new_struct.hitbox_struct.append(new_hitbox)
-                    #buscar hitbox linked list
-                    while new_hitbox.ptr_next_hitbox !=0:
-                        next_hitbox_file_offset = new_hitbox.ptr_next_hitbox - MEMORY_OFFSET
-                        if 0 <= next_hitbox_file_offset < len(data) - HitboxStruct.SIZE:
-                            new_hitbox= HitboxStruct(
-                                data[next_hitbox_file_offset:],
-                                next_hitbox_file_offset
-                            )
-                            new_struct.hitbox_struct.append(new_hitbox)
-                        else:
-                            raise ValueError("Error al parsear hitbox linked list")
-                except:
-                    raise ValueError("Error al parsear hitbox")
-        
+    visited = {root}
+    offset_nodes = deque([root])
+
+    while offset_nodes:
+        chunk_start = offset_nodes.popleft()
         chunks.append({
                     'start': chunk_start,
-                    "data_struct": new_struct                   
-                    
+                    "data_struct": nodes[chunk_start]
                 })
-      
-           
+        for p in node_successors(nodes[chunk_start]):
+            if p not in visited:
+                visited.add(p)
+                offset_nodes.append(p)
 
     return chunks
 
 
 
-def parse_binary(binary_path: str) -> Dict :
+def _map_file(path: str) -> memoryview:
+    """Mapea en memoria (solo lectura) un archivo binario"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b'')
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _map_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> memoryview:
+    """Descomprime un miembro de un zip de una pasada a un mmap anónimo"""
+    if info.file_size == 0:
+        return memoryview(b'')
+    buf = mmap.mmap(-1, info.file_size)
+    view = memoryview(buf)
+    pos = 0
+    with archive.open(info) as src:
+        while pos < info.file_size:
+            n = src.readinto(view[pos:])
+            if not n:
+                raise ValueError(f"{info.filename}: el miembro está truncado")
+            pos += n
+    return view
+
+
+def list_binaries(path: str) -> List[Tuple[str, Optional[str]]]:
     """
-    Parsea el archivo binario completo y extrae todos los chunks
+    Lista los binarios de una ruta sin abrirlos
+
+    Returns:
+        Lista de tuplas (nombre, miembro); miembro es None si la ruta no es
+        un zip
+    """
+    if not zipfile.is_zipfile(path):
+        return [(path, None)]
+    with zipfile.ZipFile(path) as archive:
+        return [(f"{path}:{info.filename}", info.filename)
+                for info in archive.infolist() if not info.is_dir()]
+
+
+def open_binary(path: str, member: Optional[str] = None) -> memoryview:
+    """
+    Abre un único binario como open_binaries
+
+    Args:
+        path: ruta a un binario o a un zip
+        member: miembro del zip (de list_binaries); None si no es un zip
+    """
+    if member is None:
+        return _map_file(path)
+    with zipfile.ZipFile(path) as archive:
+        return _map_zip_member(archive, archive.getinfo(member))
+
+
+def open_binaries(path: str) -> List[Tuple[str, memoryview]]:
+    """
+    Abre un binario sin leerlo entero en memoria
+
+    Los archivos .bin se mapean con mmap. De los .zip se descomprime cada
+    miembro una sola vez a un mmap anónimo, así que el escáner de frames,
+    TreeLogicNode y HitboxStruct leen todos del mismo buffer sin copias.
 
     Args:
-        binary_path: ruta al archivo binario
+        path: ruta a un binario o a un zip con uno o varios binarios
 
     Returns:
-        Lista de chunks parseados
+        Lista de tuplas (nombre, buffer); el nombre de un miembro de zip es
+        'archivo.zip:miembro'
+    """
+    if not zipfile.is_zipfile(path):
+        return [(path, _map_file(path))]
+
+    binaries = []
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            binaries.append((f"{path}:{info.filename}", _map_zip_member(archive, info)))
+    return binaries
+
+
+class SceneGraph(NamedTuple):
+    """Resultado del parseo de un binario antes de serializarlo"""
+    frames: List[List[Tuple[int, str]]]
+    scenes: List[int]
+    nodes: NodeTable
+
+
+def build_scene_graph(data: memoryview) -> SceneGraph:
+    """
+    Escanea los frames, lee scene_order y parsea el grafo de nodos completo
+
+    Args:
+        data: buffer con el binario completo
+    """
+    # Encontrar todos los frames
+    print("Buscando frames...")
+    frames = find_frame_sequences(data)
+    print(f"Encontrados {len(frames)} frames")
+
+    # read full list of scenes
+    scenes = read_scene_order(data)
+
+    # Recorrer el grafo completo una sola vez
+    print("Recorriendo grafo de nodos...")
+    roots = [p - MEMORY_OFFSET for p in scenes]
+    roots += [frame[0][0] - TreeLogicNode.SIZE for frame in frames]
+    nodes = NodeTable.from_nodes(parse_node_graph(data, roots))
+    print(f"Parseados {len(nodes)} nodos ({nodes.nbytes()} bytes en tablas)")
+
+    return SceneGraph(frames, scenes, nodes)
+
+
+def graph_to_columns(graph: SceneGraph, with_text: bool = False) -> Dict[str, array]:
+    """
+    Columnas array de un SceneGraph (snapshot de caché, resultados de batch)
+
+    Args:
+        graph: grafo parseado
+        with_text: incluir el texto de los frames; si no, graph_from_columns
+            necesita el binario para releerlo
+    """
+    run_start = array('I', [0])
+    frame_offsets = array('I')
+    frame_text = array('B')
+    for run in graph.frames:
+        frame_offsets.extend(offset for offset, _ in run)
+        run_start.append(len(frame_offsets))
+        if with_text:
+            for _, frame_str in run:
+                frame_text.frombytes(frame_str.encode('ascii'))
+    columns = {
+        'frames.run_start': run_start,
+        'frames.offset': frame_offsets,
+        'scenes': array('I', graph.scenes),
+    }
+    if with_text:
+        columns['frames.text'] = frame_text
+    columns.update(graph.nodes.to_columns())
+    return columns
+
+
+def graph_from_columns(columns: Dict[str, array], data: Optional[memoryview] = None) -> SceneGraph:
+    """
+    Reconstruye un SceneGraph de graph_to_columns
+
+    Args:
+        columns: columnas del grafo
+        data: binario del que releer los frames si las columnas no traen su texto
+    """
+    run_start = columns['frames.run_start']
+    frame_offsets = columns['frames.offset']
+    if 'frames.text' in columns:
+        text = columns['frames.text'].tobytes()
+        width = FRAME_SIZE - 1
+        frame_strs = [text[i * width:(i + 1) * width].decode('ascii') for i in range(len(frame_offsets))]
+    else:
+        frame_strs = [bytes(data[offset:offset + FRAME_SIZE - 1]).decode('ascii') for offset in frame_offsets]
+    frames = [
+        [(frame_offsets[j], frame_strs[j]) for j in range(run_start[i], run_start[i + 1])]
+        for i in range(len(run_start) - 1)
+    ]
+    return SceneGraph(frames, columns['scenes'].tolist(), NodeTable.from_columns(columns))
+
+
+def load_scene_graph(data: memoryview, cache: Optional[SceneCache] = None) -> SceneGraph:
+    """
+    build_scene_graph consultando antes la caché de parseos
+
+    Args:
+        data: buffer con el binario completo
+        cache: caché de snapshots; None para parsear siempre
     """
+    if cache is None:
+        return build_scene_graph(data)
+
+    t0 = time.perf_counter()
+    key = cache.key(data)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        graph = graph_from_columns(snapshot[0], data)
+        print(f"Caché: acierto ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+        return graph
+
+    lookup_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    graph = build_scene_graph(data)
+    parse_time = time.perf_counter() - t0
+    try:
+        cache.put(key, graph_to_columns(graph), {'parser_version': PARSER_VERSION})
+    except OSError as e:
+        # la caché es opcional: sin poder escribirla se sigue con el parseo
+        print(f"Caché: fallo ({lookup_time * 1000:.1f} ms), parseado en {parse_time * 1000:.1f} ms; "
+              f"aviso: no se pudo guardar ({e})")
+        return graph
+    print(f"Caché: fallo ({lookup_time * 1000:.1f} ms), parseado en {parse_time * 1000:.1f} ms y guardado")
+    return graph
+
+
+def _open_binaries_or_exit(path: str) -> List[Tuple[str, memoryview]]:
+    """open_binaries que termina el programa con un mensaje si falla"""
     try:
-        with open(binary_path, 'rb') as f:
-            data = f.read()
+        return open_binaries(path)
     except FileNotFoundError:
-        print(f"Error: No se encontró el archivo {binary_path}")
+        print(f"Error: No se encontró el archivo {path}")
         sys.exit(1)
     except Exception as e:
         print(f"Error al leer el archivo: {e}")
         sys.exit(1)
 
+
+def parse_binary(binary_path: str, cache: Optional[SceneCache] = None) -> Dict :
+    """
+    Parsea el archivo binario completo y extrae todos los chunks
+
+    Args:
+        binary_path: ruta al archivo binario, o a un zip que contenga uno
+        cache: caché de parseos a consultar; None para no usarla
+
+    Returns:
+        Lista de chunks parseados
+    """
+    binaries = _open_binaries_or_exit(binary_path)
+
+    if len(binaries) != 1:
+        print(f"Error: {binary_path} contiene {len(binaries)} binarios, usa parse_binaries")
+        sys.exit(1)
+
+    return parse_data(*binaries[0], cache=cache)
+
+
+def parse_binaries(paths: List[str], cache: Optional[SceneCache] = None) -> Dict[str, Dict]:
+    """
+    Parsea varios binarios o zips (con uno o varios miembros) de una vez
+
+    Args:
+        paths: rutas a binarios o zips
+        cache: caché de parseos a consultar; None para no usarla
+
+    Returns:
+        Diccionario nombre del binario -> resultado de parse_data; los
+        binarios que no se pueden parsear se omiten
+    """
+    results = {}
+    for path in paths:
+        for name, data in _open_binaries_or_exit(path):
+            try:
+                results[name] = parse_data(name, data, cache=cache)
+            except PARSE_ERRORS as e:
+                # un binario con otra estructura no impide parsear el resto
+                print(f"Error al parsear {name}: {e}")
+    return results
+
+
+def parse_data(binary_path: str, data: memoryview, sink=None,
+               cache: Optional[SceneCache] = None, analysis: bool = False) -> Dict:
+    """
+    Parsea un binario ya cargado en memoria y extrae todos los chunks
+
+    Cada chunk se entrega al sink en cuanto se detecta, así que con un
+    SceneStreamWriter no hace falta tener el resultado entero en memoria.
+
+    Args:
+        binary_path: nombre del binario (solo para los mensajes)
+        data: buffer con el binario completo (bytes, memoryview o mmap)
+        sink: destino del resultado (ver scene_writer); por defecto un
+            SceneCollector que construye el diccionario completo
+        cache: caché de parseos; con un acierto no se escanea ni se
+            recorre el grafo
+        analysis: añadir el análisis del grafo (ver graph_analysis)
+
+    Returns:
+        Lo que devuelva sink.finish(): con el SceneCollector, el diccionario
+        con scene_order, chunks y spare_chunks
+    """
     print(f"Leyendo archivo binario: {binary_path} ({len(data)} bytes)")
+    # todas las estructuras se decodifican sobre este mismo buffer, sin copias
+    data = memoryview(data)
 
-    # Encontrar todos los frames
-    print("Buscando frames...")
-    frames = find_frame_sequences(data)
-    print(f"Encontrados {len(frames)} frames")
+    return write_scene_graph(load_scene_graph(data, cache), sink, analysis)
+
+
+def write_scene_graph(graph: SceneGraph, sink=None, analysis: bool = False) -> Dict:
+    """
+    Detecta los chunks de un grafo parseado y los entrega al sink
+
+    Args:
+        graph: grafo de build_scene_graph/load_scene_graph
+        sink: destino del resultado (ver parse_data)
+        analysis: entregar también al sink el análisis del grafo
+            (alcanzabilidad, ciclos, dominadores y muertes) con un resumen
+            por chunk
+
+    Returns:
+        Lo que devuelva sink.finish()
+    """
+    if sink is None:
+        sink = SceneCollector()
+
+    frames, scenes, nodes = graph
+    frames_index = FrameIndex(frames)
+    sink.start([f"0x{p:08x}" for p in scenes])
 
     # Detectar chunks
     print("Detectando chunks de datos...")
-    full_chunks = []
     chunk_id = 0
-    result = []
-    list_chunks = []
-    list_frames = []
+    list_chunks = set()
+    chunk_rows = []
     for frame in frames:
         print(f"Frame en offset 0x{frame[0][0]:08x}: {frame[0][1]}")
-        chunks = detect_chunks(data, frame)
+        chunks = detect_chunks(None, frame, nodes)
         print(f"Detectados {len(chunks)} chunks")
 
     
@@ -334,61 +1001,104 @@ def parse_binary(binary_path: str) -> Dict :
             'file_offset': f"0x{chunks[-1]['start']:08x}",
             'mem_offset': f"0x{(chunks[-1]['start'] + MEMORY_OFFSET):08x}",
             'frames': [{"file_offset":f"0x{f[0]:08x}","mem_offset":f"0x{(f[0]+ MEMORY_OFFSET):08x}", "frame":f"{f[1]}"} for f in frame],
-            'nodes': [p['data_struct'].to_dict(frame) for p in chunks]
+            'nodes': [p['data_struct'].to_dict(frames_index, chunk_id) for p in chunks]
         }
         chunk_id += 1
         for p in chunks:
-            list_chunks.append(p['data_struct'].mem_offset)
-        for f in frame:
-            list_frames.append(f)
-        result.append(chunk_dict)
+            list_chunks.add(p['data_struct'].mem_offset)
+        if analysis:
+            chunk_rows.append((chunk_dict['id'], [nodes.row_of(p['start']) for p in chunks]))
+        sink.add_chunk(chunk_dict)
         
-    # read full list of scenes
-    # 0x0c4daa -> inicio de la lista a escenas.   44 ptrs
-    init_list_scenes = int(0x0c4daa - MEMORY_OFFSET )&0x0000ffff
-    buf = data[init_list_scenes:init_list_scenes+(44*4)]
-    unpacked = struct.unpack('>44I', buf)
-    scenes = [ p for p in unpacked]
-    spare = []
-    to_add = [ p for p in unpacked]
-    # we need to fine tune this parse. We should read the list of sequences related and the hitboxes. 
-    # I did not implement it to speed up the json creation, and also 
-    # the num_sequences seems to be always 0.
-    while len(to_add)>0:
-        p = to_add.pop()
+    # escenas que no forman parte de ningún chunk (ya parseadas en el grafo)
+    for p in reversed(scenes):
         if p not in list_chunks:
-            init_pos = p - MEMORY_OFFSET
-            new_struct = TreeLogicNode(data,init_pos)
-            spare.append(new_struct.to_dict(list_frames))
-            
+            list_chunks.add(p)
+            sink.add_spare(nodes[p - MEMORY_OFFSET].to_dict(frames_index))
+
+    if analysis:
+        # import local: graph_analysis importa este módulo
+        from graph_analysis import GraphAnalysis
+        sink.add_analysis(GraphAnalysis(graph).to_dict(chunk_rows))
 
-    return {"scene_order":[f"0x{p:08x}" for p in scenes], "chunks":result, "spare_chunks":spare }
+    return sink.finish()
+
+
+def _output_path(name: str, output: str, used: set) -> str:
+    """Ruta del JSON de salida de un binario cuando se parsean varios"""
+    stem = os.path.basename(name.rsplit(':', 1)[-1])
+    for ext in ('.zip', '.bin'):
+        if stem.endswith(ext):
+            stem = stem[:-len(ext)]
+    root, ext = os.path.splitext(output)
+    path = f"{root}_{stem}{ext}"
+    n = 2
+    while path in used:
+        path = f"{root}_{stem}_{n}{ext}"
+        n += 1
+    used.add(path)
+    return path
 
 
 def main():
     """Función principal"""
-    
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('binaries', nargs='*', default=[DEFAULT_BINARY],
+                            help="binarios (.bin) o zips con binarios a parsear")
+    arg_parser.add_argument('-o', '--output', default='output.json',
+                            help="JSON de salida; con varios binarios se añade el nombre de cada uno")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="no consultar ni guardar en la caché de parseos")
+    arg_parser.add_argument('--clear-cache', action='store_true',
+                            help="vaciar la caché de parseos antes de empezar")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                            help=f"directorio de la caché (por defecto {DEFAULT_CACHE_DIR})")
+    arg_parser.add_argument('-f', '--format', choices=FORMATS, default='pretty',
+                            help="pretty: JSON indentado (por defecto); compact: sin indentar y "
+                                 "con enteros en vez de '0x...'; ndjson: un nodo por línea")
+    arg_parser.add_argument('--analysis', action='store_true',
+                            help="añadir al JSON el análisis del grafo (ver graph_analysis.py)")
+    args = arg_parser.parse_args()
 
-    # Parsear el binario
-    chunks = parse_binary("bin_data/picmatic_zb_v1.01_combined.bin")
+    cache = None if args.no_cache else SceneCache(args.cache_dir, version=str(PARSER_VERSION))
+    if cache is not None and args.clear_cache:
+        cache.clear()
 
-    # Escribir resultado a JSON
-    output_path = 'output.json'
-    print(f"\nEscribiendo resultado a {output_path}...")
+    used_paths = set()
+    parsed = 0
+    for path in args.binaries:
+        binaries = _open_binaries_or_exit(path)
+        for name, data in binaries:
+            if len(args.binaries) == 1 and len(binaries) == 1:
+                output_path = args.output
+            else:
+                output_path = _output_path(name, args.output, used_paths)
 
-    try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(chunks, f, indent=2, ensure_ascii=False)
-        print(f"✓ Parseo completado exitosamente")
-        print(f"  - Chunks procesados: {len(chunks)}")
-        print(f"  - Salida: {output_path}")
-    except Exception as e:
-        print(f"Error al escribir el archivo de salida: {e}")
+            # Parsear el binario escribiendo el resultado a JSON según se detecta
+            print(f"\nEscribiendo resultado a {output_path}...")
+            try:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    summary = parse_data(name, data, SceneStreamWriter(f, args.format), cache,
+                                         args.analysis)
+            except PARSE_ERRORS as e:
+                print(f"Error al parsear {name}: {e}")
+                os.remove(output_path)
+                continue
+            except Exception as e:
+                print(f"Error al escribir el archivo de salida: {e}")
+                sys.exit(1)
+            parsed += 1
+            print(f"✓ Parseo completado exitosamente")
+            print(f"  - Chunks procesados: {summary['chunks']} ({summary['chunk_nodes']} nodos, "
+                  f"{summary['spare_chunks']} spare chunks)")
+            print(f"  - Salida: {output_path}")
+
+    if cache is not None:
+        print(f"\nCaché: {cache.hits} aciertos, {cache.misses} fallos")
+
+    if not parsed:
         sys.exit(1)
 
 
 if __name__ == '__main__':
     main()
-
-
-# 0x0c4daa -> inicio de la lista a escenas.   44 ptrs
\ No newline at end of file
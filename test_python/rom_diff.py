@@ -0,0 +1,312 @@
+"""
+Diff estructural entre dos revisiones parseadas (dumps, versiones de Picmatic)
+
+Entre revisiones se desplazan todos los offsets, así que los nodos no se
+emparejan por posición sino por firma: un hash del contenido del nodo que no
+depende de dónde está (frames a los que apunta, hitboxes y tipos), y otro que
+añade las firmas de sus secuencias y de su respawn. Los nodos se agrupan por
+firma en diccionarios, por lo que el emparejamiento es casi lineal en el
+número de nodos:
+
+    1. misma firma estructural (contenido + secuencias)
+    2. misma firma de contenido (cambian las secuencias)
+    3. mismo rango de frames (cambia el contenido)
+
+Lo que queda sin pareja son nodos añadidos o eliminados. Los punteros
+(callback, lista de secuencias, hitboxes) no se comparan: cambian con
+cualquier recompilación.
+
+Uso:
+    python test_python/rom_diff.py antiguo.bin nuevo.bin [-o diff.json]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import sys
+from collections import defaultdict, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from parser import (
+    MEMORY_OFFSET,
+    PARSE_ERRORS,
+    PARSER_VERSION,
+    FrameIndex,
+    NodeView,
+    SceneGraph,
+    _open_binaries_or_exit,
+    load_scene_graph,
+    node_successors,
+)
+from scene_cache import DEFAULT_CACHE_DIR, SceneCache
+
+
+DIFF_VERSION = 1
+FRAME_FIELDS = ('ptr_frame_start', 'ptr_frame_end', 'ptr_frame_hitbox_start',
+                'ptr_frame_hitbox_end', 'ptr_frame_unk')
+VALUE_FIELDS = ('fields', 'type_a', 'type_b', 'num_sequences', 'type_d')
+MATCH_PASSES = ('structure', 'content', 'frames')
+
+
+def _digest(value) -> str:
+    """Hash estable (entre procesos y ejecuciones) de una tupla de valores"""
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class NodeSignature(NamedTuple):
+    """Datos de un nodo independientes de su offset"""
+    offset: int
+    values: Dict[str, object]
+    hitboxes: List[Tuple[int, int, int, int, int]]  # (y0, y1, x0, x1, score)
+    successors: List[int]
+    content: str
+    structure: str
+
+    @property
+    def frame_range(self) -> Optional[Tuple]:
+        """Frames inicial y final, o None si el nodo no apunta a ningún frame"""
+        frame_range = (self.values.get('ptr_frame_start'), self.values.get('ptr_frame_end'))
+        return None if frame_range == (None, None) else frame_range
+
+
+def _node_values(node: NodeView, frames_index: FrameIndex) -> Dict[str, object]:
+    """Campos comparables de un nodo; los punteros a frames se cambian por el frame"""
+    if node.is_death_and_destruction:
+        return {'death': True}
+    values = {}
+    for name in FRAME_FIELDS:
+        ptr = getattr(node, name)
+        values[name] = frames_index.lookup(ptr - MEMORY_OFFSET) if ptr else None
+    for name in VALUE_FIELDS:
+        values[name] = getattr(node, name)
+    return values
+
+
+def node_signatures(graph: SceneGraph) -> Dict[int, NodeSignature]:
+    """
+    Calcula las firmas de todos los nodos de un grafo
+
+    Args:
+        graph: grafo de load_scene_graph
+
+    Returns:
+        Diccionario offset de fichero -> NodeSignature
+    """
+    frames_index = FrameIndex(graph.frames)
+    nodes = graph.nodes
+    local = {}
+    for offset, node in nodes.items():
+        values = _node_values(node, frames_index)
+        hitboxes = [(h.y0, h.y1, h.x0, h.x1, h.score) for h in node.hitbox_struct]
+        # las secuencias fuera del grafo (no parseadas) cuentan como vacías
+        successors = [p if p in nodes else None for p in node_successors(node)]
+        local[offset] = (values, hitboxes, successors, _digest((sorted(values.items()), hitboxes)))
+
+    signatures = {}
+    for offset, (values, hitboxes, successors, content) in local.items():
+        fan_out = [local[p][3] if p is not None else None for p in successors]
+        signatures[offset] = NodeSignature(offset, values, hitboxes, successors,
+                                           content, _digest((content, fan_out)))
+    return signatures
+
+
+def _match_by(key: str, old: Dict[int, NodeSignature], new: Dict[int, NodeSignature],
+              pairs: Dict[int, int], match_pass: Dict[int, str], pass_name: str) -> None:
+    """
+    Empareja los nodos todavía sin pareja que comparten clave
+
+    Con varios nodos con la misma clave se emparejan en orden de offset; los
+    nodos con clave None no se emparejan.
+    """
+    buckets = defaultdict(deque)
+    matched_new = set(pairs.values())
+    for offset, sig in new.items():
+        if offset not in matched_new and getattr(sig, key) is not None:
+            buckets[getattr(sig, key)].append(offset)
+    for offset, sig in old.items():
+        if offset in pairs:
+            continue
+        bucket = buckets.get(getattr(sig, key))
+        if bucket:
+            pairs[offset] = bucket.popleft()
+            match_pass[offset] = pass_name
+
+
+def _diff_hitboxes(old: List[Tuple], new: List[Tuple]) -> Dict[str, List]:
+    """Hitboxes añadidos, eliminados y con la misma caja pero distinta puntuación"""
+    old_rects = defaultdict(list)
+    for hb in old:
+        old_rects[hb[:4]].append(hb)
+    added, changed = [], []
+    for hb in new:
+        candidates = old_rects.get(hb[:4])
+        if not candidates:
+            added.append(hb)
+            continue
+        prev = candidates.pop(0)
+        if prev != hb:
+            changed.append((prev, hb))
+
+    def rect(hb):
+        return dict(zip(('y0', 'y1', 'x0', 'x1', 'score'), hb))
+
+    return {
+        'added': [rect(hb) for hb in added],
+        'removed': [rect(hb) for hbs in old_rects.values() for hb in hbs],
+        'changed': [{'old': rect(a), 'new': rect(b)} for a, b in changed],
+    }
+
+
+def _node_summary(sig: NodeSignature) -> Dict:
+    """Descripción de un nodo añadido o eliminado"""
+    return {
+        'file_offset': f'0x{sig.offset:08x}',
+        'mem_offset': f'0x{sig.offset + MEMORY_OFFSET:08x}',
+        'signature': sig.content,
+        'frames': list(sig.frame_range or (None, None)),
+        'hitboxes': len(sig.hitboxes),
+    }
+
+
+def diff_graphs(old_graph: SceneGraph, new_graph: SceneGraph) -> Dict:
+    """
+    Compara dos grafos parseados
+
+    Args:
+        old_graph: revisión antigua
+        new_graph: revisión nueva
+
+    Returns:
+        Diccionario serializable a JSON con summary, changed, added y removed
+    """
+    old = node_signatures(old_graph)
+    new = node_signatures(new_graph)
+
+    pairs: Dict[int, int] = {}
+    match_pass: Dict[int, str] = {}
+    _match_by('structure', old, new, pairs, match_pass, 'structure')
+    _match_by('content', old, new, pairs, match_pass, 'content')
+    _match_by('frame_range', old, new, pairs, match_pass, 'frames')
+
+    changed = []
+    hitbox_totals = {'added': 0, 'removed': 0, 'changed': 0}
+    for old_offset in sorted(pairs):
+        new_offset = pairs[old_offset]
+        a, b = old[old_offset], new[new_offset]
+        entry = {
+            'old_offset': f'0x{old_offset:08x}',
+            'new_offset': f'0x{new_offset:08x}',
+            'match': match_pass[old_offset],
+        }
+
+        fields = {name: [a.values.get(name), b.values.get(name)]
+                  for name in dict.fromkeys((*a.values, *b.values))
+                  if a.values.get(name) != b.values.get(name)}
+        if fields:
+            entry['fields'] = fields
+
+        if a.hitboxes != b.hitboxes:
+            hitboxes = _diff_hitboxes(a.hitboxes, b.hitboxes)
+            for kind, items in hitboxes.items():
+                hitbox_totals[kind] += len(items)
+            entry['hitboxes'] = hitboxes
+
+        # una secuencia cambia si su destino no es la pareja del destino antiguo
+        sequences = []
+        for i in range(max(len(a.successors), len(b.successors))):
+            old_target = a.successors[i] if i < len(a.successors) else None
+            new_target = b.successors[i] if i < len(b.successors) else None
+            if (old_target is None, pairs.get(old_target)) != (new_target is None, new_target):
+                sequences.append({
+                    'index': i,
+                    'old': None if old_target is None else f'0x{old_target:08x}',
+                    'new': None if new_target is None else f'0x{new_target:08x}',
+                })
+        if sequences:
+            entry['sequences'] = sequences
+
+        if len(entry) > 3:
+            changed.append(entry)
+
+    matched_new = set(pairs.values())
+    removed = [_node_summary(sig) for offset, sig in sorted(old.items()) if offset not in pairs]
+    added = [_node_summary(sig) for offset, sig in sorted(new.items()) if offset not in matched_new]
+    for sig in (old[p] for p in old if p not in pairs):
+        hitbox_totals['removed'] += len(sig.hitboxes)
+    for sig in (new[p] for p in new if p not in matched_new):
+        hitbox_totals['added'] += len(sig.hitboxes)
+
+    return {
+        'diff_version': DIFF_VERSION,
+        'summary': {
+            'old_nodes': len(old),
+            'new_nodes': len(new),
+            'matched': len(pairs),
+            'matched_by': {name: sum(1 for p in match_pass.values() if p == name)
+                           for name in MATCH_PASSES},
+            'unchanged': len(pairs) - len(changed),
+            'changed': len(changed),
+            'added': len(added),
+            'removed': len(removed),
+            'hitboxes': hitbox_totals,
+        },
+        'changed': changed,
+        'added': added,
+        'removed': removed,
+    }
+
+
+def _load_graph(path: str, cache: Optional[SceneCache]) -> Tuple[str, SceneGraph]:
+    """Parsea el único binario de una ruta (binario o zip)"""
+    binaries = _open_binaries_or_exit(path)
+    if len(binaries) != 1:
+        print(f"Error: {path} contiene {len(binaries)} binarios, indica uno")
+        sys.exit(1)
+    name, data = binaries[0]
+    print(f"Parseando {name} ({len(data)} bytes)")
+    try:
+        return name, load_scene_graph(memoryview(data), cache)
+    except PARSE_ERRORS as e:
+        print(f"Error al parsear {name}: {e}")
+        sys.exit(1)
+
+
+def main():
+    """Función principal"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('old', help="revisión antigua (binario o zip)")
+    arg_parser.add_argument('new', help="revisión nueva (binario o zip)")
+    arg_parser.add_argument('-o', '--output', default='diff.json',
+                            help="JSON de salida con el diff; '-' para la salida estándar")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="no consultar ni guardar en la caché de parseos")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = arg_parser.parse_args()
+
+    cache = None if args.no_cache else SceneCache(args.cache_dir, version=str(PARSER_VERSION))
+    # con el JSON en la salida estándar, los mensajes del parseo van a stderr
+    log = sys.stderr if args.output == '-' else sys.stdout
+    with contextlib.redirect_stdout(log):
+        old_name, old_graph = _load_graph(args.old, cache)
+        new_name, new_graph = _load_graph(args.new, cache)
+
+    result = {'old': old_name, 'new': new_name, **diff_graphs(old_graph, new_graph)}
+    if args.output == '-':
+        json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    s = result['summary']
+    print(f"\n✓ {s['matched']} nodos emparejados ({s['unchanged']} sin cambios, {s['changed']} cambiados), "
+          f"{s['added']} añadidos, {s['removed']} eliminados")
+    print(f"  - Hitboxes: {s['hitboxes']['added']} añadidos, {s['hitboxes']['removed']} eliminados, "
+          f"{s['hitboxes']['changed']} cambiados")
+    print(f"  - Salida: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Caché en disco de parseos, direccionada por contenido
+
+Cada entrada es un snapshot binario compacto: columnas array.array guardadas
+tal cual, precedidas de una cabecera JSON con sus nombres y tipos. La clave es
+el SHA-256 del binario más la versión del parser, así que cambiar el binario o
+el parser invalida la entrada. El tamaño total del directorio se limita
+borrando las entradas usadas hace más tiempo.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+MAGIC = b'ZBC1'
+HEADER = struct.Struct('>4sI')  # magic + longitud de la cabecera JSON
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'zorton_reverse' / 'parser'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def pack_columns(columns: Dict[str, array], meta: Dict) -> bytes:
+    """
+    Serializa columnas array y metadatos a un snapshot binario
+
+    Args:
+        columns: nombre -> array
+        meta: metadatos serializables a JSON
+    """
+    header = {
+        'byteorder': sys.byteorder,
+        'meta': meta,
+        'columns': [[name, col.typecode, col.itemsize, len(col)] for name, col in columns.items()],
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    parts = [HEADER.pack(MAGIC, len(header_bytes)), header_bytes]
+    parts += [col.tobytes() for col in columns.values()]
+    return b''.join(parts)
+
+
+def unpack_columns(blob: bytes) -> Tuple[Dict[str, array], Dict]:
+    """
+    Deserializa un snapshot de pack_columns
+
+    Returns:
+        Tupla (columnas, metadatos)
+
+    Raises:
+        ValueError: si el snapshot no es válido o no es de esta plataforma
+    """
+    if len(blob) < HEADER.size:
+        raise ValueError("snapshot truncado")
+    magic, header_len = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("snapshot con formato desconocido")
+    header = json.loads(bytes(blob[HEADER.size:HEADER.size + header_len]))
+
+    columns = {}
+    pos = HEADER.size + header_len
+    for name, typecode, itemsize, length in header['columns']:
+        col = array(typecode)
+        if col.itemsize != itemsize:
+            raise ValueError(f"columna {name}: tamaño de elemento distinto en esta plataforma")
+        end = pos + itemsize * length
+        if end > len(blob):
+            raise ValueError("snapshot truncado")
+        col.frombytes(blob[pos:end])
+        if header['byteorder'] != sys.byteorder:
+            col.byteswap()
+        columns[name] = col
+        pos = end
+    return columns, header['meta']
+
+
+class SceneCache:
+    """Directorio de snapshots con clave SHA-256 + versión y tamaño máximo"""
+    SUFFIX = '.zbc'
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: str = ''):
+        """
+        Args:
+            cache_dir: directorio de la caché (se crea si no existe)
+            max_bytes: tamaño máximo del directorio; se borran las entradas
+                menos usadas al superarlo
+            version: versión del productor de los snapshots; forma parte de la clave
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, data) -> str:
+        """Clave de un buffer: SHA-256 del contenido y versión"""
+        return f"{hashlib.sha256(data).hexdigest()}-v{self.version}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, array], Dict]]:
+        """
+        Busca un snapshot
+
+        Returns:
+            Tupla (columnas, metadatos), o None si no está o no es válido
+        """
+        path = self._path(key)
+        try:
+            result = unpack_columns(path.read_bytes())
+            os.utime(path)  # marca la entrada como usada para la expulsión
+        except FileNotFoundError:
+            result = None
+        except (OSError, ValueError, KeyError):
+            # snapshot corrupto o de otra plataforma (o caché ilegible): se descarta
+            try:
+                self.invalidate(key)
+            except OSError:
+                pass
+            result = None
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, columns: Dict[str, array], meta: Dict) -> None:
+        """Guarda un snapshot y expulsa entradas antiguas si hace falta"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pack_columns(columns, meta))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def invalidate(self, key: str) -> None:
+        """Borra una entrada"""
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Borra todas las entradas"""
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            path.unlink()
+
+    def _evict(self) -> None:
+        """Borra las entradas usadas hace más tiempo hasta caber en max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            st = path.stat()
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
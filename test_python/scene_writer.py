@@ -0,0 +1,150 @@
+"""
+Salida del parser: construcción del diccionario completo o escritura en streaming
+
+parse_data entrega el resultado por partes (scene_order, cada chunk en cuanto
+se detecta y cada spare chunk) a un "sink" con esta interfaz:
+
+    start(scene_order), add_chunk(chunk), add_spare(node), finish()
+
+y, si se pide el análisis del grafo, add_analysis(analysis) antes de finish().
+"""
+
+import json
+import re
+from typing import Dict, List, TextIO
+
+
+FORMATS = ('pretty', 'compact', 'ndjson')
+HEX_REGEX = re.compile(r'0x[0-9a-f]+')
+
+
+class SceneCollector:
+    """Sink por defecto: construye en memoria el diccionario completo"""
+
+    def __init__(self):
+        self.result = {"scene_order": [], "chunks": [], "spare_chunks": []}
+
+    def start(self, scene_order: List[str]) -> None:
+        self.result["scene_order"] = scene_order
+
+    def add_chunk(self, chunk: Dict) -> None:
+        self.result["chunks"].append(chunk)
+
+    def add_spare(self, node: Dict) -> None:
+        self.result["spare_chunks"].append(node)
+
+    def add_analysis(self, analysis: Dict) -> None:
+        self.result["analysis"] = analysis
+
+    def finish(self) -> Dict:
+        return self.result
+
+
+def compact_value(value):
+    """Convierte recursivamente las cadenas '0x...' en enteros"""
+    if isinstance(value, str):
+        return int(value, 16) if HEX_REGEX.fullmatch(value) else value
+    if isinstance(value, dict):
+        return {k: compact_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact_value(v) for v in value]
+    return value
+
+
+class SceneStreamWriter:
+    """
+    Sink que escribe cada parte en el archivo en cuanto llega
+
+    Formatos:
+        pretty: idéntico a json.dump(resultado, indent=2, ensure_ascii=False),
+            el formato que lee SceneDataLoader
+        compact: sin indentación y con enteros en lugar de cadenas '0x%08x'
+        ndjson: un registro JSON por línea; scene_order, una cabecera por
+            chunk y un registro por nodo
+
+    El análisis del grafo, si lo hay, va al final (en ndjson, un registro).
+    """
+
+    def __init__(self, f: TextIO, fmt: str = 'pretty'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt}")
+        self.f = f
+        self.fmt = fmt
+        self.num_chunks = 0
+        self.num_nodes = 0
+        self.num_spare = 0
+        self._chunk_id = None
+        self._analysis = None
+
+    def _dumps(self, value, depth: int = 0) -> str:
+        """Serializa un valor para el formato actual a la profundidad indicada"""
+        if self.fmt == 'pretty':
+            text = json.dumps(value, indent=2, ensure_ascii=False)
+            return text.replace('\n', '\n' + '  ' * depth)
+        return json.dumps(compact_value(value), separators=(',', ':'), ensure_ascii=False)
+
+    def _record(self, record: str, value: Dict) -> None:
+        """Escribe una línea NDJSON"""
+        self.f.write(self._dumps({"record": record, **value}))
+        self.f.write('\n')
+
+    def _list_item(self, value: Dict, first: bool) -> None:
+        """Escribe un elemento de la lista abierta (chunks o spare_chunks)"""
+        if self.fmt == 'pretty':
+            self.f.write('\n    ' if first else ',\n    ')
+            self.f.write(self._dumps(value, 2))
+        else:
+            if not first:
+                self.f.write(',')
+            self.f.write(self._dumps(value))
+
+    def _close_list(self, count: int) -> None:
+        """Cierra la lista abierta"""
+        self.f.write('\n  ]' if self.fmt == 'pretty' and count else ']')
+
+    def start(self, scene_order: List[str]) -> None:
+        if self.fmt == 'ndjson':
+            self._record("scene_order", {"scene_order": scene_order})
+        elif self.fmt == 'pretty':
+            self.f.write('{\n  "scene_order": ' + self._dumps(scene_order, 1) + ',\n  "chunks": [')
+        else:
+            self.f.write('{"scene_order":' + self._dumps(scene_order) + ',"chunks":[')
+
+    def add_chunk(self, chunk: Dict) -> None:
+        if self.fmt == 'ndjson':
+            header = {k: v for k, v in chunk.items() if k != 'nodes'}
+            self._record("chunk", header)
+            for node in chunk['nodes']:
+                self._record("node", {"chunk": chunk['id'], **node})
+        else:
+            self._list_item(chunk, self.num_chunks == 0)
+        self.num_chunks += 1
+        self.num_nodes += len(chunk['nodes'])
+
+    def add_spare(self, node: Dict) -> None:
+        if self.fmt == 'ndjson':
+            self._record("spare", node)
+        else:
+            if self.num_spare == 0:
+                self._close_list(self.num_chunks)
+                self.f.write(',\n  "spare_chunks": [' if self.fmt == 'pretty' else ',"spare_chunks":[')
+            self._list_item(node, self.num_spare == 0)
+        self.num_spare += 1
+
+    def add_analysis(self, analysis: Dict) -> None:
+        if self.fmt == 'ndjson':
+            self._record("analysis", analysis)
+        else:
+            self._analysis = analysis  # se escribe al cerrar spare_chunks
+
+    def finish(self) -> Dict:
+        if self.fmt != 'ndjson':
+            if self.num_spare == 0:
+                self._close_list(self.num_chunks)
+                self.f.write(',\n  "spare_chunks": [' if self.fmt == 'pretty' else ',"spare_chunks":[')
+            self._close_list(self.num_spare)
+            if self._analysis is not None:
+                self.f.write(',\n  "analysis": ' + self._dumps(self._analysis, 1) if self.fmt == 'pretty'
+                             else ',"analysis":' + self._dumps(self._analysis))
+            self.f.write('\n}' if self.fmt == 'pretty' else '}')
+        return {"chunks": self.num_chunks, "chunk_nodes": self.num_nodes, "spare_chunks": self.num_spare}
@@ -0,0 +1,615 @@
+"""
+Simulador de partidas sobre el grafo de nodos parseado
+
+Sigue las reglas del README: las escenas de scene_order se juegan en orden
+(de la 0 a la 25). En cada nodo se ve su secuencia de frames
+(ptr_frame_start..ptr_frame_end); si tiene hitboxes, un impacto en el hitbox
+k lleva a lista_nodes[k + 1] y suma su puntuación, y un fallo o dejar pasar
+el tiempo lleva a lista_nodes[0]. Llegar al nodo de muerte quita una vida y
+se continúa en ptr_node_respawn del nodo en el que se murió. Un nodo sin
+secuencias termina la escena.
+
+Supuestos donde el README no dice nada:
+    - sin ptr_node_respawn, se repite el nodo en el que se murió
+    - un nodo sin hitboxes con varias secuencias sigue una al azar
+    - si hay más hitboxes que secuencias de impacto, se usa la última
+    - cada nodo visitado cuenta su secuencia entera de frames
+
+Las transiciones de cada nodo se calculan una vez por estrategia y se
+guardan en tablas de NumPy, saltando de una vez las cadenas de nodos con una
+única salida; el Monte Carlo avanza todas las partidas de un lote a la vez,
+un nodo con elección por paso, y los lotes se reparten entre procesos.
+
+Uso:
+    python test_python/simulator.py [binario] [-n partidas] [-j N] [-s estrategia] [--lives N] [-o resumen.json]
+"""
+
+import argparse
+import contextlib
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from graph_analysis import (
+    NO_NODE,
+    Adjacency,
+    build_adjacency,
+    node_row,
+    reachable,
+    strongly_connected_components,
+)
+from parser import (
+    DEFAULT_BINARY,
+    PARSE_ERRORS,
+    PARSER_VERSION,
+    FrameIndex,
+    SceneGraph,
+    _open_binaries_or_exit,
+    load_scene_graph,
+)
+from scene_cache import DEFAULT_CACHE_DIR, SceneCache
+
+
+SCENE_COUNT = 26  # scene_order[0..25] son las escenas del juego
+DEFAULT_LIVES = 3
+END = NO_NODE  # destino de una transición que termina la escena
+FPS = 25  # vídeo PAL
+MAX_STEPS = 100_000  # nodos por partida antes de darla por atascada
+BATCH_RUNS = 1 << 16  # partidas por lote del Monte Carlo
+
+
+class Strategy(NamedTuple):
+    """Forma de jugar: probabilidad de acertar y a qué hitbox se apunta"""
+    name: str
+    hit_prob: float  # probabilidad de acertar en un nodo con hitboxes
+    aim: str  # 'best' (el de más puntos), 'first' o 'uniform'
+
+
+STRATEGIES: Dict[str, Strategy] = {s.name: s for s in (
+    Strategy('perfecto', 1.0, 'best'),
+    Strategy('experto', 0.9, 'best'),
+    Strategy('normal', 0.7, 'uniform'),
+    Strategy('novato', 0.4, 'uniform'),
+)}
+
+
+class Outcome(NamedTuple):
+    """Una salida posible de un nodo"""
+    prob: float
+    target: int  # fila del nodo siguiente, o END
+    score: int
+    death: bool
+
+
+class ScenePaths(NamedTuple):
+    """Caminos sin muertes de una escena, de su nodo inicial a su final"""
+    scene: int
+    root: int  # offset de fichero del nodo inicial
+    min_frames: Optional[int]  # None si la escena no se puede terminar sin morir
+    max_frames: Optional[int]  # None además si un ciclo sin muertes puede terminarla
+    paths: Optional[int]  # número de caminos distintos; None en los mismos casos
+
+
+class Jump(NamedTuple):
+    """Destino tras saltarse los nodos con una única salida"""
+    target: int  # primer nodo con más de una salida (o que mata), o END
+    frames: int  # frames de los nodos saltados
+    score: int  # puntos de los nodos saltados
+
+
+class SimTables(NamedTuple):
+    """
+    Transiciones de una estrategia en arrays, una fila por nodo
+
+    Los nodos con una única salida (sin muerte) no ocupan pasos: cada salida
+    lleva ya al siguiente nodo con elección, con sus frames y puntos sumados.
+    """
+    cum: np.ndarray  # (nodos, salidas) probabilidad acumulada
+    target: np.ndarray  # (nodos, salidas) fila siguiente o END
+    score: np.ndarray  # (nodos, salidas) puntos, incluidos los nodos saltados
+    extra_frames: np.ndarray  # (nodos, salidas) frames de los nodos saltados
+    death: np.ndarray  # (nodos, salidas)
+    frames: np.ndarray  # (nodos,) duración de la secuencia
+    respawn: np.ndarray  # (nodos,) fila en la que se continúa tras morir, o END
+    respawn_frames: np.ndarray  # (nodos,)
+    respawn_score: np.ndarray  # (nodos,)
+    # entrada a cada escena (y una más para el final de la partida): primer
+    # nodo con elección, frames y puntos hasta él, y escena en la que está
+    # (las escenas sin ninguna elección se juegan enteras al entrar)
+    entry: np.ndarray
+    entry_frames: np.ndarray
+    entry_score: np.ndarray
+    entry_scene: np.ndarray
+
+
+class SimStats(NamedTuple):
+    """Sumas de un lote de partidas (se pueden combinar con merge)"""
+    runs: int
+    completed: int
+    stuck: int
+    score_sum: float
+    score_sq: float
+    score_max: int
+    frames_sum: float
+    deaths_sum: int
+    scenes_sum: int
+
+    def merge(self, other: 'SimStats') -> 'SimStats':
+        return SimStats(*(max(a, b) if name == 'score_max' else a + b
+                          for name, a, b in zip(self._fields, self, other)))
+
+    def to_dict(self) -> Dict:
+        """Medias por partida"""
+        runs = self.runs or 1
+        mean = self.score_sum / runs
+        return {
+            'runs': self.runs,
+            'completion_rate': self.completed / runs,
+            'stuck': self.stuck,
+            'score_mean': mean,
+            'score_std': math.sqrt(max(self.score_sq / runs - mean * mean, 0.0)),
+            'score_max': self.score_max,
+            'frames_mean': self.frames_sum / runs,
+            'deaths_mean': self.deaths_sum / runs,
+            'scenes_mean': self.scenes_sum / runs,
+        }
+
+
+class GameModel:
+    """
+    Grafo de un parseo preparado para simular: duración, respawn y salidas
+    de cada fila de NodeTable
+    """
+
+    def __init__(self, graph: SceneGraph, scene_count: int = SCENE_COUNT):
+        """
+        Args:
+            graph: grafo de build_scene_graph/load_scene_graph
+            scene_count: escenas de scene_order que forman la partida
+        """
+        self.nodes = graph.nodes
+        frames_index = FrameIndex(graph.frames)
+        self.roots = [self.row(p) for p in graph.scenes[:scene_count]]
+        if END in self.roots:
+            raise ValueError("scene_order apunta a un nodo que no está en el grafo")
+
+        self.frames: List[int] = []
+        self.respawn: List[int] = []
+        self.death: List[bool] = []
+        for row in range(len(self.nodes)):
+            node = self.nodes.row(row)
+            start = frames_index.frame_number(node.ptr_frame_start)
+            end = frames_index.frame_number(node.ptr_frame_end)
+            self.frames.append(end - start + 1 if start is not None and end is not None and end >= start else 0)
+            respawn = self.row(node.ptr_node_respawn) if node.ptr_node_respawn else END
+            self.respawn.append(row if respawn == END else respawn)
+            self.death.append(node.is_death_and_destruction)
+        self._transitions: Dict[Tuple[int, Strategy], Tuple[Outcome, ...]] = {}
+
+    def row(self, mem_ptr: int) -> int:
+        """Fila del nodo al que apunta un puntero de memoria, o END"""
+        return node_row(self.nodes, mem_ptr)
+
+    def _outcome(self, prob: float, target: int, score: int) -> Outcome:
+        death = target != END and self.death[target]
+        return Outcome(prob, END if death else target, score, death)
+
+    def transitions(self, row: int, strategy: Strategy) -> Tuple[Outcome, ...]:
+        """
+        Salidas de un nodo con sus probabilidades (memorizadas por estrategia)
+
+        Args:
+            row: fila del nodo en NodeTable
+            strategy: forma de jugar
+        """
+        key = (row, strategy)
+        cached = self._transitions.get(key)
+        if cached is not None:
+            return cached
+
+        node = self.nodes.row(row)
+        targets = [self.row(p) for p in node.lista_nodes]
+        hitboxes = node.hitbox_struct
+        if not targets and not hitboxes:
+            outcomes = (Outcome(1.0, END, 0, False),)
+        elif not hitboxes:
+            outcomes = tuple(self._outcome(1.0 / len(targets), t, 0) for t in targets)
+        else:
+            def target(i: int) -> int:
+                return targets[min(i, len(targets) - 1)] if targets else END
+
+            if strategy.aim == 'best':
+                best = max(range(len(hitboxes)), key=lambda k: hitboxes[k].score)
+                aimed = [(best, 1.0)]
+            elif strategy.aim == 'first':
+                aimed = [(0, 1.0)]
+            else:
+                aimed = [(k, 1.0 / len(hitboxes)) for k in range(len(hitboxes))]
+            outcomes = tuple(self._outcome(strategy.hit_prob * p, target(k + 1), hitboxes[k].score)
+                             for k, p in aimed)
+            if strategy.hit_prob < 1.0:
+                outcomes += (self._outcome(1.0 - strategy.hit_prob, target(0), 0),)
+        self._transitions[key] = outcomes
+        return outcomes
+
+    def successors(self, row: int) -> List[int]:
+        """Nodos a los que se puede ir desde un nodo, con cualquier estrategia"""
+        node = self.nodes.row(row)
+        rows = [self.row(p) for p in node.lista_nodes]
+        return [r for r in rows if r != END]
+
+    def reachable(self) -> Set[int]:
+        """Filas alcanzables desde las escenas, siguiendo secuencias y respawns"""
+        seen = reachable(build_adjacency(self.nodes), self.roots)
+        return {row for row, flag in enumerate(seen) if flag}
+
+    def scene_paths(self) -> List[ScenePaths]:
+        """
+        Camino más corto y más largo en frames, y número de caminos, de cada escena
+
+        Solo cuentan las secuencias que no matan. Un nodo termina la escena si
+        no tiene secuencias o si alguna no lleva a ningún nodo (como en
+        transitions); un nodo cuyas secuencias solo llevan a la muerte no la
+        termina. El más corto es un Dijkstra hacia atrás desde las salidas de
+        la escena; el más largo y el número de
+        caminos se calculan sobre las componentes fuertemente conexas, de las
+        finales a las iniciales: si desde un nodo se puede entrar en un ciclo
+        y aun así terminar la escena, ninguno de los dos tiene límite (None).
+        """
+        n = len(self.nodes)
+        start = array('I', [0])
+        targets = array('I')
+        ends = array('I')  # salidas de cada nodo que terminan la escena
+        for row in range(n):
+            rows = [self.row(p) for p in self.nodes.row(row).lista_nodes]
+            targets.extend(r for r in rows if r != END and not self.death[r])
+            start.append(len(targets))
+            ends.append(rows.count(END) if rows else 1)
+        adj = Adjacency(start, targets, array('B', bytes(len(targets))), [])
+
+        # más corto: dist[fila] = frames[fila] + mínimo de sus sucesores
+        shortest: List[Optional[int]] = [None] * n
+        heap = [(self.frames[row], row) for row in range(n) if ends[row]]
+        heapq.heapify(heap)
+        preds = adj.reverse()
+        while heap:
+            dist, row = heapq.heappop(heap)
+            if shortest[row] is not None:
+                continue
+            shortest[row] = dist
+            for prev in preds.successors(row):
+                if shortest[prev] is None:
+                    heapq.heappush(heap, (dist + self.frames[prev], prev))
+
+        # más largo y número de caminos: las componentes de Tarjan salen en
+        # orden topológico inverso, así que los sucesores se calculan antes
+        component, count = strongly_connected_components(adj)
+        members: List[List[int]] = [[] for _ in range(count)]
+        for row in range(n):
+            members[component[row]].append(row)
+        can_end = bytearray(n)
+        unbounded = bytearray(n)
+        longest: List[Optional[int]] = [None] * n
+        num_paths: List[Optional[int]] = [None] * n
+        for rows in members:
+            exits = [t for r in rows for t in adj.successors(r) if component[t] != component[r]]
+            if not (any(ends[r] for r in rows) or any(can_end[t] for t in exits)):
+                continue  # no se puede terminar la escena sin morir
+            for r in rows:
+                can_end[r] = 1
+            cyclic = len(rows) > 1 or rows[0] in adj.successors(rows[0])
+            if cyclic or any(unbounded[t] for t in exits):
+                for r in rows:
+                    unbounded[r] = 1
+                continue
+            row = rows[0]
+            nexts = [t for t in adj.successors(row) if can_end[t]]
+            after = [longest[t] for t in nexts] + ([0] if ends[row] else [])
+            longest[row] = self.frames[row] + max(after)
+            num_paths[row] = ends[row] + sum(num_paths[t] for t in nexts)
+
+        return [ScenePaths(scene, self.nodes.file_offset[root], shortest[root], longest[root], num_paths[root])
+                for scene, root in enumerate(self.roots)]
+
+    def jump(self, target: int, strategy: Strategy) -> Jump:
+        """
+        Sigue los nodos con una única salida que no mata desde un destino
+
+        Args:
+            target: fila de destino, o END
+            strategy: forma de jugar
+        """
+        frames = score = 0
+        seen = set()
+        while target != END and target not in seen:
+            outcomes = self.transitions(target, strategy)
+            if len(outcomes) != 1 or outcomes[0].death:
+                break
+            seen.add(target)
+            frames += self.frames[target]
+            score += outcomes[0].score
+            target = outcomes[0].target
+        return Jump(target, frames, score)
+
+    def tables(self, strategy: Strategy) -> SimTables:
+        """Transiciones de todos los nodos para el Monte Carlo"""
+        per_row = [self.transitions(row, strategy) for row in range(len(self.nodes))]
+        width = max(len(outcomes) for outcomes in per_row)
+        shape = (len(per_row), width)
+        cum = np.ones(shape)
+        target = np.full(shape, END, dtype=np.int32)
+        score = np.zeros(shape, dtype=np.int64)
+        extra_frames = np.zeros(shape, dtype=np.int64)
+        death = np.zeros(shape, dtype=bool)
+        respawn = np.full(len(per_row), END, dtype=np.int32)
+        respawn_frames = np.zeros(len(per_row), dtype=np.int64)
+        respawn_score = np.zeros(len(per_row), dtype=np.int64)
+        for row, outcomes in enumerate(per_row):
+            total = 0.0
+            for j, outcome in enumerate(outcomes):
+                total += outcome.prob
+                cum[row, j] = total
+                death[row, j] = outcome.death
+                jump = Jump(END, 0, 0) if outcome.death else self.jump(outcome.target, strategy)
+                target[row, j] = jump.target
+                score[row, j] = outcome.score + jump.score
+                extra_frames[row, j] = jump.frames
+            cum[row, len(outcomes) - 1:] = np.inf  # la última salida cubre el redondeo
+            respawn[row], respawn_frames[row], respawn_score[row] = self.jump(self.respawn[row], strategy)
+
+        scene_count = len(self.roots)
+        entry = np.full(scene_count + 1, END, dtype=np.int32)
+        entry_frames = np.zeros(scene_count + 1, dtype=np.int64)
+        entry_score = np.zeros(scene_count + 1, dtype=np.int64)
+        entry_scene = np.full(scene_count + 1, scene_count, dtype=np.int32)
+        for scene in reversed(range(scene_count)):
+            jump = self.jump(self.roots[scene], strategy)
+            if jump.target != END:
+                entry[scene], entry_scene[scene] = jump.target, scene
+                entry_frames[scene], entry_score[scene] = jump.frames, jump.score
+            else:
+                # escena sin elecciones: se suma entera y se entra en la siguiente
+                entry[scene], entry_scene[scene] = entry[scene + 1], entry_scene[scene + 1]
+                entry_frames[scene] = jump.frames + entry_frames[scene + 1]
+                entry_score[scene] = jump.score + entry_score[scene + 1]
+        return SimTables(cum, target, score, extra_frames, death,
+                         np.array(self.frames, dtype=np.int64),
+                         respawn, respawn_frames, respawn_score,
+                         entry, entry_frames, entry_score, entry_scene)
+
+
+def simulate_batch(tables: SimTables, runs: int, lives: int,
+                   rng: np.random.Generator) -> SimStats:
+    """
+    Juega un lote de partidas a la vez, un nodo con elección por paso
+
+    Args:
+        tables: transiciones de una estrategia (GameModel.tables)
+        runs: partidas del lote
+        lives: vidas al empezar
+        rng: generador de números aleatorios
+
+    Returns:
+        Sumas del lote
+    """
+    scene_count = len(tables.entry) - 1
+    width = tables.cum.shape[1]
+    # tablas aplanadas: fila * width + salida
+    cum = tables.cum.ravel()
+    flat_target = tables.target.ravel()
+    flat_score = tables.score.ravel()
+    flat_frames = tables.extra_frames.ravel()
+    flat_death = tables.death.ravel()
+
+    node = np.full(runs, tables.entry[0], dtype=np.int32)
+    scene = np.full(runs, tables.entry_scene[0], dtype=np.int32)
+    lives_left = np.full(runs, lives, dtype=np.int32)
+    score = np.full(runs, tables.entry_score[0], dtype=np.int64)
+    frames = np.full(runs, tables.entry_frames[0], dtype=np.int64)
+    deaths = np.zeros(runs, dtype=np.int32)
+    stats = SimStats(0, 0, 0, 0.0, 0.0, 0, 0.0, 0, 0)
+
+    def finish(done: np.ndarray, completed: bool) -> SimStats:
+        n = int(done.sum())
+        s = score[done].astype(np.float64)
+        return SimStats(n, n if completed else 0, 0,
+                        float(s.sum()), float((s * s).sum()), int(score[done].max(initial=0)),
+                        float(frames[done].sum()), int(deaths[done].sum()), int(scene[done].sum()))
+
+    # partidas que ya terminan al entrar (ninguna elección en todo el juego)
+    completed = node == END
+    for _ in range(MAX_STEPS):
+        if completed.any():
+            stats = stats.merge(finish(completed, True))
+            keep = ~completed
+            node, scene, lives_left = node[keep], scene[keep], lives_left[keep]
+            score, frames, deaths = score[keep], frames[keep], deaths[keep]
+        if not len(node):
+            break
+
+        frames += tables.frames[node]
+        base = node * width
+        j = np.zeros(len(node), dtype=np.int32)
+        r = rng.random(len(node))
+        for k in range(width - 1):
+            j += r >= cum[base + k]
+        flat = base + j
+        died = flat_death[flat]
+        deaths += died
+        lives_left -= died
+        over = died & (lives_left == 0)
+        nxt = np.where(died, tables.respawn[node], flat_target[flat])
+        score += np.where(died, tables.respawn_score[node], flat_score[flat])
+        frames += np.where(died, tables.respawn_frames[node], flat_frames[flat])
+
+        # fin de escena: se entra en la siguiente (o termina la partida)
+        scene_end = ~over & (nxt == END)
+        next_scene = np.where(scene_end, scene + 1, scene_count)
+        node = np.where(scene_end, tables.entry[next_scene], nxt)
+        score += np.where(scene_end, tables.entry_score[next_scene], 0)
+        frames += np.where(scene_end, tables.entry_frames[next_scene], 0)
+        scene = np.where(scene_end, tables.entry_scene[next_scene], scene)
+        completed = scene_end & (scene == scene_count)
+
+        if over.any():
+            stats = stats.merge(finish(over, False))
+            keep = ~over
+            node, scene, lives_left = node[keep], scene[keep], lives_left[keep]
+            score, frames, deaths = score[keep], frames[keep], deaths[keep]
+            completed = completed[keep]
+
+    if len(node):
+        stuck = finish(np.ones(len(node), dtype=bool), False)
+        stats = stats.merge(stuck._replace(stuck=stuck.runs))
+    return stats
+
+
+class SimTask(NamedTuple):
+    """Trabajo de un proceso del pool: varios lotes con su semilla"""
+    tables: SimTables
+    runs: int
+    lives: int
+    seed: np.random.SeedSequence
+
+
+def _simulate_task(task: SimTask) -> SimStats:
+    rng = np.random.default_rng(task.seed)
+    stats = SimStats(0, 0, 0, 0.0, 0.0, 0, 0.0, 0, 0)
+    for start in range(0, task.runs, BATCH_RUNS):
+        stats = stats.merge(simulate_batch(task.tables, min(BATCH_RUNS, task.runs - start), task.lives, rng))
+    return stats
+
+
+def simulate(model: GameModel, strategy: Strategy, runs: int, lives: int = DEFAULT_LIVES,
+             jobs: Optional[int] = None, seed: int = 0) -> SimStats:
+    """
+    Monte Carlo de partidas completas con una estrategia
+
+    Args:
+        model: grafo preparado
+        strategy: forma de jugar
+        runs: número de partidas
+        lives: vidas al empezar
+        jobs: procesos; None para uno por núcleo
+        seed: semilla (el resultado no depende del número de procesos
+            para un mismo reparto de partidas)
+
+    Returns:
+        Sumas de todas las partidas
+    """
+    tables = model.tables(strategy)
+    jobs = jobs or os.cpu_count() or 1
+    counts = [runs // jobs + (i < runs % jobs) for i in range(jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(jobs)
+    tasks = [SimTask(tables, n, lives, s) for n, s in zip(counts, seeds) if n]
+    if len(tasks) == 1:
+        results = [_simulate_task(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            results = list(pool.map(_simulate_task, tasks))
+    stats = SimStats(0, 0, 0, 0.0, 0.0, 0, 0.0, 0, 0)
+    for result in results:
+        stats = stats.merge(result)
+    return stats
+
+
+def analyze(graph: SceneGraph, strategies: List[Strategy], runs: int, lives: int = DEFAULT_LIVES,
+            jobs: Optional[int] = None, seed: int = 0) -> Dict:
+    """
+    Nodos alcanzables, caminos por escena y Monte Carlo de cada estrategia
+
+    Returns:
+        Diccionario con el resumen (ver main)
+    """
+    model = GameModel(graph)
+    reachable = model.reachable()
+    paths = model.scene_paths()
+    shortest = [p.min_frames for p in paths]
+    longest = [p.max_frames for p in paths]
+    counts = [p.paths for p in paths]
+    result = {
+        'nodes': len(model.nodes),
+        'reachable': len(reachable),
+        'unreachable': [f'0x{model.nodes.file_offset[row]:08x}'
+                        for row in range(len(model.nodes)) if row not in reachable],
+        'shortest_frames': None if None in shortest else sum(shortest),
+        'longest_frames': None if None in longest else sum(longest),
+        'paths': None if None in counts else math.prod(counts),
+        'scenes': [{**p._asdict(), 'root': f'0x{p.root:08x}'} for p in paths],
+        'lives': lives,
+        'strategies': {},
+    }
+    for strategy in strategies:
+        t0 = time.perf_counter()
+        stats = simulate(model, strategy, runs, lives, jobs, seed)
+        seconds = time.perf_counter() - t0
+        result['strategies'][strategy.name] = {
+            **strategy._asdict(), **stats.to_dict(),
+            'seconds': seconds, 'runs_per_second': runs / seconds if seconds else 0.0,
+        }
+    return result
+
+
+def main():
+    """Función principal"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('binary', nargs='?', default=DEFAULT_BINARY, help="binario o zip del juego")
+    arg_parser.add_argument('-n', '--runs', type=int, default=1_000_000, help="partidas por estrategia")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help="procesos en paralelo (por defecto uno por núcleo)")
+    arg_parser.add_argument('-s', '--strategy', choices=['all', *STRATEGIES], default='all')
+    arg_parser.add_argument('--lives', type=int, default=DEFAULT_LIVES)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('-o', '--output', default=None, help="JSON con el resumen completo")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="no consultar ni guardar en la caché de parseos")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = arg_parser.parse_args()
+
+    cache = None if args.no_cache else SceneCache(args.cache_dir, version=str(PARSER_VERSION))
+    binaries = _open_binaries_or_exit(args.binary)
+    if len(binaries) != 1:
+        print(f"Error: {args.binary} contiene {len(binaries)} binarios, indica uno")
+        sys.exit(1)
+    name, data = binaries[0]
+    strategies = list(STRATEGIES.values()) if args.strategy == 'all' else [STRATEGIES[args.strategy]]
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            graph = load_scene_graph(memoryview(data), cache)
+        result = analyze(graph, strategies, args.runs, args.lives, args.jobs, args.seed)
+    except PARSE_ERRORS as e:
+        print(f"Error al simular {name}: {e}")
+        sys.exit(1)
+
+    shortest = result['shortest_frames']
+    longest = result['longest_frames']
+    paths = result['paths'] if result['paths'] is not None else "infinitos"
+    print(f"{name}: {result['reachable']}/{result['nodes']} nodos alcanzables, "
+          f"{paths} caminos sin muertes")
+    print(f"  - Partida más corta: " + (f"{shortest} frames ({shortest / FPS / 60:.1f} min)"
+                                         if shortest is not None else "no se puede terminar sin morir"))
+    print(f"  - Partida más larga: " + (f"{longest} frames ({longest / FPS / 60:.1f} min)"
+                                         if longest is not None else "sin límite (ciclos sin muertes)"))
+    print(f"\n{args.runs} partidas por estrategia, {args.lives} vidas:")
+    for strategy_name, s in result['strategies'].items():
+        print(f"  {strategy_name:9s} {s['score_mean']:9.0f} ± {s['score_std']:7.0f} puntos, "
+              f"{s['completion_rate']:6.1%} terminadas, {s['deaths_mean']:5.2f} muertes, "
+              f"{s['scenes_mean']:5.1f} escenas ({s['runs_per_second'] / 1e6:.2f} M partidas/s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'binary': name, **result}, f, indent=2, ensure_ascii=False)
+        print(f"  - Salida: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
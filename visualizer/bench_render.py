@@ -0,0 +1,97 @@
+"""
+Benchmark del coste de pintar un frame: camino anterior frente al actual
+
+Uso:
+    uv run bench_render.py video.avi [frames]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import cv2
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QImage, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QApplication, QLabel
+
+from zb_analyzer.frame_decoder import read_rgb
+from zb_analyzer.video_player import VideoPlayer
+
+HITBOXES = [(20 + 30 * i, 20 + 20 * i, 60 + 30 * i, 80 + 20 * i, i) for i in range(8)]
+
+
+def render_legacy(cap, label):
+    """camino anterior: read, dos copias, cvtColor, QPixmap, pintar y escalar"""
+    ret, frame = cap.read()
+    if not ret:
+        return False
+    current_frame = frame.copy()
+    frame = current_frame.copy()
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    h, w, ch = rgb.shape
+    pixmap = QPixmap.fromImage(QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888))
+    painter = QPainter(pixmap)
+    for x0, y0, x1, y1, color_idx in HITBOXES:
+        painter.setPen(QPen(VideoPlayer.HITBOX_COLORS[color_idx], 3))
+        painter.drawRect(QRect(int(x0 * 2.25), int(y0 * 2.25), int((x1 - x0) * 2.25), int((y1 - y0) * 2.25)))
+    painter.end()
+    label.setPixmap(pixmap.scaled(720, 576, Qt.KeepAspectRatio))
+    label.repaint()
+    return True
+
+
+def render_current(cap, player, state):
+    """camino actual: read en buffer reutilizado, cvtColor, QImage sin copia, overlay en paintEvent"""
+    frame, state["bgr"] = read_rgb(cap, state.get("bgr"))
+    if frame is None:
+        return False
+    player.current_frame = frame
+    player.display_frame()
+    player.repaint()
+    return True
+
+
+def measure(path, frames, render):
+    """ms por frame y KiB reservados por frame (tracemalloc ve las reservas de numpy)"""
+    cap = cv2.VideoCapture(path)
+    render(cap)  # calentamiento
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    count = 0
+    while count < frames and render(cap):
+        count += 1
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cap.release()
+    return elapsed * 1000 / count, peak / 1024
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    path = sys.argv[1]
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+
+    label = QLabel()
+    label.show()
+    player = VideoPlayer()
+    player.set_hitboxes(
+        [{"x0": x0, "y0": y0, "x1": x1, "y1": y1, "color_index": c} for x0, y0, x1, y1, c in HITBOXES]
+    )
+    player.show()
+    state = {}
+
+    # incluye la decodificación, igual en ambos caminos
+    t_old, mem_old = measure(path, frames, lambda cap: render_legacy(cap, label))
+    t_new, mem_new = measure(path, frames, lambda cap: render_current(cap, player, state))
+    print(f"Frames: {frames} de {path}")
+    print(f"  anterior: {t_old:7.3f} ms/frame, pico de memoria {mem_old:9.1f} KiB")
+    print(f"  actual:   {t_new:7.3f} ms/frame, pico de memoria {mem_new:9.1f} KiB  (x{t_old / t_new:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark de arranque: tiempo de importación de main.py y tiempo hasta el
+primer frame, cada medida en un proceso nuevo (mediana de varias ejecuciones)
+
+Falla (código 1) si al importar main.py se carga cv2, o si se pasa de los
+límites dados con --max-import-ms / --max-first-frame-ms. Con el JSON del
+parser comprueba antes que el índice de nodos sale igual en formato compact.
+
+Uso:
+    uv run bench_startup.py video.avi zb.json [-n 5] [--max-import-ms N] [--max-first-frame-ms N]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure_import():
+    """
+    ms de 'import main' según -X importtime y los módulos que carga
+
+    devuelve (ms, {módulo: (ms acumulados, profundidad)}), solo de lo que
+    cuelga de main (no de lo que importa site al arrancar el intérprete)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # importtime lista los hijos antes que el padre, que queda a profundidad 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        name, depth = match.group(4), (len(match.group(3)) - 1) // 2
+        modules[name] = (int(match.group(2)) / 1000, depth)
+        if depth == 0:
+            if name == "main":
+                return modules.pop(name)[0], modules
+            modules = {}
+    return 0.0, modules
+
+
+def child_first_frame(video_path, json_path):
+    """en el proceso hijo: arranque completo sin el diálogo de archivos"""
+    t0 = time.perf_counter()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+
+    import main
+
+    imported = time.perf_counter()
+    app = QApplication(sys.argv[:1])
+    window = main.open_main_window(video_path, json_path)
+    window.show()
+    while window.video_widget.base_image is None:
+        app.processEvents()
+    first_frame = time.perf_counter()
+    window.close()
+    print(json.dumps({"import_ms": (imported - t0) * 1000, "first_frame_ms": (first_frame - t0) * 1000}))
+
+
+def measure_first_frame(video_path, json_path):
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", video_path, json_path],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compact(value):
+    """JSON pretty del parser → compact: los '0x...' pasan a enteros"""
+    if isinstance(value, dict):
+        return {k: compact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    if isinstance(value, str) and value.startswith("0x"):
+        try:
+            return int(value, 16)
+        except ValueError:
+            return value  # punteros negativos ('0x-...'): el parser los deja así
+    return value
+
+
+def check_compact_json(json_path):
+    """el índice de nodos del JSON y el de su versión compact deben coincidir"""
+    from zb_analyzer.node_index import NodeIndex
+
+    with open(json_path, "rb") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        return  # zb.json antiguo: sin nodos
+    pretty = NodeIndex.from_parser_json(data).nodes
+    compacted = NodeIndex.from_parser_json(compact(data)).nodes
+    if pretty != compacted:
+        raise AssertionError("el índice de nodos cambia con el JSON en formato compact")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("video")
+    arg_parser.add_argument("json")
+    arg_parser.add_argument("-n", "--runs", type=int, default=5)
+    arg_parser.add_argument("--max-import-ms", type=float, default=None)
+    arg_parser.add_argument("--max-first-frame-ms", type=float, default=None)
+    arg_parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    video_path = os.path.abspath(args.video)
+    json_path = os.path.abspath(args.json)
+    if args.child:
+        child_first_frame(video_path, json_path)
+        return
+    check_compact_json(json_path)
+
+    imports = []
+    for _ in range(args.runs):
+        total_ms, modules = measure_import()
+        imports.append(total_ms)
+    runs = [measure_first_frame(video_path, json_path) for _ in range(args.runs)]
+    import_ms = statistics.median(imports)
+    first_frame_ms = statistics.median(r["first_frame_ms"] for r in runs)
+
+    print(f"Arranque ({args.runs} ejecuciones, mediana):")
+    print(f"  import main:        {import_ms:7.1f} ms")
+    # lo que importa main directamente, de más a menos lento
+    slowest = sorted(((ms, name) for name, (ms, depth) in modules.items() if depth == 1), reverse=True)[:5]
+    for ms, name in slowest:
+        print(f"    {name:<30} {ms:7.1f} ms")
+    print(f"  hasta primer frame: {first_frame_ms:7.1f} ms")
+
+    failures = []
+    if "cv2" in modules:
+        failures.append("main.py importa cv2 antes del diálogo de archivos")
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import main: {import_ms:.1f} ms > {args.max_import_ms} ms")
+    if args.max_first_frame_ms is not None and first_frame_ms > args.max_first_frame_ms:
+        failures.append(f"primer frame: {first_frame_ms:.1f} ms > {args.max_first_frame_ms} ms")
+    for failure in failures:
+        print(f"REGRESIÓN: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
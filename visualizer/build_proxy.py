@@ -0,0 +1,40 @@
+"""
+Generar el proxy de un vídeo (frames 320x256 sin comprimir) para saltos y
+pasos frame a frame instantáneos en pausa
+
+Uso:
+    uv run build_proxy.py video.avi
+"""
+
+import sys
+
+from zb_analyzer.proxy_store import ProxyStore
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    path = sys.argv[1]
+
+    proxy = ProxyStore.open(path)
+    if proxy:
+        print(f"El proxy ya está al día: {proxy.frame_count} frames ({proxy.path})")
+        return
+
+    def progress(done, total):
+        print(f"\r  {done}/{total} frames", end="", flush=True)
+
+    proxy = ProxyStore.build(path, progress)
+    print()
+    if proxy is None:
+        print("Error: no se pudo generar el proxy")
+        sys.exit(1)
+    print(
+        f"Proxy: {proxy.frame_count} frames, {proxy.nbytes / (1024 * 1024):.0f} MB "
+        f"en {proxy.build_seconds:.1f} s ({proxy.path})"
+    )
+
+
+if __name__ == "__main__":
+    main()
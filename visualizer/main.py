@@ -1,6 +1,6 @@
 import sys
 
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import QEventLoop, Qt, QTimer
 from PySide6.QtWidgets import (
     QApplication,
     QComboBox,
@@ -11,6 +11,7 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QMainWindow,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QScrollArea,
     QSpinBox,
@@ -23,7 +24,8 @@ from zb_analyzer.frame_buttons import FrameButtonManager
 from zb_analyzer.hitbox_controls import HitboxControlsPanel
 from zb_analyzer.hitbox_manager import HitboxManager
 from zb_analyzer.playback_controls import PlaybackControls
-from zb_analyzer.scene_loader import SceneDataLoader
+from zb_analyzer.scene_loader import SceneDataLoader, scene_tags
+from zb_analyzer.startup_loader import StartupLoader
 from zb_analyzer.video_player import VideoPlayer
 
 
@@ -134,22 +136,43 @@ class FileSelectionDialog(QDialog):
 class MainWindow(QMainWindow):
     """Ventana principal de la aplicación"""
 
-    def __init__(self, video_path, json_path):  # noqa: PLR0915
+    def __init__(  # noqa: PLR0915
+        self,
+        video_path,
+        json_path,
+        frame_cache_mb=None,
+        scene_loader=None,
+        video_props=None,
+        node_index=None,
+    ):
         super().__init__()
         self.setWindowTitle("Zorton Brothers Analyzer")
         self.resize(1400, 800)
 
-        self.scene_loader = SceneDataLoader(json_path)
-        self.scenes = self.scene_loader.load_scenes()
-
-        self.video_widget = VideoPlayer()
-        self.video_widget.load_video(video_path)
-
+        # escenas, índice de nodos y propiedades del vídeo pueden venir ya
+        # cargados por StartupLoader; las escenas se procesan al seleccionarlas
+        # en el combo
+        if scene_loader is None:
+            scene_loader = SceneDataLoader(json_path, lazy=True)
+            scene_loader.load_scenes()
+            node_index = scene_loader.node_index
+        self.scene_loader = scene_loader
+        self.scenes = self.scene_loader.get_scenes()
+
+        self.video_widget = VideoPlayer(frame_cache_mb)
+        self.video_widget.load_video(video_path, video_props)
+        self.video_widget.node_index = node_index
+
+        # con el JSON de parser.py --analysis, cada escena lleva sus etiquetas
+        # (posición en scene_order, nodos inalcanzables, ciclos, muertes)
         self.scene_selector = QComboBox()
         self.scene_selector.addItems(
             [
-                f"Escena #{scene.get('id', i)} - {scene['offset']}"
-                for i, scene in enumerate(self.scenes)
+                " · ".join(
+                    [f"Escena #{scene.get('id', i)} - {scene['offset']}"]
+                    + scene_tags(scene.get("analysis"))
+                )
+                for i, scene in enumerate(self.scene_loader.get_scene_headers())
             ]
         )
         self.scene_selector.currentIndexChanged.connect(self.on_scene_changed)
@@ -182,13 +205,24 @@ class MainWindow(QMainWindow):
             self.toggle_play_pause,
             lambda: self.video_widget.seek_frame(-1),
             lambda: self.video_widget.seek_frame(1),
+            self.video_widget.set_speed,
         )
 
         self.is_playing = False
 
-        self.frame_timer = QTimer()
-        self.frame_timer.timeout.connect(self.update_frame_display)
-        self.frame_timer.start(100)
+        # la etiqueta de frame se actualiza como mucho una vez por refresco
+        # de pantalla, aunque lleguen varios frameChanged entre medias
+        self.pending_frame = None
+        self.frame_label_timer = QTimer()
+        self.frame_label_timer.setSingleShot(True)
+        self.frame_label_timer.setInterval(self._refresh_interval_ms())
+        self.frame_label_timer.timeout.connect(self.update_frame_display)
+        self.video_widget.frameChanged.connect(self.on_frame_changed)
+
+        # nodos de cualquier escena que cubren el frame actual
+        self.node_label = QLabel("Nodos: -")
+        self.node_label.setWordWrap(True)
+        self.node_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
 
         manual_frame_widget = QWidget()
         manual_frame_main_layout = QHBoxLayout()
@@ -242,11 +276,14 @@ class MainWindow(QMainWindow):
         left_layout.addLayout(scene_selector_layout)
         left_layout.addWidget(self.video_widget)
         left_layout.addWidget(self.playback_controls)
+        left_layout.addWidget(self.node_label)
         left_layout.addWidget(manual_frame_widget)
 
         right_layout = QVBoxLayout()
 
         self.hitbox_controls = HitboxControlsPanel()
+        self.hitbox_controls.auto_hitboxes_check.setEnabled(node_index is not None)
+        self.hitbox_controls.auto_hitboxes_check.toggled.connect(self.video_widget.set_auto_hitboxes)
 
         self.checkbox_widget = QWidget()
         self.checkbox_layout = QVBoxLayout()
@@ -333,6 +370,9 @@ class MainWindow(QMainWindow):
 
         self.on_scene_changed(0)  # carga de primera escena del json
 
+        # snapshot de escenas para el próximo arranque, en otro hilo
+        self.scene_loader.save_cache_in_background()
+
         # reproducción
         self.video_widget.play()
         self.is_playing = True
@@ -349,6 +389,7 @@ class MainWindow(QMainWindow):
         self.frame_button_manager.update_frame_buttons(scene["frames"])
         self.frame_button_manager.reset_history()
         self.frame_button_manager.activate_first_frame()
+        self.video_widget.prefetch([(fr["from"], fr["to"]) for fr in scene["frames"]])
 
     def toggle_play_pause(self):
         if self.is_playing:
@@ -372,9 +413,38 @@ class MainWindow(QMainWindow):
             self.is_playing = True
             self.playback_controls.set_play_state(self.is_playing)
 
+    @staticmethod
+    def _refresh_interval_ms():
+        """ms entre refrescos de la pantalla principal (60 Hz si no se sabe)"""
+        screen = QApplication.primaryScreen()
+        rate = screen.refreshRate() if screen else 0
+        return max(1, round(1000 / rate)) if rate > 0 else 16
+
+    def on_frame_changed(self, frame_number):
+        self.pending_frame = frame_number
+        if not self.frame_label_timer.isActive():
+            self.frame_label_timer.start()
+
     def update_frame_display(self):
-        current_frame = self.video_widget.get_current_frame_number()
-        self.playback_controls.update_frame_label(current_frame)
+        if self.pending_frame is not None:
+            self.playback_controls.update_frame_label(self.pending_frame)
+            self.update_node_label(self.pending_frame)
+            self.pending_frame = None
+
+    def update_node_label(self, frame_number):
+        """nodos cuya secuencia incluye el frame, marcando los que tienen hitboxes activos"""
+        index = self.video_widget.node_index
+        if index is None:
+            return
+        shootable = index.hitbox_nodes_at(frame_number)
+        parts = []
+        for node in index.nodes_at(frame_number):
+            scenes = ", ".join(str(s) for s in node.scenes) or "spare"
+            text = f"0x{node.offset:08x} (escena {scenes}, {node.frame_from}-{node.frame_to})"
+            if node in shootable:
+                text += f" 🎯 {len(node.hitboxes)} hitboxes hasta {node.hit_to}"
+            parts.append(text)
+        self.node_label.setText("Nodos: " + (" | ".join(parts) or "-"))
 
     def prev_scene(self):
         """cambiar a la escena anterior"""
@@ -414,6 +484,7 @@ class MainWindow(QMainWindow):
             )
             return
 
+        cache = info["cache"]
         minutes = int(info["duration"] // 60)
         seconds = info["duration"] % 60
 
@@ -422,7 +493,14 @@ class MainWindow(QMainWindow):
 <b>Resolución:</b> {info["width"]} x {info["height"]} px<br>
 <b>FPS:</b> {info["fps"]:.2f}<br>
 <b>Total de frames:</b> {info["total_frames"]}<br>
-<b>Duración:</b> {minutes}m {seconds:.2f}s"""
+<b>Duración:</b> {minutes}m {seconds:.2f}s<br><br>
+<b>Frames decodificados:</b> {info["decoded_frames"]} ({info["buffered_frames"]} en buffer, {info["seeks"]} saltos)<br>
+<b>Velocidad:</b> {info["speed"]:g}x<br>
+<b>Frames saltados:</b> {info["dropped_frames"]} ({info["stalls"]} esperas al decodificador)<br>
+<b>Retraso:</b> {info["drift_ms"]:.1f} ms (medio {info["mean_drift_ms"]:.1f} ms, máximo {info["max_drift_ms"]:.1f} ms)<br>
+<b>Proxy para pasos en pausa:</b> {info["proxy"] or "no (ver build_proxy.py)"}<br>
+<b>Caché de frames:</b> {cache["frames"]} frames, {cache["mb"]:.0f} / {cache["max_mb"]:.0f} MB<br>
+<b>Aciertos / fallos:</b> {cache["hits"]} / {cache["misses"]} ({cache["hit_rate"]:.0%})"""
 
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("Información del video")
@@ -430,6 +508,10 @@ class MainWindow(QMainWindow):
         msg_box.setText(message)
         msg_box.exec()
 
+    def closeEvent(self, event):
+        self.video_widget.release()
+        super().closeEvent(event)
+
     def update_frame_history(self, history):
         """actualizar el label del historial de frames"""
         if history:
@@ -477,10 +559,39 @@ def main():
     video_path, json_path = dialog.get_paths()
     config_manager.set_paths(video_path, json_path)
 
-    window = MainWindow(video_path, json_path)
+    window = open_main_window(video_path, json_path, config_manager.get_frame_cache_mb())
     window.show()
     sys.exit(app.exec())
 
 
+def open_main_window(video_path, json_path, frame_cache_mb=None):
+    """cargar vídeo y escenas en un hilo mostrando el progreso, y crear la ventana"""
+    loader = StartupLoader(video_path, json_path)
+    progress = QProgressDialog("Cargando…", None, 0, 100)
+    progress.setWindowTitle("Zorton Brothers Analyzer")
+    progress.setMinimumDuration(0)
+    progress.setAutoClose(False)
+    loader.progress.connect(lambda percent, text: (progress.setValue(percent), progress.setLabelText(text)))
+
+    # la señal finished llega por la cola de eventos aunque el hilo acabe antes de exec
+    loop = QEventLoop()
+    loader.finished.connect(loop.quit)
+    loader.start()
+    progress.show()
+    loop.exec()
+    progress.close()
+
+    steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in loader.timings.items())
+    print(f"Carga inicial: {steps}")
+    return MainWindow(
+        video_path,
+        json_path,
+        frame_cache_mb,
+        loader.scene_loader,
+        loader.video_props,
+        loader.node_index,
+    )
+
+
 if __name__ == "__main__":
     main()
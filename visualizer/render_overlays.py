@@ -0,0 +1,54 @@
+"""
+Render sin interfaz de los hitboxes de todas las escenas
+
+Escribe por escena una hoja de contactos (PNG, una fila por rango de frames)
+o un vídeo con los rangos seguidos (AVI MJPG), repartiendo el trabajo en
+procesos por tramos contiguos del vídeo.
+
+Uso:
+    uv run render_overlays.py zb.json video.avi [-o overlays] [--mode sheet|video] [-j N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from zb_analyzer.overlay_renderer import render_scenes
+from zb_analyzer.scene_loader import SceneDataLoader
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("json", help="JSON de escenas (el mismo que usa main.py)")
+    arg_parser.add_argument("video", help="vídeo del juego")
+    arg_parser.add_argument("-o", "--output", default="overlays", help="directorio de salida")
+    arg_parser.add_argument("--mode", choices=["sheet", "video"], default="sheet")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None, help="procesos (por defecto, todas las CPUs)")
+    arg_parser.add_argument("--offset-x", type=int, default=0, help="offset X de los hitboxes")
+    arg_parser.add_argument("--offset-y", type=int, default=0, help="offset Y de los hitboxes")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.video):
+        print(f"Error: no existe el vídeo {args.video}")
+        sys.exit(1)
+
+    scenes = SceneDataLoader(args.json).load_scenes()
+    t0 = time.perf_counter()
+    written = render_scenes(
+        args.video,
+        scenes,
+        args.output,
+        mode=args.mode,
+        jobs=args.jobs,
+        offset_x=args.offset_x,
+        offset_y=args.offset_y,
+    )
+    elapsed = time.perf_counter() - t0
+    print(f"{len(written)} escenas renderizadas en {args.output} ({elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
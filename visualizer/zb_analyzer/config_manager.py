@@ -2,6 +2,8 @@ import json
 import os
 from pathlib import Path
 
+from .frame_cache import DEFAULT_MAX_MB
+
 
 class ConfigManager:
     """Gestiona la configuración de la aplicación"""
@@ -47,6 +49,10 @@ class ConfigManager:
     def get_last_json_directory(self):
         return self.config.get("last_json_directory", str(Path.home()))
 
+    def get_frame_cache_mb(self):
+        """límite de la caché de frames decodificados, en MB"""
+        return self.config.get("frame_cache_mb", DEFAULT_MAX_MB)
+
     def set_last_video_path(self, path):
         self.config["last_video_path"] = path
         if path:
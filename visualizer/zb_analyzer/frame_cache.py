@@ -0,0 +1,73 @@
+"""
+Caché LRU en memoria de frames ya decodificados.
+
+La clave es (ruta del vídeo, número de frame) y el límite se da en MB. Los
+frames se guardan como arrays RGB de solo lectura y se comparten sin copiar
+con el buffer del decodificador.
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_MB = 512  # ~400 frames de 720x576
+
+
+class FrameCache:
+    """frames decodificados con expulsión del menos usado"""
+
+    def __init__(self, max_mb=DEFAULT_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._frames = OrderedDict()
+        # la usan a la vez el decodificador, el prefetch y el hilo de Qt
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """frame guardado o None; cuenta aciertos y fallos"""
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def put(self, key, frame):
+        """guardar un frame y expulsar los menos usados hasta caber"""
+        if frame.nbytes > self.max_bytes:
+            return
+        frame.flags.writeable = False
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._frames[key] = frame
+            self.nbytes += frame.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """estadísticas para el diálogo de información"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "frames": len(self._frames),
+                "mb": self.nbytes / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,279 @@
+"""
+Decodificación de vídeo en un hilo aparte.
+
+El hilo productor lee frames con su propio cv2.VideoCapture, los convierte a
+RGB y los deja en un buffer circular acotado; el hilo de Qt solo los recoge y
+los pinta. Con el buffer lleno el productor espera (backpressure), y un salto
+o un cambio de bucle vacía el buffer, salvo si el frame pedido ya está en él.
+
+Los saltos consultan el índice de keyframes (SeekIndex): si leer hacia
+delante desde la posición actual es más barato que saltar, no se salta.
+
+Con una FrameCache, los frames ya decodificados (bucles, rangos precargados
+por FramePrefetcher) se entregan desde memoria sin tocar el vídeo.
+"""
+
+import threading
+from collections import deque
+
+import cv2
+
+from .seek_index import SEEK_COST_FRAMES, SeekIndex
+
+DEFAULT_CAPACITY = 12  # ~0.5 s a 25 fps, ~15 MB a 720x576
+
+
+def probe_video(path):
+    """propiedades del vídeo (tamaño, fps, número de frames) o None si no se abre"""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return None
+        return {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS),
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        }
+    finally:
+        cap.release()
+
+
+def resize_rgb(rgb, size, dst=None):
+    """escalar un frame para pantalla (vecino más próximo, en dst si se da)"""
+    return cv2.resize(rgb, size, dst=dst, interpolation=cv2.INTER_NEAREST)
+
+
+def move_capture(cap, position, target, index=None):
+    """
+    dejar cap listo para leer target desde position
+
+    devuelve (nueva posición, si hubo que saltar)
+    """
+    if index:
+        forward = index.read_forward(position, target)
+    else:
+        forward = 0 <= target - position <= SEEK_COST_FRAMES
+    if forward:
+        # grab decodifica sin convertir ni copiar el frame
+        while position < target and cap.grab():
+            position += 1
+        return position, False
+    cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+    return target, True
+
+
+def read_rgb(cap, bgr=None):
+    """
+    leer el siguiente frame convertido a RGB (None al final del vídeo)
+
+    bgr es el buffer de lectura de la llamada anterior y se reutiliza; devuelve
+    (frame RGB, buffer bgr). El RGB sí es memoria nueva: se queda en el buffer
+    circular y en la caché
+    """
+    ret, frame = cap.read(bgr)
+    if not ret:
+        return None, bgr
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), frame
+
+
+class FrameDecoder:
+    """productor de frames decodificados por delante de la reproducción"""
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, cache=None):
+        self.path = path
+        self.capacity = capacity
+        self.cache = cache
+        self._frames = deque()
+        self._cond = threading.Condition()
+        # cada salto cambia de generación; los frames leídos antes se descartan
+        self._generation = 0
+        self._seek_to = 0
+        self._next = 0
+        self._loop = None
+        self._eof = False
+        self._running = True
+        self.decoded = 0
+        self.seeks = 0
+        self.index = None
+        # el índice se carga (o se construye) aparte para no retrasar el primer frame
+        threading.Thread(target=self._load_index, name="SeekIndex", daemon=True).start()
+        self._thread = threading.Thread(target=self._run, name="FrameDecoder", daemon=True)
+        self._thread.start()
+
+    def _load_index(self):
+        self.index = SeekIndex.load_or_build(self.path)
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.path)
+        position = 0  # siguiente frame que leerá cap
+        bgr = None
+        try:
+            while True:
+                with self._cond:
+                    while self._running and self._seek_to is None and (
+                        self._eof or len(self._frames) >= self.capacity
+                    ):
+                        self._cond.wait()
+                    if not self._running:
+                        return
+                    target = self._next
+                    if self._seek_to is not None:
+                        target, self._seek_to = self._seek_to, None
+                    elif self._loop and target > self._loop[1]:
+                        target = self._loop[0]
+                    generation = self._generation
+
+                # la decodificación no bloquea al hilo de Qt
+                frame = self.cache.get((self.path, target)) if self.cache else None
+                if frame is None:
+                    if position != target:
+                        position, seeked = move_capture(cap, position, target, self.index)
+                        self.seeks += seeked
+                    frame, bgr = read_rgb(cap, bgr)
+                    if frame is not None:
+                        position += 1
+                        self.decoded += 1
+                        if self.cache:
+                            self.cache.put((self.path, target), frame)
+
+                with self._cond:
+                    if generation != self._generation:
+                        continue
+                    if frame is not None:
+                        self._frames.append((target, frame))
+                        self._next = target + 1
+                    else:
+                        self._eof = True
+                    self._cond.notify_all()
+        finally:
+            cap.release()
+
+    def seek(self, frame_number, loop=None):
+        """vaciar el buffer y decodificar desde frame_number (con bucle opcional)"""
+        with self._cond:
+            if loop == self._loop:
+                # ya decodificado (p. ej. avanzar un frame): solo se descartan los anteriores
+                for i, (number, _) in enumerate(self._frames):
+                    if number == frame_number:
+                        for _ in range(i):
+                            self._frames.popleft()
+                        self._cond.notify_all()
+                        return
+                if frame_number == self._next and self._seek_to is None:
+                    # es el siguiente que entregará el productor: basta con esperarlo
+                    self._frames.clear()
+                    self._cond.notify_all()
+                    return
+            self._frames.clear()
+            self._generation += 1
+            self._seek_to = frame_number
+            self._loop = loop
+            self._eof = False
+            self._cond.notify_all()
+
+    def get(self):
+        """siguiente frame listo (número, imagen RGB) o None si no hay ninguno"""
+        with self._cond:
+            if not self._frames:
+                return None
+            item = self._frames.popleft()
+            self._cond.notify_all()
+            return item
+
+    def wait_frame(self, timeout=1.0):
+        """como get, pero esperando a que el productor entregue un frame"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frames or self._eof, timeout)
+            if not self._frames:
+                return None
+            item = self._frames.popleft()
+            self._cond.notify_all()
+            return item
+
+    @property
+    def buffered(self):
+        return len(self._frames)
+
+    @property
+    def at_end(self):
+        """fin del vídeo y buffer vacío"""
+        with self._cond:
+            return self._eof and not self._frames
+
+    def close(self):
+        """parar el hilo productor"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
+
+
+class FramePrefetcher:
+    """
+    decodifica rangos de frames en la caché con su propio VideoCapture
+
+    cada petición sustituye a la anterior; se precarga como mucho lo que cabe
+    en la caché, para no expulsar lo que se acaba de precargar
+    """
+
+    def __init__(self, path, cache, decoder=None):
+        self.path = path
+        self.cache = cache
+        self.decoder = decoder  # solo para compartir su índice de keyframes
+        self._cond = threading.Condition()
+        self._ranges = None
+        self._generation = 0
+        self._running = True
+        self.prefetched = 0
+        self._thread = threading.Thread(target=self._run, name="FramePrefetcher", daemon=True)
+        self._thread.start()
+
+    def request(self, ranges):
+        """precargar los rangos (inicio, fin) inclusivos, en este orden"""
+        with self._cond:
+            self._ranges = list(ranges)
+            self._generation += 1
+            self._cond.notify_all()
+
+    def _cancelled(self, generation):
+        return not self._running or generation != self._generation
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.path)
+        position = 0
+        bgr = None
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: not self._running or self._ranges is not None)
+                    if not self._running:
+                        return
+                    ranges, self._ranges = self._ranges, None
+                    generation = self._generation
+
+                budget = self.cache.max_bytes
+                index = self.decoder.index if self.decoder else None
+                for start, end in ranges:
+                    for n in range(start, end + 1):
+                        if self._cancelled(generation) or budget <= 0:
+                            break
+                        if (self.path, n) in self.cache:
+                            continue
+                        if position != n:
+                            position, _ = move_capture(cap, position, n, index)
+                        frame, bgr = read_rgb(cap, bgr)
+                        if frame is None:
+                            break
+                        position += 1
+                        budget -= frame.nbytes
+                        self.cache.put((self.path, n), frame)
+                        self.prefetched += 1
+        finally:
+            cap.release()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
@@ -0,0 +1,22 @@
+"""
+Colores de los hitboxes, por índice, compartidos por VideoPlayer (QColor) y
+el render sin interfaz (cv2). Sin dependencias para no cargar cv2 ni Qt.
+"""
+
+HITBOX_RGB = [
+    (255, 0, 0),  # Rojo
+    (0, 255, 0),  # Verde
+    (0, 100, 255),  # Azul
+    (255, 255, 0),  # Amarillo
+    (255, 0, 255),  # Magenta
+    (0, 255, 255),  # Cian
+    (255, 128, 0),  # Naranja
+    (128, 0, 255),  # Púrpura
+    (255, 192, 203),  # Rosa
+    (0, 255, 128),  # Verde menta
+    (255, 64, 64),  # Rojo claro
+    (64, 255, 64),  # Verde claro
+    (64, 64, 255),  # Azul claro
+    (255, 215, 0),  # Dorado
+    (255, 99, 71),  # Tomate
+]
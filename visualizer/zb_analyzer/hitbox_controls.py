@@ -1,4 +1,5 @@
 from PySide6.QtWidgets import (
+    QCheckBox,
     QHBoxLayout,
     QLabel,
     QPushButton,
@@ -17,6 +18,7 @@ class HitboxControlsPanel(QWidget):
         self.offset_y_spin = None
         self.select_all_btn = None
         self.deselect_all_btn = None
+        self.auto_hitboxes_check = None
         self._create_layout()
 
     def _create_layout(self):
@@ -30,6 +32,13 @@ class HitboxControlsPanel(QWidget):
         offset_layout = self._create_offset_controls()
         layout.addLayout(offset_layout)
 
+        # hitboxes del frame actual de cualquier escena, en vez de los marcados
+        self.auto_hitboxes_check = QCheckBox("Hitboxes del frame actual (todas las escenas)")
+        self.auto_hitboxes_check.setToolTip(
+            "Pinta los hitboxes que se pueden disparar en cada frame según el JSON del parser"
+        )
+        layout.addWidget(self.auto_hitboxes_check)
+
         self.setLayout(layout)
 
     def _create_select_buttons(self):
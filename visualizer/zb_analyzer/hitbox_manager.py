@@ -105,6 +105,7 @@ Alto: {alto} px"""
         """Aplica el offset global a todos los hitboxes"""
         self.current_offset_x = offset_x
         self.current_offset_y = offset_y
+        self.video_widget.set_hitbox_offset(offset_x, offset_y)
 
         # Actualizar coordenadas
         for i, (_, hb) in enumerate(self.checkboxes):
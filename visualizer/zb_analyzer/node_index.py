@@ -0,0 +1,149 @@
+"""
+Índice frame → nodos activos, sobre todos los chunks y spare chunks del JSON
+del parser (test_python/parser.py).
+
+Cada nodo aporta dos intervalos de frames: el de su secuencia
+(ptr_frame_start..ptr_frame_end) y, si tiene hitboxes, la ventana en la que
+se puede disparar (ptr_frame_hitbox_start..ptr_frame_hitbox_end). Los
+extremos de todos los intervalos cortan el vídeo en segmentos en los que no
+cambia nada; cada segmento guarda la tupla de nodos activos, así que una
+consulta es un bisect sobre la lista de cortes.
+
+SceneDataLoader lo construye con el mismo JSON que ya ha leído para las
+escenas, y los nodos se guardan con ellas en la caché de escenas.
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+
+# scenes: ids de los chunks en los que aparece el nodo (vacío si solo está en spare_chunks)
+NodeEntry = namedtuple(
+    "NodeEntry", "offset scenes frame_from frame_to hit_from hit_to hitboxes sequences"
+)
+
+
+class IntervalIndex:
+    """segmentos elementales de un conjunto de intervalos cerrados de frames"""
+
+    def __init__(self, intervals):
+        """intervals: lista de (desde, hasta, valor), extremos incluidos"""
+        cuts = sorted({a for a, _, _ in intervals} | {b + 1 for _, b, _ in intervals})
+        self.bounds = cuts  # segmento i: frames [bounds[i], bounds[i + 1])
+        active = [[] for _ in range(max(len(cuts) - 1, 0))]
+        for a, b, value in intervals:
+            for i in range(bisect_right(cuts, a) - 1, bisect_right(cuts, b)):
+                active[i].append(value)
+        self.active = [tuple(values) for values in active]
+
+    def segment(self, frame):
+        """segmento que contiene el frame, o -1 si no hay ningún intervalo"""
+        i = bisect_right(self.bounds, frame) - 1
+        return i if 0 <= i < len(self.active) else -1
+
+    def at(self, frame):
+        """valores de los intervalos que contienen el frame"""
+        i = self.segment(frame)
+        return self.active[i] if i >= 0 else ()
+
+
+def _frame(ptr):
+    """número de frame de un puntero formateado por el parser, o None"""
+    try:
+        return int(ptr[2])
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _pointer(value):
+    """offset o puntero del JSON: '0x...' en pretty, entero en compact"""
+    return value if isinstance(value, int) else int(value, 16)
+
+
+def _hitboxes(value):
+    return [
+        {
+            "x0": hb["hitbox"]["x0"],
+            "y0": hb["hitbox"]["y0"],
+            "x1": hb["hitbox"]["x1"],
+            "y1": hb["hitbox"]["y1"],
+            "points": hb["hitbox"]["score"],
+        }
+        for hb in value.get("lista_hitboxes", [])
+    ]
+
+
+class NodeIndex:
+    """nodos activos y hitboxes disparables en cada frame del vídeo"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.spans = IntervalIndex(
+            [(n.frame_from, n.frame_to, n) for n in nodes if n.frame_from is not None]
+        )
+        self.windows = IntervalIndex(
+            [(n.hit_from, n.hit_to, n) for n in nodes if n.hitboxes and n.hit_from is not None]
+        )
+        self._hitboxes_by_segment = {}
+        self.build_seconds = None
+
+    @classmethod
+    def from_parser_json(cls, data):
+        """a partir del JSON del parser ya cargado (dict con chunks y spare_chunks)"""
+        by_offset = {}
+        scene_nodes = [(chunk.get("id"), chunk.get("nodes", [])) for chunk in data.get("chunks", [])]
+        scene_nodes.append((None, data.get("spare_chunks", [])))
+        for scene_id, nodes in scene_nodes:
+            for node in nodes:
+                value = node.get("value", {})
+                if "ptr_frame_start" not in value:
+                    continue  # nodo de muerte: sin frames
+                offset = _pointer(node["file_offset"])
+                entry = by_offset.get(offset)
+                if entry is None:
+                    frame_from = _frame(value["ptr_frame_start"])
+                    frame_to = _frame(value["ptr_frame_end"])
+                    hit_from = _frame(value["ptr_frame_hitbox_start"])
+                    hit_to = _frame(value["ptr_frame_hitbox_end"])
+                    if frame_from is None or frame_to is None or frame_from > frame_to:
+                        frame_from = frame_to = None
+                    if hit_from is None or hit_to is None or hit_from > hit_to:
+                        hit_from = hit_to = None
+                    entry = by_offset[offset] = NodeEntry(
+                        offset, [], frame_from, frame_to, hit_from, hit_to,
+                        _hitboxes(value), [_pointer(p) for p in value.get("sequences", [])],
+                    )
+                if scene_id is not None and scene_id not in entry.scenes:
+                    entry.scenes.append(scene_id)
+        return cls(
+            [by_offset[offset]._replace(scenes=tuple(by_offset[offset].scenes)) for offset in sorted(by_offset)]
+        )
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def nodes_at(self, frame):
+        """nodos cuya secuencia incluye el frame"""
+        return self.spans.at(frame)
+
+    def hitbox_nodes_at(self, frame):
+        """nodos cuyos hitboxes se pueden disparar en el frame"""
+        return self.windows.at(frame)
+
+    def hitboxes_at(self, frame):
+        """
+        hitboxes disparables en el frame como en set_hitboxes, con color_index
+        según la posición del hitbox en su nodo
+
+        se memoriza por segmento: en frames del mismo segmento se devuelve la
+        misma tupla
+        """
+        segment = self.windows.segment(frame)
+        boxes = self._hitboxes_by_segment.get(segment)
+        if boxes is None:
+            boxes = self._hitboxes_by_segment[segment] = tuple(
+                {**hb, "color_index": k, "node": node.offset}
+                for node in self.windows.at(frame)
+                for k, hb in enumerate(node.hitboxes)
+            )
+        return boxes
+
@@ -0,0 +1,259 @@
+"""
+Render sin interfaz de los hitboxes de todas las escenas sobre el vídeo.
+
+Los rangos de frames de las escenas se agrupan en tramos contiguos; cada
+tramo lo procesa un proceso del pool leyendo el vídeo hacia delante una sola
+vez. Los hitboxes se dibujan con la misma escala y colores que VideoPlayer
+(sin Qt, con cv2), y por escena se escribe una hoja de contactos o un vídeo.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from .hitbox_colors import HITBOX_RGB
+
+# escala fija para Amiga 68k (320x256 → 720x576), como VideoPlayer
+AMIGA_SIZE = (320, 256)
+DISPLAY_SIZE = (720, 576)
+HITBOX_PEN = 3
+
+# los tramos más largos se parten para repartirlos entre procesos (un salto más por corte)
+SPAN_FRAMES = 500
+THUMB_SIZE = (180, 144)
+SHEET_COLUMNS = 8
+VIDEO_FOURCC = "MJPG"
+VIDEO_FPS = 25
+
+
+# un rango from–to de una escena y sus hitboxes (x0, y0, x1, y1, color)
+RangeJob = namedtuple("RangeJob", "scene index start end hitboxes")
+# tramo contiguo de frames que procesa un proceso del pool
+SpanTask = namedtuple("SpanTask", "video_path start end ranges mode out_dir")
+
+
+def fit_frame(frame):
+    """escalar el frame al tamaño de pantalla como VideoPlayer; devuelve (frame, escala)"""
+    h, w = frame.shape[:2]
+    scale = min(DISPLAY_SIZE[0] / w, DISPLAY_SIZE[1] / h)
+    size = (round(w * scale), round(h * scale))
+    if size != (w, h):
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_NEAREST)
+    return frame, size[0] / w
+
+
+def draw_hitboxes(frame, hitboxes, view_scale=1.0):
+    """dibujar hitboxes (coordenadas Amiga) sobre un frame BGR de pantalla"""
+    scale_x = DISPLAY_SIZE[0] / AMIGA_SIZE[0] * view_scale
+    scale_y = DISPLAY_SIZE[1] / AMIGA_SIZE[1] * view_scale
+    for x0, y0, x1, y1, color_idx in hitboxes:
+        r, g, b = HITBOX_RGB[color_idx % len(HITBOX_RGB)]
+        # mismo redondeo que el QRect(x, y, ancho, alto) de VideoPlayer
+        x, y = int(x0 * scale_x), int(y0 * scale_y)
+        w, h = int((x1 - x0) * scale_x), int((y1 - y0) * scale_y)
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (b, g, r), HITBOX_PEN)
+    return frame
+
+
+def scene_ranges(scenes, offset_x=0, offset_y=0):
+    """RangeJob de todas las escenas de SceneDataLoader, con el offset global de hitboxes"""
+    jobs = []
+    for scene_idx, scene in enumerate(scenes):
+        hitboxes = tuple(
+            (hb["x0"] + offset_x, hb["y0"] + offset_y, hb["x1"] + offset_x, hb["y1"] + offset_y, i)
+            for i, hb in enumerate(scene["hitboxes"])
+        )
+        for range_idx, fr in enumerate(scene["frames"]):
+            if fr["to"] >= fr["from"] >= 0:
+                jobs.append(RangeJob(scene_idx, range_idx, fr["from"], fr["to"], hitboxes))
+    return jobs
+
+
+def group_spans(jobs, max_frames=SPAN_FRAMES):
+    """
+    agrupar los rangos que se solapan o se tocan en tramos contiguos
+
+    los tramos de más de max_frames se parten; cada trozo lleva los rangos
+    que lo cruzan. Devuelve una lista de (inicio, fin, rangos)
+    """
+    merged = []
+    for job in sorted(jobs, key=lambda j: (j.start, j.end)):
+        if merged and job.start <= merged[-1][1] + 1:
+            start, end, members = merged[-1]
+            merged[-1] = (start, max(end, job.end), members + [job])
+        else:
+            merged.append((job.start, job.end, [job]))
+
+    spans = []
+    for start, end, members in merged:
+        for cut in range(start, end + 1, max_frames):
+            cut_end = min(cut + max_frames - 1, end)
+            spans.append((cut, cut_end, [j for j in members if j.start <= cut_end and j.end >= cut]))
+    return spans
+
+
+def _thumb_frames(job):
+    """frames de un rango que van a la hoja de contactos"""
+    count = job.end - job.start + 1
+    if count <= SHEET_COLUMNS:
+        return set(range(job.start, job.end + 1))
+    step = (count - 1) / (SHEET_COLUMNS - 1)
+    return {job.start + round(i * step) for i in range(SHEET_COLUMNS)}
+
+
+def _open_writer(path, frame):
+    h, w = frame.shape[:2]
+    return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*VIDEO_FOURCC), VIDEO_FPS, (w, h))
+
+
+def render_span(task):
+    """
+    leer un tramo del vídeo hacia delante y dibujar los hitboxes de sus rangos
+
+    devuelve {(escena, rango): [(frame, miniatura)]} en modo hoja, o
+    {(escena, rango): [(primer frame, ruta del segmento)]} en modo vídeo
+    """
+    sheet = task.mode == "sheet"
+    wanted = {(job.scene, job.index): _thumb_frames(job) for job in task.ranges} if sheet else None
+    results = {}
+    writers = {}
+    cap = cv2.VideoCapture(task.video_path)
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, task.start)
+        bgr = None
+        for frame_number in range(task.start, task.end + 1):
+            jobs = [
+                job
+                for job in task.ranges
+                if job.start <= frame_number <= job.end
+                and (not sheet or frame_number in wanted[(job.scene, job.index)])
+            ]
+            if not jobs:
+                # hoja de contactos: el frame solo se decodifica, sin copiarlo
+                if not cap.grab():
+                    break
+                continue
+            ret, bgr = cap.read(bgr)
+            if not ret:
+                break
+            screen, view_scale = fit_frame(bgr)
+            for job in jobs:
+                key = (job.scene, job.index)
+                out = draw_hitboxes(screen.copy(), job.hitboxes, view_scale)
+                if sheet:
+                    thumb = cv2.resize(out, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+                    results.setdefault(key, []).append((frame_number, thumb))
+                    continue
+                if key not in writers:
+                    path = os.path.join(
+                        task.out_dir, f".scene_{job.scene:03d}_{job.index:03d}_{frame_number:06d}.avi"
+                    )
+                    writers[key] = _open_writer(path, out)
+                    results[key] = [(frame_number, path)]
+                writers[key].write(out)
+    finally:
+        cap.release()
+        for writer in writers.values():
+            writer.release()
+    return results
+
+
+def build_sheet(rows):
+    """hoja de contactos: una fila por rango, con su etiqueta"""
+    tw, th = THUMB_SIZE
+    label_h = 24
+    sheet = np.zeros((len(rows) * (th + label_h), SHEET_COLUMNS * tw, 3), np.uint8)
+    for r, (label, thumbs) in enumerate(rows):
+        y = r * (th + label_h)
+        cv2.putText(
+            sheet, label, (4, y + 17),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA,
+        )
+        for c, (frame_number, thumb) in enumerate(thumbs[:SHEET_COLUMNS]):
+            x = c * tw
+            sheet[y + label_h : y + label_h + th, x : x + tw] = thumb
+            cv2.putText(
+                sheet, str(frame_number), (x + 4, y + label_h + th - 6),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1, cv2.LINE_AA,
+            )
+    return sheet
+
+
+def concat_segments(paths, out_path):
+    """
+    juntar segmentos MJPG en un único vídeo, en orden
+
+    se copian los paquetes ya comprimidos (modo raw de FFmpeg), sin volver a
+    decodificar ni codificar
+    """
+    writer = None
+    for path in paths:
+        cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        if writer is None:
+            size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            writer = cv2.VideoWriter(
+                out_path, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*VIDEO_FOURCC), VIDEO_FPS, size,
+                [cv2.VIDEOWRITER_PROP_RAW_VIDEO, 1],
+            )
+        while True:
+            ret, packet = cap.read()
+            if not ret:
+                break
+            writer.write(packet)
+        cap.release()
+        os.remove(path)
+    if writer is not None:
+        writer.release()
+
+
+def render_scenes(video_path, scenes, out_dir, mode="sheet", jobs=None, offset_x=0, offset_y=0):
+    """
+    renderizar los hitboxes de todas las escenas
+
+    devuelve la lista de archivos escritos (uno por escena)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    spans = group_spans(scene_ranges(scenes, offset_x, offset_y))
+    # los tramos grandes primero, para repartir mejor el trabajo
+    spans.sort(key=lambda s: s[1] - s[0], reverse=True)
+    tasks = [
+        SpanTask(video_path, start, end, tuple(members), mode, out_dir)
+        for start, end, members in spans
+    ]
+
+    results = {}
+    if jobs == 1:
+        parts = map(render_span, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        parts = pool.map(render_span, tasks)
+    try:
+        for part in parts:
+            for key, items in part.items():
+                results.setdefault(key, []).extend(items)
+    finally:
+        if jobs != 1:
+            pool.shutdown()
+
+    written = []
+    for scene_idx, scene in enumerate(scenes):
+        keys = sorted(k for k in results if k[0] == scene_idx)
+        if not keys:
+            continue
+        name = f"scene_{scene_idx:03d}_{scene['offset']}"
+        if mode == "sheet":
+            rows = []
+            for key in keys:
+                fr = scene["frames"][key[1]]
+                thumbs = sorted(results[key], key=lambda t: t[0])
+                rows.append((f"#{key[1] + 1}: {fr['from']}-{fr['to']}", thumbs))
+            path = os.path.join(out_dir, f"{name}.png")
+            cv2.imwrite(path, build_sheet(rows))
+        else:
+            path = os.path.join(out_dir, f"{name}.avi")
+            concat_segments([p for key in keys for _, p in sorted(results[key])], path)
+        written.append(path)
+    return written
@@ -0,0 +1,70 @@
+"""
+Reloj de reproducción basado en time.perf_counter.
+
+El frame que toca mostrar se calcula a partir del tiempo transcurrido desde
+el último punto de anclaje (inicio, salto, cambio de velocidad), no contando
+ticks del temporizador: si un tick llega tarde, el siguiente lo compensa
+saltándose frames en vez de acumular retraso.
+"""
+
+import time
+
+DEFAULT_FPS = 25.0  # PAL
+SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0)
+
+
+class PlaybackClock:
+    """cuántos frames deberían haberse mostrado y con cuánto retraso"""
+
+    def __init__(self, fps=DEFAULT_FPS, speed=1.0):
+        self.fps = fps if fps > 0 else DEFAULT_FPS
+        self.speed = speed
+        self._t0 = time.perf_counter()
+        self.presented = 0  # frames mostrados desde el anclaje
+        # estadísticas de suavidad (en ms, respecto a la hora prevista)
+        self.drift_ms = 0.0
+        self.max_drift_ms = 0.0
+        self._drift_sum = 0.0
+        self._drift_count = 0
+
+    @property
+    def frame_period(self):
+        """segundos entre frames a la velocidad actual"""
+        return 1.0 / (self.fps * self.speed)
+
+    def reset(self):
+        """anclar el reloj: el frame mostrado ahora es el 0"""
+        self._t0 = time.perf_counter()
+        self.presented = 0
+
+    def set_speed(self, speed):
+        """cambiar la velocidad sin saltos: se reancla en el frame actual"""
+        self.speed = speed
+        self.reset()
+
+    def frames_due(self):
+        """frames que habría que avanzar ahora para ir a tiempo (0 si vamos adelantados)"""
+        due = int((time.perf_counter() - self._t0) / self.frame_period)
+        return max(0, due - self.presented)
+
+    def advance(self, frames):
+        """registrar que se han avanzado frames y medir el retraso del mostrado"""
+        self.presented += frames
+        drift = (time.perf_counter() - self._t0 - self.presented * self.frame_period) * 1000
+        self.drift_ms = drift
+        self.max_drift_ms = max(self.max_drift_ms, drift)
+        self._drift_sum += drift
+        self._drift_count += 1
+
+    def ms_until_next(self):
+        """ms hasta la hora del siguiente frame"""
+        next_time = self._t0 + (self.presented + 1) * self.frame_period
+        return max(0, round((next_time - time.perf_counter()) * 1000))
+
+    @property
+    def mean_drift_ms(self):
+        return self._drift_sum / self._drift_count if self._drift_count else 0.0
+
+    def reset_stats(self):
+        self.drift_ms = self.max_drift_ms = self._drift_sum = 0.0
+        self._drift_count = 0
@@ -1,5 +1,14 @@
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QWidget
+from PySide6.QtWidgets import (
+    QComboBox,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from .playback_clock import SPEEDS
 
 
 class PlaybackControls(QWidget):
@@ -12,6 +21,10 @@ class PlaybackControls(QWidget):
         self.prev_btn = QPushButton("Frame anterior")
         self.next_btn = QPushButton("Frame posterior")
         self.frame_label = QLabel("Frame: 0")
+        self.speed_combo = QComboBox()
+        self.speed_combo.addItems([f"{speed:g}x" for speed in SPEEDS])
+        self.speed_combo.setCurrentIndex(SPEEDS.index(1.0))
+        self.speed_combo.setToolTip("Velocidad de reproducción")
 
         self._create_layout()
 
@@ -20,6 +33,7 @@ class PlaybackControls(QWidget):
         controls_layout.addWidget(self.prev_btn)
         controls_layout.addWidget(self.play_pause_btn)
         controls_layout.addWidget(self.next_btn)
+        controls_layout.addWidget(self.speed_combo)
 
         frame_layout = QHBoxLayout()
         frame_layout.addWidget(self.frame_label)
@@ -31,10 +45,12 @@ class PlaybackControls(QWidget):
 
         self.setLayout(main_layout)
 
-    def connect_signals(self, play_pause_callback, prev_callback, next_callback):
+    def connect_signals(self, play_pause_callback, prev_callback, next_callback, speed_callback=None):
         self.play_pause_btn.clicked.connect(play_pause_callback)
         self.prev_btn.clicked.connect(prev_callback)
         self.next_btn.clicked.connect(next_callback)
+        if speed_callback:
+            self.speed_combo.currentIndexChanged.connect(lambda i: speed_callback(SPEEDS[i]))
 
     def update_frame_label(self, frame_number):
         self.frame_label.setText(f"Frame: {frame_number}")
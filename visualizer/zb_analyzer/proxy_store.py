@@ -0,0 +1,156 @@
+"""
+Proxy del vídeo para navegar frame a frame sin decodificar.
+
+Se genera en una sola pasada secuencial sobre el vídeo original: cada frame
+se reduce a 320x256 (la resolución Amiga) en RGB y se escribe sin comprimir
+en un único archivo, <vídeo>.zbproxy, que luego se abre con np.memmap. Todos
+los frames ocupan lo mismo, así que la tabla de offsets es implícita:
+frame n en data_offset + n * frame_bytes.
+
+Ocupa ~240 KiB por frame (~8.8 GiB por hora de vídeo PAL).
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+PROXY_VERSION = 1
+PROXY_SUFFIX = ".zbproxy"
+FALLBACK_DIR = Path.home() / ".cache" / "zorton_reverse" / "proxy"
+PROXY_SIZE = (320, 256)  # ancho, alto
+MAGIC = b"ZBP1"
+HEADER = struct.Struct(">4sI")  # magic + longitud de la cabecera JSON
+DATA_OFFSET = 4096  # los frames empiezan alineados a página
+
+
+def _proxy_paths(video_path):
+    """junto al vídeo, o en la caché del usuario si ahí no se puede escribir"""
+    video_path = Path(video_path)
+    name = hashlib.sha256(str(video_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return [
+        video_path.with_name(video_path.name + PROXY_SUFFIX),
+        FALLBACK_DIR / f"{name}{PROXY_SUFFIX}",
+    ]
+
+
+def _stamp(video_path):
+    st = os.stat(video_path)
+    return {"version": PROXY_VERSION, "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        magic, header_len = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("proxy con formato desconocido")
+        return json.loads(f.read(header_len))
+
+
+class ProxyStore:
+    """frames del proxy, de solo lectura y mapeados en memoria"""
+
+    def __init__(self, path, frames):
+        self.path = path
+        self.frames = frames  # np.memmap (n, alto, ancho, 3) RGB
+        self.build_seconds = None
+
+    @property
+    def frame_count(self):
+        return len(self.frames)
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def frame(self, frame_number):
+        """frame RGB sin copiar (None fuera de rango)"""
+        if not 0 <= frame_number < len(self.frames):
+            return None
+        return self.frames[frame_number]
+
+    @classmethod
+    def open(cls, video_path):
+        """proxy ya generado y al día para este vídeo, o None"""
+        stamp = _stamp(video_path)
+        for path in _proxy_paths(video_path):
+            try:
+                header = _read_header(path)
+                if not all(header.get(k) == v for k, v in stamp.items()):
+                    continue
+                shape = (header["frame_count"], header["height"], header["width"], 3)
+                frames = np.memmap(path, dtype=np.uint8, mode="r", offset=DATA_OFFSET, shape=shape)
+                return cls(path, frames)
+            except (OSError, ValueError, KeyError):
+                continue
+        return None
+
+    @classmethod
+    def build(cls, video_path, progress=None):
+        """
+        generar el proxy en una pasada secuencial y abrirlo
+
+        progress(frames escritos, total estimado) se llama cada 100 frames
+        """
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            return None
+        estimated = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        stamp = _stamp(video_path)
+        width, height = PROXY_SIZE
+
+        for path in _proxy_paths(video_path):
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            except OSError:
+                continue
+            break
+        else:
+            cap.release()
+            print("Error: no hay dónde escribir el proxy")
+            return None
+
+        t0 = time.perf_counter()
+        count = 0
+        bgr = None
+        small = np.empty((height, width, 3), np.uint8)
+        rgb = np.empty_like(small)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.seek(DATA_OFFSET)
+                while True:
+                    ret, bgr = cap.read(bgr)
+                    if not ret:
+                        break
+                    cv2.resize(bgr, PROXY_SIZE, dst=small, interpolation=cv2.INTER_AREA)
+                    cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
+                    f.write(rgb.data)
+                    count += 1
+                    if progress and count % 100 == 0:
+                        progress(count, estimated)
+
+                # la cabecera va al final, cuando ya se sabe el número real de frames
+                header = {**stamp, "frame_count": count, "width": width, "height": height}
+                header_bytes = json.dumps(header).encode("utf-8")
+                if HEADER.size + len(header_bytes) > DATA_OFFSET:
+                    raise ValueError("cabecera del proxy demasiado grande")
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, len(header_bytes)) + header_bytes)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            cap.release()
+
+        proxy = cls.open(video_path)
+        if proxy:
+            proxy.build_seconds = time.perf_counter() - t0
+        return proxy
@@ -0,0 +1,263 @@
+"""
+Caché en disco de escenas ya procesadas por SceneDataLoader.
+
+La clave es el SHA-256 del JSON más la versión del cargador; cada entrada es
+un snapshot binario con las escenas y los nodos del índice de node_index
+guardados por columnas (array.array), para no tener que volver a leer el JSON.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+from .node_index import NodeEntry
+
+MAGIC = b"ZBS2"
+HEADER = struct.Struct(">4sI")  # magic + longitud de la cabecera JSON
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "zorton_reverse" / "scenes"
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+HITBOX_FIELDS = ("x0", "y0", "x1", "y1", "points")
+NODE_FRAME_FIELDS = ("frame_from", "frame_to", "hit_from", "hit_to")
+NO_FRAME = -1  # frame None en las columnas de nodos
+
+
+def pack_columns(columns, meta):
+    """columnas array y metadatos → snapshot binario"""
+    header = {
+        "byteorder": sys.byteorder,
+        "meta": meta,
+        "columns": [[name, col.typecode, col.itemsize, len(col)] for name, col in columns.items()],
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    parts = [HEADER.pack(MAGIC, len(header_bytes)), header_bytes]
+    parts += [col.tobytes() for col in columns.values()]
+    return b"".join(parts)
+
+
+def unpack_columns(blob):
+    """snapshot binario → (columnas, metadatos) (ValueError si no es válido)"""
+    if len(blob) < HEADER.size:
+        raise ValueError("snapshot truncado")
+    magic, header_len = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("snapshot con formato desconocido")
+    header = json.loads(blob[HEADER.size : HEADER.size + header_len])
+
+    columns = {}
+    pos = HEADER.size + header_len
+    for name, typecode, itemsize, length in header["columns"]:
+        col = array(typecode)
+        if col.itemsize != itemsize:
+            raise ValueError(f"columna {name}: tamaño de elemento distinto")
+        end = pos + itemsize * length
+        if end > len(blob):
+            raise ValueError("snapshot truncado")
+        col.frombytes(blob[pos:end])
+        if header["byteorder"] != sys.byteorder:
+            col.byteswap()
+        columns[name] = col
+        pos = end
+    return columns, header["meta"]
+
+
+def scenes_to_columns(scenes):
+    """escenas procesadas → (columnas, metadatos) para el almacén"""
+    columns = {
+        "hitbox_start": array("I", [0]),
+        "frame_start": array("I", [0]),
+        "frame_from": array("i"),
+        "frame_to": array("i"),
+    }
+    for field in HITBOX_FIELDS:
+        columns[field] = array("i")
+
+    for scene in scenes:
+        for hitbox in scene["hitboxes"]:
+            for field in HITBOX_FIELDS:
+                columns[field].append(hitbox[field])
+        columns["hitbox_start"].append(len(columns["x0"]))
+        for frame in scene["frames"]:
+            columns["frame_from"].append(frame["from"])
+            columns["frame_to"].append(frame["to"])
+        columns["frame_start"].append(len(columns["frame_from"]))
+
+    # id y offset pueden ser cadenas o enteros según el formato del JSON;
+    # el análisis del grafo, si lo hay, va como tercer elemento
+    meta = {
+        "scenes": [
+            [scene["id"], scene["offset"], scene["analysis"]] if scene.get("analysis")
+            else [scene["id"], scene["offset"]]
+            for scene in scenes
+        ]
+    }
+    return columns, meta
+
+
+def scenes_from_columns(columns, meta):
+    """(columnas, metadatos) del almacén → escenas procesadas"""
+    scenes = []
+    hb_start = columns["hitbox_start"]
+    fr_start = columns["frame_start"]
+    for i, entry in enumerate(meta["scenes"]):
+        scene_id, offset = entry[:2]
+        hitboxes = [
+            {field: columns[field][j] for field in HITBOX_FIELDS}
+            for j in range(hb_start[i], hb_start[i + 1])
+        ]
+        frames = [
+            {"from": columns["frame_from"][j], "to": columns["frame_to"][j]}
+            for j in range(fr_start[i], fr_start[i + 1])
+        ]
+        scene = {"id": scene_id, "offset": offset, "hitboxes": hitboxes, "frames": frames}
+        if len(entry) > 2:
+            scene["analysis"] = entry[2]
+        scenes.append(scene)
+    return scenes
+
+
+def nodes_to_columns(nodes, columns):
+    """añadir los NodeEntry del índice de nodos a las columnas"""
+    cols = {
+        "node_offset": array("I"),
+        "node_scene_start": array("I", [0]),
+        "node_scenes": array("i"),
+        "node_hitbox_start": array("I", [0]),
+        "node_sequence_start": array("I", [0]),
+        "node_sequences": array("I"),
+    }
+    for field in NODE_FRAME_FIELDS:
+        cols["node_" + field] = array("i")
+    for field in HITBOX_FIELDS:
+        cols["node_" + field] = array("i")
+
+    for node in nodes:
+        cols["node_offset"].append(node.offset)
+        for field in NODE_FRAME_FIELDS:
+            value = getattr(node, field)
+            cols["node_" + field].append(NO_FRAME if value is None else value)
+        cols["node_scenes"].extend(node.scenes)
+        cols["node_scene_start"].append(len(cols["node_scenes"]))
+        for hitbox in node.hitboxes:
+            for field in HITBOX_FIELDS:
+                cols["node_" + field].append(hitbox[field])
+        cols["node_hitbox_start"].append(len(cols["node_x0"]))
+        cols["node_sequences"].extend(node.sequences)
+        cols["node_sequence_start"].append(len(cols["node_sequences"]))
+
+    columns.update(cols)
+
+
+def nodes_from_columns(columns, meta):
+    """NodeEntry guardados por nodes_to_columns, o None si el snapshot no tiene nodos"""
+    if "node_offset" not in columns:
+        return None
+    nodes = []
+    scene_start = columns["node_scene_start"]
+    hb_start = columns["node_hitbox_start"]
+    seq_start = columns["node_sequence_start"]
+    for i in range(len(columns["node_offset"])):
+        frames = [columns["node_" + field][i] for field in NODE_FRAME_FIELDS]
+        hitboxes = [
+            {field: columns["node_" + field][j] for field in HITBOX_FIELDS}
+            for j in range(hb_start[i], hb_start[i + 1])
+        ]
+        nodes.append(
+            NodeEntry(
+                columns["node_offset"][i],
+                tuple(columns["node_scenes"][scene_start[i] : scene_start[i + 1]]),
+                *(None if value == NO_FRAME else value for value in frames),
+                hitboxes,
+                list(columns["node_sequences"][seq_start[i] : seq_start[i + 1]]),
+            )
+        )
+    return nodes
+
+
+class SceneCache:
+    """Directorio de snapshots de escenas con tamaño máximo"""
+
+    SUFFIX = ".zbs"
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, version=""):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, data):
+        """clave: SHA-256 del contenido y versión del cargador"""
+        return f"{hashlib.sha256(data).hexdigest()}-v{self.version}"
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def get(self, key):
+        """(escenas, nodos o None) guardados con esa clave, o None"""
+        path = self._path(key)
+        try:
+            snapshot = unpack_columns(path.read_bytes())
+            result = scenes_from_columns(*snapshot), nodes_from_columns(*snapshot)
+            os.utime(path)  # marca la entrada como usada para la expulsión
+        except FileNotFoundError:
+            result = None
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            # snapshot corrupto o de otro formato (o caché ilegible): se descarta
+            self.invalidate(key)
+            result = None
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key, scenes, nodes=None):
+        """
+        guardar escenas y, si los hay, los nodos del índice, y expulsar las
+        entradas menos usadas; si no se puede escribir la caché se sigue sin ella
+        """
+        columns, meta = scenes_to_columns(scenes)
+        if nodes is not None:
+            nodes_to_columns(nodes, columns)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pack_columns(columns, meta))
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._evict()
+        except OSError as e:
+            print(f"Caché de escenas: no se pudo guardar ({e})")
+
+    def invalidate(self, key):
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self):
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            path.unlink()
+
+    def _evict(self):
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            st = path.stat()
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
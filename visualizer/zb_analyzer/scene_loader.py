@@ -1,24 +1,173 @@
 import json
+import threading
+import time
 import traceback
 from itertools import chain
 
+from .node_index import NodeIndex
+from .scene_cache import SceneCache
+
+try:
+    # opcional: bastante más rápido que json con JSON grandes
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# subir al cambiar _process_scene_data; invalida la caché de escenas
+LOADER_VERSION = 4
+
+
+def attach_chunk_analysis(chunks, analysis):
+    """
+    copiar a cada chunk su resumen del análisis del grafo (parser.py
+    --analysis) como chunk["analysis"]
+    """
+    if not analysis:
+        return
+    summaries = {summary["id"]: summary for summary in analysis.get("chunks", [])}
+    for chunk in chunks:
+        summary = summaries.get(chunk.get("id"))
+        if summary is not None:
+            chunk["analysis"] = summary
+
+
+def scene_tags(analysis):
+    """etiquetas de una escena para el selector a partir de su análisis"""
+    if not analysis:
+        return []
+    tags = []
+    if analysis.get("scene_index") is not None:
+        tags.append(f"orden {analysis['scene_index']}")
+    if not analysis.get("reachable", True):
+        tags.append("inalcanzable")
+    elif analysis.get("unreachable_nodes"):
+        tags.append(f"{analysis['unreachable_nodes']} nodos inalcanzables")
+    if analysis.get("cyclic"):
+        tags.append("ciclo")
+    if analysis.get("death_edges"):
+        tags.append(f"☠ {analysis['death_edges']}")
+    return tags
+
+
+class LazySceneList:
+    """
+    escenas del JSON procesadas solo cuando se piden
+
+    headers (id, offset y análisis de cada escena) está disponible desde el
+    principio para el selector; cada escena se procesa al primer acceso y se memoriza
+
+    una escena que no se puede procesar queda vacía (sin hitboxes ni frames)
+    y su índice en failed
+    """
+
+    def __init__(self, raw_scenes, process):
+        self._raw = raw_scenes
+        self._process = process
+        self._scenes = {}
+        self.failed = set()
+        self.headers = [
+            {
+                "id": data.get("id", i),
+                "offset": data.get("file_offset", ""),
+                "analysis": data.get("analysis"),
+            }
+            for i, data in enumerate(raw_scenes)
+        ]
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._raw)
+        if not 0 <= index < len(self._raw):
+            raise IndexError(index)
+        scene = self._scenes.get(index)
+        if scene is None:
+            try:
+                scene = self._process(self._raw[index])
+            except Exception as e:
+                print(f"Error procesando la escena {index}: {e}")
+                traceback.print_exc()
+                self.failed.add(index)
+                header = self.headers[index]
+                scene = {"id": header["id"], "offset": header["offset"], "hitboxes": [], "frames": []}
+            self._scenes[index] = scene
+        return scene
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def materialized(self):
+        return len(self._scenes)
+
+
 class SceneDataLoader:
     """Cargador de datos de escenas desde archivo JSON"""
 
-    def __init__(self, json_path="zb.json"):
+    def __init__(self, json_path="zb.json", use_cache=True, lazy=False):
         self.json_path = json_path
         self.scenes = []
+        self.cache = SceneCache(version=str(LOADER_VERSION)) if use_cache else None
+        # lazy: índice de cabeceras y escenas procesadas bajo demanda
+        self.lazy = lazy
+        self._pending_key = None  # snapshot por guardar en modo lazy
+        # índice frame → nodos (node_index), solo con el JSON del parser
+        self.node_index = None
 
     def load_scenes(self):
         try:
-            with open(self.json_path, encoding="utf-8") as f:
-                data = json.load(f)
+            t0 = time.perf_counter()
+            with open(self.json_path, "rb") as f:
+                raw = f.read()
+
+            # escenas ya procesadas de este mismo JSON
+            if self.cache is not None:
+                key = self.cache.key(raw)
+                cached = self.cache.get(key)
+                elapsed = (time.perf_counter() - t0) * 1000
+                if cached is not None:
+                    self.scenes, nodes = cached
+                    print(f"Caché de escenas: acierto ({elapsed:.1f} ms)")
+                    self.node_index = self._node_index(nodes=nodes)
+                    print(f"Cargadas {len(self.scenes)} escenas del archivo JSON")
+                    return self.scenes
+                print(f"Caché de escenas: fallo ({elapsed:.1f} ms)")
+
+            data = json_loads(raw)
+            self.node_index = self._node_index(data=data)
+
+            # salida completa de test_python/parser.py: nos quedamos con los chunks
+            if isinstance(data, dict):
+                chunks = data.get("chunks", [])
+                attach_chunk_analysis(chunks, data.get("analysis"))
+                data = chunks
+
+            if self.lazy:
+                # el formato se comprueba ya: con un JSON antiguo se usan las
+                # escenas de ejemplo, como al procesarlas todas
+                if not all(isinstance(scene_data, dict) and "nodes" in scene_data for scene_data in data):
+                    raise ValueError("las escenas no tienen el formato del parser (falta 'nodes')")
+                # el snapshot necesita todas las escenas: se guarda más tarde con save_cache
+                self.scenes = LazySceneList(data, self._process_scene_data)
+                self._pending_key = key if self.cache is not None else None
+                elapsed = (time.perf_counter() - t0) * 1000
+                print(f"Índice de {len(self.scenes)} escenas en {elapsed:.1f} ms")
+                return self.scenes
 
             self.scenes = []
             for scene_data in data:
                 scene = self._process_scene_data(scene_data)
                 self.scenes.append(scene)
 
+            if self.cache is not None:
+                self.cache.put(key, self.scenes, self._index_nodes())
+                elapsed = (time.perf_counter() - t0) * 1000
+                print(f"Escenas procesadas y guardadas en caché en {elapsed:.1f} ms")
+
             print(f"Cargadas {len(self.scenes)} escenas del archivo JSON")
             return self.scenes
 
@@ -26,7 +175,37 @@ class SceneDataLoader:
             print(f"Error cargando JSON: {e}")
 
             traceback.print_exc()
-            return self._get_default_scenes()
+            self.scenes = self._get_default_scenes()
+            return self.scenes
+
+    def _node_index(self, data=None, nodes=None):
+        """
+        índice de nodos a partir del JSON ya cargado (data) o de los nodos de
+        la caché; None si el JSON no es del parser o falla
+        """
+        try:
+            t0 = time.perf_counter()
+            if nodes is not None:
+                index = NodeIndex(nodes)
+            elif isinstance(data, dict) and "chunks" in data:
+                index = NodeIndex.from_parser_json(data)
+            else:
+                print("Índice de nodos: el JSON no es del parser, sin hitboxes automáticos")
+                return None
+            index.build_seconds = time.perf_counter() - t0
+            print(
+                f"Índice de nodos: {len(index)} nodos, {len(index.spans.active)} + "
+                f"{len(index.windows.active)} segmentos en {index.build_seconds * 1000:.1f} ms"
+            )
+            return index
+        except Exception as e:
+            print(f"Error creando el índice de nodos: {e}")
+            traceback.print_exc()
+            return None
+
+    def _index_nodes(self):
+        """nodos del índice para guardarlos con las escenas"""
+        return self.node_index.nodes if self.node_index is not None else None
 
     def _process_scene_data_v0(self, scene_data):
         scene = {
@@ -65,7 +244,7 @@ class SceneDataLoader:
             "frames": [],
         }
 
-        hitboxes_bad = [ x["value"]["ptr_hitbox"] for x in scene_data["nodes"] if len(x["value"]["ptr_hitbox"])>0 ]
+        hitboxes_bad = [ self._node_hitboxes(x) for x in scene_data["nodes"] ]
         hitboxes = list(chain.from_iterable(hitboxes_bad))
         for hit in hitboxes:
             rect = hit["hitbox"]
@@ -88,8 +267,19 @@ class SceneDataLoader:
                     {"from": int(frame[0]), "to": int(frame[1])}
                 )
 
+        if scene_data.get("analysis"):
+            scene["analysis"] = scene_data["analysis"]
+
         return scene
 
+    def _node_hitboxes(self, node):
+        """hitboxes de un nodo: 'lista_hitboxes' en la salida actual del parser, 'ptr_hitbox' en la antigua"""
+        value = node.get("value", {})
+        if "lista_hitboxes" in value:
+            return value["lista_hitboxes"]
+        hitboxes = value.get("ptr_hitbox", [])
+        return hitboxes if isinstance(hitboxes, list) else []
+
     def _get_default_scenes(self):
         """datos de ejemplo si falla la carga"""
         return [
@@ -106,3 +296,38 @@ class SceneDataLoader:
 
     def get_scenes(self):
         return self.scenes
+
+    def save_cache(self):
+        """
+        en modo lazy, procesar las escenas que falten y guardar el snapshot
+
+        no guarda nada si alguna escena no se ha podido procesar
+        """
+        key, self._pending_key = self._pending_key, None
+        if key is None:
+            return
+        try:
+            t0 = time.perf_counter()
+            scenes = list(self.scenes)
+            if self.scenes.failed:
+                print(f"Caché de escenas: {len(self.scenes.failed)} escenas con errores, no se guarda")
+                return
+            self.cache.put(key, scenes, self._index_nodes())
+            print(f"Escenas guardadas en caché en {(time.perf_counter() - t0) * 1000:.1f} ms")
+        except Exception as e:
+            print(f"Error guardando la caché de escenas: {e}")
+            traceback.print_exc()
+
+    def save_cache_in_background(self):
+        """save_cache en un hilo aparte, para no procesar las escenas en el hilo de Qt"""
+        if self._pending_key is not None:
+            threading.Thread(target=self.save_cache, name="SceneCacheSave").start()
+
+    def get_scene_headers(self):
+        """id, offset y análisis (o None) de cada escena, sin procesarlas"""
+        if isinstance(self.scenes, LazySceneList):
+            return self.scenes.headers
+        return [
+            {"id": scene["id"], "offset": scene["offset"], "analysis": scene.get("analysis")}
+            for scene in self.scenes
+        ]
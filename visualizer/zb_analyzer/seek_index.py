@@ -0,0 +1,114 @@
+"""
+Índice de keyframes de un vídeo para decidir cómo llegar a un frame.
+
+Se construye una vez recorriendo los paquetes sin decodificarlos (modo raw de
+OpenCV/FFmpeg) y se guarda junto al vídeo como <vídeo>.zbidx; si el
+directorio del vídeo no admite escritura, en la caché del usuario.
+"""
+
+import hashlib
+import json
+import os
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+import cv2
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".zbidx"
+FALLBACK_DIR = Path.home() / ".cache" / "zorton_reverse" / "seek"
+# coste aproximado de un cap.set en frames decodificados (medido con AVIs PAL)
+SEEK_COST_FRAMES = 25
+
+
+class SeekIndex:
+    """keyframes y número real de frames de un vídeo"""
+
+    def __init__(self, frame_count, keyframes):
+        self.frame_count = frame_count
+        self.keyframes = keyframes
+
+    @staticmethod
+    def _index_paths(video_path):
+        video_path = Path(video_path)
+        name = hashlib.sha256(str(video_path.resolve()).encode("utf-8")).hexdigest()[:16]
+        return [
+            video_path.with_name(video_path.name + INDEX_SUFFIX),
+            FALLBACK_DIR / f"{name}{INDEX_SUFFIX}",
+        ]
+
+    @staticmethod
+    def _stamp(video_path):
+        st = os.stat(video_path)
+        return {"version": INDEX_VERSION, "size": st.st_size, "mtime": st.st_mtime_ns}
+
+    @classmethod
+    def build(cls, video_path):
+        """recorre los paquetes del vídeo sin decodificarlos"""
+        cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        if not cap.isOpened():
+            return None
+        keyframes = []
+        count = 0
+        try:
+            while cap.grab():
+                if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                    keyframes.append(count)
+                count += 1
+        finally:
+            cap.release()
+        if not count:
+            return None
+        return cls(count, keyframes or [0])
+
+    @classmethod
+    def load_or_build(cls, video_path):
+        """índice guardado del vídeo, o construirlo y guardarlo"""
+        stamp = cls._stamp(video_path)
+        paths = cls._index_paths(video_path)
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if all(data.get(k) == v for k, v in stamp.items()):
+                    return cls(data["frame_count"], data["keyframes"])
+            except (OSError, ValueError, KeyError):
+                continue
+
+        t0 = time.perf_counter()
+        index = cls.build(video_path)
+        if index is None:
+            print("Error: no se pudo crear el índice de keyframes")
+            return None
+        print(
+            f"Índice de keyframes: {index.frame_count} frames, {len(index.keyframes)} keyframes "
+            f"({(time.perf_counter() - t0) * 1000:.0f} ms)"
+        )
+
+        data = {**stamp, "frame_count": index.frame_count, "keyframes": index.keyframes}
+        for path in paths:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                break
+            except OSError:
+                continue
+        return index
+
+    def keyframe_before(self, frame_number):
+        """keyframe más cercano en o antes de frame_number"""
+        i = bisect_right(self.keyframes, frame_number) - 1
+        return self.keyframes[max(i, 0)]
+
+    def read_forward(self, position, target):
+        """
+        si para llegar a target desde position conviene leer hacia delante
+        en vez de saltar: saltar decodifica igualmente desde el keyframe
+        anterior a target, más el coste del propio salto
+        """
+        distance = target - position
+        if distance < 0:
+            return False
+        return distance <= target - self.keyframe_before(target) + SEEK_COST_FRAMES
@@ -0,0 +1,53 @@
+"""
+Carga inicial en un hilo aparte: propiedades del vídeo, escenas del JSON e
+índice de nodos por frame (los dos de una sola lectura del JSON o de la
+caché de escenas), mientras el hilo de Qt muestra el progreso.
+
+Aquí se importa cv2 por primera vez, fuera del camino del diálogo de
+selección de archivos. El índice de keyframes no se espera: lo carga
+FrameDecoder en su propio hilo.
+"""
+
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+from .scene_loader import SceneDataLoader
+
+
+class StartupLoader(QThread):
+    """prepara lo necesario para MainWindow sin bloquear la interfaz"""
+
+    # porcentaje y texto del paso en curso
+    progress = Signal(int, str)
+
+    def __init__(self, video_path, json_path, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.json_path = json_path
+        self.video_props = None
+        self.scene_loader = None
+        self.node_index = None
+        self.timings = {}  # segundos por paso
+        self._last = None  # (paso en curso, inicio)
+
+    def _step(self, name, percent, text):
+        now = time.perf_counter()
+        if self._last is not None:
+            self.timings[self._last[0]] = now - self._last[1]
+        self._last = (name, now) if name else None
+        self.progress.emit(percent, text)
+
+    def run(self):
+        self._step("cv2", 0, "Cargando OpenCV…")
+        from .frame_decoder import probe_video
+
+        self._step("video", 40, "Abriendo vídeo…")
+        self.video_props = probe_video(self.video_path)
+
+        self._step("scenes", 60, "Cargando escenas…")
+        self.scene_loader = SceneDataLoader(self.json_path, lazy=True)
+        self.scene_loader.load_scenes()
+        self.node_index = self.scene_loader.node_index
+
+        self._step(None, 100, "Listo")
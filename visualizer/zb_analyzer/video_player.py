@@ -1,37 +1,56 @@
-import cv2
-from PySide6.QtCore import QRect, Qt, QTimer
-from PySide6.QtGui import QColor, QFont, QImage, QPainter, QPen, QPixmap
+from PySide6.QtCore import QRect, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QFont, QImage, QPainter, QPen
 from PySide6.QtWidgets import QLabel
 
+from .frame_cache import FrameCache
+from .hitbox_colors import HITBOX_RGB
+from .playback_clock import PlaybackClock
+
 
 class VideoPlayer(QLabel):
     """Widget para reproducir video y visualizar hitboxes"""
 
-    HITBOX_COLORS = [
-        QColor(255, 0, 0),  # Rojo
-        QColor(0, 255, 0),  # Verde
-        QColor(0, 100, 255),  # Azul
-        QColor(255, 255, 0),  # Amarillo
-        QColor(255, 0, 255),  # Magenta
-        QColor(0, 255, 255),  # Cian
-        QColor(255, 128, 0),  # Naranja
-        QColor(128, 0, 255),  # Púrpura
-        QColor(255, 192, 203),  # Rosa
-        QColor(0, 255, 128),  # Verde menta
-        QColor(255, 64, 64),  # Rojo claro
-        QColor(64, 255, 64),  # Verde claro
-        QColor(64, 64, 255),  # Azul claro
-        QColor(255, 215, 0),  # Dorado
-        QColor(255, 99, 71),  # Tomate
-    ]
-
-    def __init__(self):
+    HITBOX_COLORS = [QColor(*rgb) for rgb in HITBOX_RGB]
+
+    # número del frame mostrado, cada vez que cambia
+    frameChanged = Signal(int)
+
+    def __init__(self, cache_mb=None):
         super().__init__()
-        self.cap = None
+        self.video_props = None  # tamaño, fps y número de frames
+        self.decoder = None
+        self.prefetcher = None
+        # proxy 320x256 sin comprimir (ProxyStore) para saltos y pasos en pausa
+        self.proxy = None
+        self.playing = False
+        self._showing_proxy = False
+        self.frame_cache = FrameCache() if cache_mb is None else FrameCache(cache_mb)
+        # temporizador de un disparo, programado en cada tick para la hora
+        # del siguiente frame según el reloj
         self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.update_frame)
-        self.current_frame = None
-        self.hitboxes = []  # lista de (x0, y0, x1, y1, color_idx)
+        self.clock = PlaybackClock()
+        self.current_frame = None  # RGB, ya convertido por el decodificador
+        self.current_frame_number = 0
+        self.dropped_frames = 0  # saltados para no perder el ritmo
+        self.stalls = 0  # veces que el decodificador no llegó a tiempo
+        self._stalled = False
+        # frame listo para pintar; hitboxes y ratón se pintan encima en paintEvent.
+        # Si el frame ya tiene el tamaño de pantalla la QImage apunta a sus
+        # datos; si no, a un buffer persistente donde cv2 lo escala
+        self.base_image = None
+        self.view_scale = 1.0  # tamaño en pantalla / tamaño del frame
+        self._scaled_rgb = None
+        self.hitboxes = []  # lista de (x0, y0, x1, y1, color_idx) que se pinta
+        self.manual_hitboxes = []  # los marcados en la lista de la escena
+        # índice frame → nodos de todas las escenas (NodeIndex); con
+        # auto_hitboxes se pintan los hitboxes disparables en cada frame
+        self.node_index = None
+        self.auto_hitboxes = False
+        self.hitbox_offset = (0, 0)
+        self._auto_boxes = None  # tupla del índice que se está pintando
         # escala fija para Amiga 68k (320x256 → 720x576)
         self.amiga_width = 320
         self.amiga_height = 256
@@ -52,15 +71,29 @@ class VideoPlayer(QLabel):
         self.mouse_y = -1
         self.show_mouse_coords = False
 
-    def load_video(self, path):
-        """cargar archivo de video"""
+    def load_video(self, path, video_props=None):
+        """
+        cargar archivo de video
+
+        video_props, si ya las leyó otro hilo (StartupLoader), evita volver a
+        abrir el vídeo
+        """
+        # cv2 se importa al abrir el primer vídeo, no al arrancar la aplicación
+        from .frame_decoder import FrameDecoder, FramePrefetcher, probe_video
+        from .proxy_store import ProxyStore
+
+        self.release()
         self.video_path = path
-        self.cap = cv2.VideoCapture(path)
-        if self.cap.isOpened():
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            video_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            video_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            print(f"Video cargado: {video_width}x{video_height}")
+        self.video_props = video_props or probe_video(path)
+        if self.video_props:
+            self.total_frames = self.video_props["frame_count"]
+            self.clock = PlaybackClock(self.video_props["fps"], self.clock.speed)
+            self.decoder = FrameDecoder(path, cache=self.frame_cache)
+            self.prefetcher = FramePrefetcher(path, self.frame_cache, self.decoder)
+            self.proxy = ProxyStore.open(path)
+            print(f"Video cargado: {self.video_props['width']}x{self.video_props['height']}")
+            if self.proxy:
+                print(f"Proxy: {self.proxy.frame_count} frames ({self.proxy.path})")
             print(
                 f"Escala Amiga: {self.amiga_width}x{self.amiga_height} → Display: {self.display_width}x{self.display_height}"
             )
@@ -68,54 +101,162 @@ class VideoPlayer(QLabel):
         else:
             self.total_frames = 0
             print("Error: no se pudo abrir el video")
-        self.timer.start(40)  # ~25 FPS
+        self.play()
+
+    def release(self):
+        """parar el hilo de decodificación y cerrar el vídeo"""
+        self.timer.stop()
+        self.playing = False
+        if self.prefetcher:
+            self.prefetcher.close()
+            self.prefetcher = None
+        if self.decoder:
+            self.decoder.close()
+            self.decoder = None
+        self.proxy = None
 
     def update_frame(self):
-        """actualiza el frame actual del video"""
-        if not (self.cap and self.cap.isOpened()):
+        """
+        pinta el frame que toca según el reloj (el bucle lo gestiona el decodificador)
+
+        si el tick llega tarde se saltan los frames intermedios ya decodificados;
+        si el retraso supera el buffer, el decodificador salta directamente
+        """
+        if not self.decoder:
             return
 
-        current = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        due = self.clock.frames_due()
+        if not due:
+            self.timer.start(self.clock.ms_until_next())
+            return
 
-        # reiniciar bucle
-        if self.loop_enabled and current > self.loop_end:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.loop_start)
-            current = self.loop_start
+        item = None
+        taken = 0
+        while taken < due:
+            next_item = self.decoder.get()
+            if next_item is None:
+                break
+            item = next_item
+            taken += 1
+
+        if item is None:
+            if self.decoder.at_end:
+                return
+            # el decodificador no llegó a tiempo: se repite el frame anterior
+            if not self._stalled:
+                self.stalls += 1
+                self._stalled = True
+            self.timer.start(1)
+            return
+        self._stalled = False
+
+        self.dropped_frames += taken - 1
+        behind = due - taken
+        if behind > self.decoder.capacity:
+            self.decoder.seek(self._frame_after(item[0], behind), self._loop_range())
+            self.dropped_frames += behind
+            taken = due
+        self._show_item(item)
+        self.clock.advance(taken)
+        self.timer.start(self.clock.ms_until_next())
+
+    def _frame_after(self, frame_number, delta):
+        """frame delta posiciones después, dando la vuelta en el bucle"""
+        target = frame_number + delta
+        if self.loop_enabled and target > self.loop_end:
+            length = self.loop_end - self.loop_start + 1
+            target = self.loop_start + (target - self.loop_start) % length
+        return min(target, self.total_frames - 1)
+
+    def _show_next_decoded(self):
+        """esperar al primer frame tras un salto y mostrarlo"""
+        item = self.decoder.wait_frame()
+        if item is None:
+            return False
+        self._show_item(item)
+        # el reloj cuenta desde el frame mostrado tras el salto
+        self.clock.reset()
+        self._stalled = False
+        if self.timer.isActive():
+            self.timer.start(self.clock.ms_until_next())
+        return True
+
+    def _show_item(self, item, from_proxy=False):
+        """mostrar un (número, frame) del decodificador o del proxy y avisar del cambio"""
+        number, self.current_frame = item
+        self._showing_proxy = from_proxy
+        self._refresh_auto_hitboxes(number)
+        self.display_frame()
+        if number != self.current_frame_number:
+            self.current_frame_number = number
+            self.frameChanged.emit(number)
 
-        ret, frame = self.cap.read()
-        if ret:
-            self.current_frame = frame.copy()
-            self.display_frame()
-        else:
-            self.timer.stop()
+    def _fit_size(self, w, h):
+        """tamaño en pantalla del frame, manteniendo la proporción"""
+        scale = min(self.display_width / w, self.display_height / h)
+        return round(w * scale), round(h * scale)
 
     def display_frame(self):
-        """mostrar el frame actual con hitboxes y coordenadas del mouse"""
+        """preparar el frame actual para pintar (sin copias si no hay que escalar)"""
         if self.current_frame is None:
             return
-        frame = self.current_frame.copy()
-
-        # convertir BGR (OpenCV) → RGB (Qt)
-        # doc oficial de QT6
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb = self.current_frame
         h, w, ch = rgb.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qt_image)
-
-        painter = QPainter(pixmap)
-
-        self._draw_hitboxes(painter, pixmap)
-        self._draw_mouse_coords(painter, pixmap)
-
+        # tamaño y escala según el vídeo original, aunque el frame sea del proxy
+        if self.video_props:
+            src_w, src_h = self.video_props["width"], self.video_props["height"]
+        else:
+            src_w, src_h = w, h
+        out_w, out_h = self._fit_size(src_w, src_h)
+        if (out_w, out_h) != (w, h):
+            # un único escalado, en un buffer que se reutiliza entre frames
+            # (import local: cv2 ya está cargado, y así no se carga al arrancar)
+            from .frame_decoder import resize_rgb
+
+            rgb = resize_rgb(rgb, (out_w, out_h), dst=self._scaled_rgb)
+            self._scaled_rgb = rgb
+
+        # doc oficial de QT6; la QImage no copia: self.current_frame o
+        # self._scaled_rgb mantienen vivos los datos
+        old_size = self.base_image.size() if self.base_image is not None else None
+        self.base_image = QImage(rgb.data, out_w, out_h, ch * out_w, QImage.Format_RGB888)
+        self.view_scale = out_w / src_w
+        if self.base_image.size() != old_size:
+            self.updateGeometry()
+        self.update()
+
+    def _image_offset(self):
+        """esquina del frame dentro del widget (centrado)"""
+        x_offset = (self.width() - self.base_image.width()) // 2
+        y_offset = (self.height() - self.base_image.height()) // 2
+        return x_offset, y_offset
+
+    def paintEvent(self, event):
+        if self.base_image is None:
+            super().paintEvent(event)
+            return
+        painter = QPainter(self)
+        x_offset, y_offset = self._image_offset()
+        painter.translate(x_offset, y_offset)
+        painter.drawImage(0, 0, self.base_image)
+        self._draw_hitboxes(painter, self.base_image)
+        self._draw_mouse_coords(painter, self.base_image)
         painter.end()
 
-        self.setPixmap(
-            pixmap.scaled(self.display_width, self.display_height, Qt.KeepAspectRatio)
-        )
+    def sizeHint(self):
+        if self.base_image is None:
+            return super().sizeHint()
+        return self.base_image.size()
 
-    def _draw_hitboxes(self, painter, pixmap):
-        """dibujar hitboxes en el frame"""
+    def minimumSizeHint(self):
+        if self.base_image is None:
+            return super().minimumSizeHint()
+        return self.base_image.size()
+
+    def _draw_hitboxes(self, painter, image):
+        """dibujar hitboxes sobre el frame"""
+        scale_x = self.scale_x * self.view_scale
+        scale_y = self.scale_y * self.view_scale
         for hitbox_data in self.hitboxes:
             x0, y0, x1, y1, color_idx = hitbox_data
             color = self.HITBOX_COLORS[color_idx % len(self.HITBOX_COLORS)]
@@ -123,26 +264,26 @@ class VideoPlayer(QLabel):
             painter.setPen(pen)
 
             scaled_rect = QRect(
-                int(x0 * self.scale_x),
-                int(y0 * self.scale_y),
-                int((x1 - x0) * self.scale_x),
-                int((y1 - y0) * self.scale_y),
+                int(x0 * scale_x),
+                int(y0 * scale_y),
+                int((x1 - x0) * scale_x),
+                int((y1 - y0) * scale_y),
             )
             painter.drawRect(scaled_rect)
 
-    def _draw_mouse_coords(self, painter, pixmap):
+    def _draw_mouse_coords(self, painter, image):
         """dibujar coordenadas del mouse y una cruz de guía"""
         if not (self.show_mouse_coords and self.mouse_x >= 0 and self.mouse_y >= 0):
             return
 
-        video_x = int(self.mouse_x / self.scale_x)
-        video_y = int(self.mouse_y / self.scale_y)
+        video_x = int(self.mouse_x / (self.scale_x * self.view_scale))
+        video_y = int(self.mouse_y / (self.scale_y * self.view_scale))
 
         # doc oficial de QT6
         pen = QPen(QColor(255, 255, 0), 2)
         painter.setPen(pen)
-        painter.drawLine(0, self.mouse_y, pixmap.width(), self.mouse_y)
-        painter.drawLine(self.mouse_x, 0, self.mouse_x, pixmap.height())
+        painter.drawLine(0, self.mouse_y, image.width(), self.mouse_y)
+        painter.drawLine(self.mouse_x, 0, self.mouse_x, image.height())
 
         font = QFont()
         font.setPointSize(12)
@@ -154,7 +295,7 @@ class VideoPlayer(QLabel):
         text_x = self.mouse_x + 10
         text_y = self.mouse_y - 10
 
-        if text_x + text_rect.width() > pixmap.width():
+        if text_x + text_rect.width() > image.width():
             text_x = self.mouse_x - text_rect.width() - 10
         if text_y - text_rect.height() < 0:
             text_y = self.mouse_y + 20
@@ -173,51 +314,91 @@ class VideoPlayer(QLabel):
 
     def set_hitboxes(self, boxes):
         """establecer hitboxes a mostrar"""
-        self.hitboxes = [
+        self.manual_hitboxes = [
             (b["x0"], b["y0"], b["x1"], b["y1"], b.get("color_index", 0)) for b in boxes
         ]
-        if self.current_frame is not None:
-            self.display_frame()
+        if not self.auto_hitboxes:
+            self.hitboxes = self.manual_hitboxes
+            self.update()
+
+    def set_hitbox_offset(self, offset_x, offset_y):
+        """offset de los hitboxes automáticos (los manuales ya lo traen aplicado)"""
+        self.hitbox_offset = (offset_x, offset_y)
+        self._auto_boxes = None
+        self._refresh_auto_hitboxes(self.current_frame_number)
+
+    def set_auto_hitboxes(self, enabled):
+        """pintar los hitboxes disparables en cada frame según node_index, o los marcados"""
+        self.auto_hitboxes = enabled
+        self._auto_boxes = None
+        if enabled:
+            self._refresh_auto_hitboxes(self.current_frame_number)
+        else:
+            self.hitboxes = self.manual_hitboxes
+            self.update()
+
+    def _refresh_auto_hitboxes(self, frame_number):
+        """hitboxes del frame según el índice; solo se rehacen al cambiar de segmento"""
+        if not (self.auto_hitboxes and self.node_index):
+            return
+        boxes = self.node_index.hitboxes_at(frame_number)
+        if boxes is self._auto_boxes:
+            return
+        self._auto_boxes = boxes
+        dx, dy = self.hitbox_offset
+        self.hitboxes = [
+            (b["x0"] + dx, b["y0"] + dy, b["x1"] + dx, b["y1"] + dy, b["color_index"]) for b in boxes
+        ]
+        self.update()
 
     def pause(self):
         """pauser la reproducción"""
+        self.playing = False
         self.timer.stop()
 
     def play(self):
-        if self.cap:
-            self.timer.start(40)
-
-    # TODO: refactorizar seek_frame y goto_frame
+        if self.decoder:
+            self.playing = True
+            if self._showing_proxy:
+                # la reproducción sigue a calidad completa desde el frame del proxy
+                self.decoder.seek(self.current_frame_number, self._loop_range())
+                self._show_next_decoded()
+            self.clock.reset()
+            self.timer.start(self.clock.ms_until_next())
+
+    def set_speed(self, speed):
+        """velocidad de reproducción (1.0 = fps del vídeo)"""
+        self.clock.set_speed(speed)
+        if self.timer.isActive():
+            self.timer.start(self.clock.ms_until_next())
+
+    def _loop_range(self):
+        return (self.loop_start, self.loop_end) if self.loop_enabled else None
 
     def seek_frame(self, delta):
         """saltar a un frame relativo"""
-        if not self.cap:
+        if not self.decoder:
             return
-        current = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        new_frame = max(0, current + delta)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_frame)
-        ret, frame = self.cap.read()
-        if ret:
-            self.current_frame = frame.copy()
-            self.display_frame()
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_frame)
+        self.goto_frame(self.current_frame_number + delta)
 
     def goto_frame(self, frame_number):
         """saltar a un frame específico"""
-        if not self.cap:
+        if not self.decoder:
             return
 
         frame_number = max(0, min(frame_number, self.total_frames - 1))
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = self.cap.read()
-        if ret:
-            self.current_frame = frame.copy()
-            self.display_frame()
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        if self.proxy and not self.playing:
+            # en pausa: el frame sale del proxy, sin saltar en el vídeo
+            frame = self.proxy.frame(frame_number)
+            if frame is not None:
+                self._show_item((frame_number, frame), from_proxy=True)
+                return
+        self.decoder.seek(frame_number, self._loop_range())
+        self._show_next_decoded()
 
     def play_loop(self, start_frame, end_frame):
         """reproducir en bucle entre dos frames"""
-        if not self.cap:
+        if not self.decoder:
             return
 
         start_frame = max(0, min(start_frame, self.total_frames - 1))
@@ -227,34 +408,43 @@ class VideoPlayer(QLabel):
         self.loop_start = start_frame
         self.loop_end = end_frame
 
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-        ret, frame = self.cap.read()
-        if ret:
-            self.current_frame = frame.copy()
-            self.display_frame()
-        else:
+        self.decoder.seek(start_frame, self._loop_range())
+        if not self._show_next_decoded():
             print(f"Error: no se pudo leer el frame {start_frame}")
 
         self.play()
 
+    def prefetch(self, ranges):
+        """precargar en la caché los rangos (inicio, fin) de una escena"""
+        if not self.prefetcher:
+            return
+        ranges = [(max(0, a), min(b, self.total_frames - 1)) for a, b in ranges]
+        # el bucle activo ya lo está decodificando el reproductor: al final
+        if self.loop_enabled:
+            current = (self.loop_start, self.loop_end)
+            ranges = [r for r in ranges if r != current] + [r for r in ranges if r == current]
+        self.prefetcher.request(ranges)
+
     def stop_loop(self):
         """detener el modo bucle"""
         self.loop_enabled = False
+        if self.decoder:
+            # los frames ya decodificados pueden ser del principio del bucle
+            self.decoder.seek(self.current_frame_number + 1)
         self.play()
 
     def get_current_frame_number(self):
-        if self.cap and self.cap.isOpened():
-            return int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        return 0
+        """número del frame que se está mostrando"""
+        return self.current_frame_number
 
     def get_video_info(self):
         """obtener información del video"""
-        if not self.cap or not self.cap.isOpened():
+        if not self.video_props:
             return None
 
-        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        width = self.video_props["width"]
+        height = self.video_props["height"]
+        fps = self.video_props["fps"]
         total_frames = self.total_frames
         duration = total_frames / fps if fps > 0 else 0
 
@@ -265,30 +455,38 @@ class VideoPlayer(QLabel):
             "fps": fps,
             "total_frames": total_frames,
             "duration": duration,
+            "dropped_frames": self.dropped_frames,
+            "stalls": self.stalls,
+            "speed": self.clock.speed,
+            "drift_ms": self.clock.drift_ms,
+            "mean_drift_ms": self.clock.mean_drift_ms,
+            "max_drift_ms": self.clock.max_drift_ms,
+            "decoded_frames": self.decoder.decoded if self.decoder else 0,
+            "buffered_frames": self.decoder.buffered if self.decoder else 0,
+            "seeks": self.decoder.seeks if self.decoder else 0,
+            "proxy": str(self.proxy.path) if self.proxy else None,
+            "cache": self.frame_cache.stats(),
         }
 
     def mouseMoveEvent(self, event):
-        if self.pixmap() and not self.pixmap().isNull():
-            pixmap_rect = self.pixmap().rect()
-            widget_rect = self.rect()
-
-            x_offset = (widget_rect.width() - pixmap_rect.width()) // 2
-            y_offset = (widget_rect.height() - pixmap_rect.height()) // 2
+        # solo cambia la capa superior: no se vuelve a convertir el frame
+        if self.base_image is not None:
+            image_rect = self.base_image.rect()
+            x_offset, y_offset = self._image_offset()
 
             pos = event.position()
             self.mouse_x = int(pos.x()) - x_offset
             self.mouse_y = int(pos.y()) - y_offset
 
             if (
-                0 <= self.mouse_x < pixmap_rect.width()
-                and 0 <= self.mouse_y < pixmap_rect.height()
+                0 <= self.mouse_x < image_rect.width()
+                and 0 <= self.mouse_y < image_rect.height()
             ):
                 self.show_mouse_coords = True
-                self.display_frame()
             else:
                 self.show_mouse_coords = False
-                self.display_frame()
+            self.update()
 
     def leaveEvent(self, event):
         self.show_mouse_coords = False
-        self.display_frame()
+        self.update()